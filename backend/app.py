@@ -1,6 +1,5 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.staticfiles import StaticFiles
 from pathlib import Path
 from dotenv import load_dotenv
 import os
@@ -11,8 +10,13 @@ backend_dir = Path(__file__).parent
 env_path = backend_dir / ".env"
 load_dotenv(dotenv_path=env_path)
 
-from core.db import init_db
-from routers import auth, users, recyclers, admin, reports, ml, analytics
+from core import consumers  # noqa: F401  (registers report event consumers)
+from core import events, metrics, profiler, stats, storage, warmup
+from core.compression import CompressionMiddleware
+from core.static import CachedStaticFiles
+from core.db import engine, init_db
+from routers import auth, users, recyclers, admin, reports, ml, analytics, live, search, uploads
+from routers import metrics as metrics_router
 
 app = FastAPI(title="E-Waste Management & Recycling Portal")
 
@@ -29,26 +33,47 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(profiler.ProfilerMiddleware)
+# Outermost, so latency includes every other middleware
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+profiler.instrument_engine(engine)
 
 
 @app.on_event("startup")
 def on_startup() -> None:
     init_db()
+    stats.start()
+    events.start()
+    warmup.start()
 
 
-# Static for uploaded images
-# Ensure uploads directory exists before mounting
-Path("uploads").mkdir(parents=True, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    # Deliver pending report events, then drain buffered stat deltas before the process exits
+    events.shutdown()
+    stats.shutdown()
+
+
+# Static for uploaded images. Only the local backend is served by the app; with
+# object storage, clients fetch images from presigned or CDN URLs (core/storage.py).
+if storage.backend.serves_files:
+    # Content-addressed uploads are cached as immutable; see core/static.py
+    app.mount("/uploads", CachedStaticFiles(directory=storage.UPLOAD_DIR), name="uploads")
 
 # Routers
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(recyclers.router, prefix="/recyclers", tags=["Recyclers"])
 app.include_router(reports.router, prefix="/reports", tags=["Reports"])
+app.include_router(uploads.router, prefix="/upload-sessions", tags=["Uploads"])
 app.include_router(ml.router, prefix="/ml", tags=["ML"])
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 app.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
+app.include_router(live.router, prefix="/live", tags=["Live"])
+app.include_router(search.router, prefix="/search", tags=["Search"])
+app.include_router(metrics_router.router, tags=["Metrics"])
 
 
 @app.get("/", tags=["Health"])
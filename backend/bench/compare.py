@@ -0,0 +1,68 @@
+"""
+Compare two bench/run.py result files route by route.
+
+Exits with status 1 when any route's p95 latency regressed by more than
+--threshold percent (default 10), so it can gate CI.
+
+Usage (from the backend directory):
+    python bench/compare.py bench-results/base.json bench-results/head.json --threshold 15
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def _load(path: Path) -> dict:
+    return json.loads(path.read_text())
+
+
+def _delta(old: float, new: float) -> float:
+    if old == 0:
+        return 0.0 if new == 0 else float("inf")
+    return (new - old) / old * 100.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed p95 regression in percent")
+    parser.add_argument("--min-requests", type=int, default=20, help="ignore routes with fewer samples than this")
+    args = parser.parse_args()
+
+    base, head = _load(args.base), _load(args.head)
+    if base.get("config") != head.get("config"):
+        print("warning: runs used different configurations; comparison may be misleading")
+    print(f"base {base.get('commit')} ({base.get('label') or '-'})  ->  head {head.get('commit')} ({head.get('label') or '-'})")
+    print(f"{'route':48} {'p95 base':>9} {'p95 head':>9} {'p95 %':>8} {'rps base':>9} {'rps head':>9}")
+
+    regressions = []
+    for route in sorted(set(base["routes"]) | set(head["routes"])):
+        old, new = base["routes"].get(route), head["routes"].get(route)
+        if old is None or new is None:
+            print(f"{route:48} {'only in ' + ('head' if old is None else 'base'):>9}")
+            continue
+        change = _delta(old["p95_ms"], new["p95_ms"])
+        flag = ""
+        if min(old["requests"], new["requests"]) >= args.min_requests and change > args.threshold:
+            regressions.append(route)
+            flag = "  REGRESSION"
+        print(f"{route:48} {old['p95_ms']:9.1f} {new['p95_ms']:9.1f} {change:+7.1f}% "
+              f"{old['throughput_rps']:9.1f} {new['throughput_rps']:9.1f}{flag}")
+    print(f"total throughput {base['throughput_rps']} -> {head['throughput_rps']} req/s "
+          f"({_delta(base['throughput_rps'], head['throughput_rps']):+.1f}%)")
+    if base.get("startup_s") is not None and head.get("startup_s") is not None:
+        print(f"server ready {base['startup_s']}s -> {head['startup_s']}s")
+    if base.get("import_profile") and head.get("import_profile"):
+        print(f"import app {base['import_profile']['total_ms']} ms -> {head['import_profile']['total_ms']} ms")
+
+    if regressions:
+        print(f"p95 regressed by more than {args.threshold}% on: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
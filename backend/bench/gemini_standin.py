@@ -0,0 +1,281 @@
+"""
+Offline stand-in for the Gemini REST API, for reproducible benchmarks and chaos
+tests of the upload path.
+
+It serves the endpoints `routers.ml` uses: `GET /v1beta/models` (list_models)
+and `POST /v1beta/models/{model}:generateContent`. Verdicts are replayed from a
+recordings file keyed by the SHA-256 of the image bytes; unknown images get
+--default-verdict. Requests with several images (batched verification) are
+answered with a JSON array keyed by index. Faults are drawn from a seeded RNG:
+latency from a distribution, timeouts (the request hangs), 5xx errors and
+malformed (non-JSON) answers.
+
+Point the app at it with:
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8200 GEMINI_API_KEY=standin
+
+Runtime control, for chaos tests that change faults mid-run:
+    GET  /_standin/stats     calls, images and outcomes so far
+    POST /_standin/config    JSON with any of the fault options below, e.g. {"error_rate": 0.5}
+    POST /_standin/reset     zero the stats
+
+Usage (from the backend directory):
+    python bench/gemini_standin.py serve --port 8200 --recordings verdicts.json \\
+        --latency-ms 400 --latency-dist lognormal --jitter-ms 200 --error-rate 0.02 --malformed-rate 0.01
+    # Record verdicts from the real API for a folder of images (needs GEMINI_API_KEY):
+    python bench/gemini_standin.py record path/to/images --out verdicts.json
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+MODELS = ("gemini-1.5-flash-001", "gemini-1.5-flash", "gemini-1.5-flash-002")
+FAULT_OPTIONS = (
+    "latency_ms", "jitter_ms", "latency_dist", "timeout_rate", "hang_s", "error_rate", "error_status",
+    "malformed_rate", "default_verdict",
+)
+LATENCY_DISTS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+
+class StandIn:
+    def __init__(self, args: argparse.Namespace, recordings: dict[str, dict]) -> None:
+        self.recordings = recordings
+        self.config = {name: getattr(args, name) for name in FAULT_OPTIONS}
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.stats: dict[str, int] = {}
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    def draw(self) -> tuple[float, str]:
+        """(latency seconds, outcome) for one call; outcome is ok, timeout, error or malformed."""
+        c = self.config
+        with self.lock:
+            mean = c["latency_ms"]
+            dist = c["latency_dist"]
+            if dist == "uniform":
+                ms = self.rng.uniform(mean - c["jitter_ms"], mean + c["jitter_ms"])
+            elif dist == "normal":
+                ms = self.rng.gauss(mean, c["jitter_ms"])
+            elif dist == "lognormal":
+                # Median latency_ms; jitter_ms / latency_ms is the log-space sigma
+                ms = mean * math.exp(self.rng.gauss(0.0, c["jitter_ms"] / mean if mean else 0.0))
+            elif dist == "exponential":
+                ms = self.rng.expovariate(1.0 / mean) if mean else 0.0
+            else:
+                ms = mean
+            roll = self.rng.random()
+        if roll < c["timeout_rate"]:
+            return c["hang_s"], "timeout"
+        roll -= c["timeout_rate"]
+        if roll < c["error_rate"]:
+            return max(ms, 0.0) / 1000.0, "error"
+        roll -= c["error_rate"]
+        if roll < c["malformed_rate"]:
+            return max(ms, 0.0) / 1000.0, "malformed"
+        return max(ms, 0.0) / 1000.0, "ok"
+
+    def verdict(self, image: bytes) -> dict:
+        digest = hashlib.sha256(image).hexdigest()
+        recorded = self.recordings.get(digest)
+        if recorded is not None:
+            self.count("replayed")
+            return {"ewaste": bool(recorded["ewaste"]), "reason": recorded.get("reason") or "Recorded verdict."}
+        self.count("unrecorded")
+        ewaste = self.config["default_verdict"] == "ewaste"
+        return {"ewaste": ewaste, "reason": f"Stand-in default verdict ({self.config['default_verdict']})."}
+
+
+def _images(body: dict) -> list[bytes]:
+    out = []
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            inline = part.get("inlineData") or part.get("inline_data")
+            if inline:
+                out.append(base64.b64decode(inline.get("data", "")))
+    return out
+
+
+def _model_resource(name: str) -> dict:
+    return {
+        "name": f"models/{name}",
+        "displayName": name,
+        "supportedGenerationMethods": ["generateContent", "countTokens"],
+        "inputTokenLimit": 1048576,
+        "outputTokenLimit": 8192,
+    }
+
+
+def make_handler(standin: StandIn):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args) -> None:  # noqa: A002 - quiet by default
+            pass
+
+        def _send(self, status: int, payload, content_type: str = "application/json") -> None:
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status: int, message: str) -> None:
+            self._send(status, {"error": {"code": status, "message": message, "status": HTTPStatus(status).phrase.upper().replace(" ", "_")}})
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self) -> None:  # noqa: N802
+            path = self.path.split("?", 1)[0]
+            if path == "/_standin/stats":
+                with standin.lock:
+                    self._send(200, {"stats": dict(standin.stats), "config": standin.config})
+            elif path == "/v1beta/models":
+                standin.count("list_models")
+                self._send(200, {"models": [_model_resource(m) for m in MODELS]})
+            elif path.startswith("/v1beta/models/"):
+                self._send(200, _model_resource(path.rsplit("/", 1)[1]))
+            else:
+                self._error(404, f"Unknown path {path}")
+
+        def do_POST(self) -> None:  # noqa: N802
+            path = self.path.split("?", 1)[0]
+            try:
+                body = self._body()
+            except ValueError:
+                self._error(400, "Request body is not JSON")
+                return
+            if path == "/_standin/config":
+                unknown = set(body) - set(FAULT_OPTIONS)
+                if unknown or body.get("latency_dist", "fixed") not in LATENCY_DISTS:
+                    self._error(400, f"Unknown options: {sorted(unknown)}")
+                    return
+                with standin.lock:
+                    standin.config.update(body)
+                self._send(200, {"config": standin.config})
+            elif path == "/_standin/reset":
+                with standin.lock:
+                    standin.stats.clear()
+                self._send(200, {"stats": {}})
+            elif path.startswith("/v1beta/models/") and path.endswith(":generateContent"):
+                self._generate(body)
+            else:
+                self._error(404, f"Unknown path {path}")
+
+        def _generate(self, body: dict) -> None:
+            images = _images(body)
+            standin.count("calls")
+            standin.count("images", len(images))
+            delay, outcome = standin.draw()
+            standin.count(outcome)
+            time.sleep(delay)
+            if outcome == "timeout":
+                # Never answer: drop the connection once the hang is over
+                self.close_connection = True
+                return
+            if outcome == "error":
+                self._error(standin.config["error_status"], "Stand-in injected error")
+                return
+            if outcome == "malformed":
+                text = "Sure! The image appears to contain e-waste"
+            elif len(images) > 1:
+                text = json.dumps([{"index": i, **standin.verdict(img)} for i, img in enumerate(images)])
+            else:
+                text = json.dumps(standin.verdict(images[0]) if images else {"ewaste": False, "reason": "No image."})
+            self._send(200, {
+                "candidates": [{
+                    "content": {"role": "model", "parts": [{"text": text}]},
+                    "finishReason": "STOP",
+                    "index": 0,
+                }],
+                "usageMetadata": {"promptTokenCount": 258 * len(images) + 80, "candidatesTokenCount": 20},
+            })
+
+    return Handler
+
+
+def serve(args: argparse.Namespace) -> None:
+    recordings = json.loads(args.recordings.read_text()) if args.recordings else {}
+    standin = StandIn(args, recordings)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(standin))
+    server.daemon_threads = True
+    print(f"Gemini stand-in on http://{args.host}:{args.port} ({len(recordings)} recorded verdicts)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def record(args: argparse.Namespace) -> None:
+    """Ask the real API about every image in a folder and write the verdicts file."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    from routers.ml import detect_ewaste
+
+    existing: dict[str, dict] = json.loads(args.out.read_text()) if args.out.exists() else {}
+    for path in sorted(p for p in args.images.iterdir() if p.is_file()):
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in existing:
+            continue
+        mime = "image/png" if path.suffix.lower() == ".png" else "image/jpeg"
+        ewaste, reason = detect_ewaste(data, mime)
+        existing[digest] = {"ewaste": ewaste, "reason": reason, "file": path.name}
+        print(f"{path.name}: {'ewaste' if ewaste else 'not ewaste'} - {reason}")
+    args.out.write_text(json.dumps(existing, indent=2, sort_keys=True))
+    print(f"{len(existing)} verdicts in {args.out}")
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="mean (median for lognormal) latency")
+    parser.add_argument("--jitter-ms", type=float, default=100.0,
+                        help="uniform +/- range, normal stddev; for lognormal, sigma = jitter / latency")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTS, default="uniform")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of calls that hang")
+    parser.add_argument("--hang-s", type=float, default=120.0, help="how long a hung call waits before dropping")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with an error")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of answers that are not JSON")
+    parser.add_argument("--default-verdict", choices=("ewaste", "not_ewaste"), default="ewaste",
+                        help="verdict for images without a recording")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="run the stand-in server")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8200)
+    p_serve.add_argument("--recordings", type=Path, default=None, help="JSON {sha256: {ewaste, reason}}")
+    p_serve.add_argument("--seed", type=int, default=1)
+    add_fault_arguments(p_serve)
+    p_record = sub.add_parser("record", help="record real verdicts for a folder of images")
+    p_record.add_argument("images", type=Path)
+    p_record.add_argument("--out", type=Path, default=Path("verdicts.json"))
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args)
+    else:
+        record(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+pytest plugin that fails tests whose requests execute more SQL than budgeted.
+
+Enable it from the backend directory with ``python -m pytest -p bench.query_budget``
+(or ``pytest_plugins = ["bench.query_budget"]`` in a conftest), then mark tests:
+
+    @pytest.mark.query_budget(3)                                  # every request in the test
+    @pytest.mark.query_budget(4, route="/reports/history")        # only requests to this route
+    @pytest.mark.query_budget(6, route="/reports/create", method="POST")
+
+Budgets are per request. Requests are recorded through core.profiler.capture(),
+so the app must be the one built by app.py (it installs the profiler middleware);
+SQL_PROFILE_ENABLED does not need to be set.
+"""
+from __future__ import annotations
+
+import pytest
+
+from core import profiler
+
+
+def pytest_configure(config) -> None:
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries, route=None, method=None): fail if a request runs more SQL statements",
+    )
+
+
+def _budget(marker) -> tuple[int, str | None, str | None]:
+    max_queries = marker.args[0] if marker.args else marker.kwargs["max_queries"]
+    return int(max_queries), marker.kwargs.get("route"), marker.kwargs.get("method")
+
+
+def _report(profile: profiler.RequestProfile, budget: int) -> str:
+    lines = [f"{profile.method} {profile.path} ({profile.route}) ran {len(profile.statements)} queries, budget {budget}"]
+    for shape, n in profile.repeated(threshold=2):
+        lines.append(f"  {n} x {shape}")
+    return "\n".join(lines)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    markers = list(item.iter_markers("query_budget"))
+    if not markers:
+        yield
+        return
+    with profiler.capture() as profiles:
+        outcome = yield
+    if outcome.excinfo is not None:
+        return
+    failures = []
+    for marker in markers:
+        budget, route, method = _budget(marker)
+        for profile in profiles:
+            if route is not None and profile.route != route:
+                continue
+            if method is not None and profile.method != method.upper():
+                continue
+            if len(profile.statements) > budget:
+                failures.append(_report(profile, budget))
+    if failures:
+        pytest.fail("Query budget exceeded:\n" + "\n".join(failures), pytrace=False)
@@ -0,0 +1,393 @@
+"""
+Mixed-workload load test for the API.
+
+Boots bench/server.py (the real app on a temporary SQLite file, Gemini stubbed)
+in a subprocess, seeds users, a recycler with an approved center and an admin,
+then drives weighted operations from concurrent clients and reports throughput
+and p50/p95/p99 latency per route. Results are written as JSON so runs can be
+compared across commits with bench/compare.py.
+
+Usage (from the backend directory):
+    pip install -r bench/requirements.txt
+    python bench/run.py --concurrency 16 --duration 30 --out bench-results/head.json
+    python bench/run.py --mix upload=1,history=4 --stub-latency-ms 800 --stub-error-rate 0.05
+    # Exercise the real Gemini client against the recorded-response stand-in:
+    python bench/run.py --gemini standin --standin-recordings verdicts.json --standin-malformed-rate 0.02
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+
+DEFAULT_MIX = "login=1,upload=2,history=6,assigned=4,status=2,analytics=1"
+PASSWORD = "bench-password"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise SystemExit(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def _images(count: int, seed: int) -> list[bytes]:
+    """Small random JPEGs; distinct content so uploads don't collide."""
+    from PIL import Image
+
+    rng = random.Random(seed)
+    out = []
+    for _ in range(count):
+        img = Image.new("RGB", (320, 240))
+        img.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(320 * 240)])
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=80)
+        out.append(buf.getvalue())
+    return out
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = {}
+        self.statuses: dict[str, dict[str, int]] = {}
+
+    def record(self, route: str, status: int, seconds: float) -> None:
+        self.latencies.setdefault(route, []).append(seconds * 1000.0)
+        bucket = self.statuses.setdefault(route, {})
+        bucket[str(status)] = bucket.get(str(status), 0) + 1
+
+    def summary(self, elapsed: float) -> dict:
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            values.sort()
+            errors = sum(n for code, n in self.statuses[route].items() if not code.startswith("2"))
+            routes[route] = {
+                "requests": len(values),
+                "errors": errors,
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "max_ms": round(values[-1], 2),
+                "status_codes": self.statuses[route],
+            }
+        total = sum(r["requests"] for r in routes.values())
+        return {"elapsed_s": round(elapsed, 2), "total_requests": total,
+                "throughput_rps": round(total / elapsed, 2), "routes": routes}
+
+
+class Context:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, rng: random.Random, images: list[bytes]) -> None:
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.images = images
+        self.users: list[tuple[str, dict]] = []  # (email, auth headers)
+        self.recycler: dict = {}
+        self.admin: dict = {}
+        self.center_id: int | None = None
+        self.report_ids: list[int] = []
+
+    async def call(self, route: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            resp = await self.client.request(method, url, **kwargs)
+            status = resp.status_code
+        except httpx.HTTPError:
+            resp, status = None, 599
+        self.recorder.record(route, status, time.perf_counter() - started)
+        return resp
+
+
+async def op_login(ctx: Context) -> None:
+    email, _ = ctx.rng.choice(ctx.users)
+    await ctx.call("POST /auth/login-json", "POST", "/auth/login-json", json={"email": email, "password": PASSWORD})
+
+
+async def op_upload(ctx: Context) -> None:
+    _, headers = ctx.rng.choice(ctx.users)
+    image = ctx.rng.choice(ctx.images)
+    name = f"bench_{ctx.rng.getrandbits(48):012x}.jpg"
+    resp = await ctx.call(
+        "POST /reports/create", "POST", "/reports/create", headers=headers,
+        files={"file": (name, image, "image/jpeg")}, data={"recycler_id": str(ctx.center_id)},
+    )
+    if resp is not None and resp.status_code == 200:
+        ctx.report_ids.append(resp.json()["id"])
+
+
+async def op_history(ctx: Context) -> None:
+    _, headers = ctx.rng.choice(ctx.users)
+    await ctx.call("GET /reports/history", "GET", "/reports/history", headers=headers)
+
+
+async def op_assigned(ctx: Context) -> None:
+    await ctx.call("GET /recyclers/assigned", "GET", "/recyclers/assigned", headers=ctx.recycler)
+
+
+async def op_status(ctx: Context) -> None:
+    if not ctx.report_ids:
+        return await op_assigned(ctx)
+    report_id = ctx.rng.choice(ctx.report_ids)
+    status = ctx.rng.choice(["received", "recycled"])
+    await ctx.call(
+        "POST /recyclers/assigned/{report_id}/status", "POST", f"/recyclers/assigned/{report_id}/status",
+        headers=ctx.recycler, json={"status": status},
+    )
+
+
+async def op_analytics(ctx: Context) -> None:
+    await ctx.call("GET /analytics/overview", "GET", "/analytics/overview", headers=ctx.admin)
+
+
+OPERATIONS = {
+    "login": op_login,
+    "upload": op_upload,
+    "history": op_history,
+    "assigned": op_assigned,
+    "status": op_status,
+    "analytics": op_analytics,
+}
+
+
+async def _register(client: httpx.AsyncClient, email: str, **extra) -> dict:
+    resp = await client.post("/auth/register", json={"email": email, "password": PASSWORD, **extra})
+    resp.raise_for_status()
+    token = (await client.post("/auth/login-json", json={"email": email, "password": PASSWORD})).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def seed(ctx: Context, users: int, initial_reports: int) -> None:
+    client = ctx.client
+    ctx.admin = await _register(client, "admin@bench.example.com", role="admin")
+    ctx.recycler = await _register(
+        client, "recycler@bench.example.com", role="recycler",
+        center_name="Bench Center", center_latitude=12.97, center_longitude=77.59,
+    )
+    centers = (await client.get("/recyclers/centers")).json()
+    ctx.center_id = next(c["id"] for c in centers if c["name"] == "Bench Center")
+    (await client.post(f"/admin/centers/{ctx.center_id}/approve", headers=ctx.admin)).raise_for_status()
+    for i in range(users):
+        email = f"user{i}@bench.example.com"
+        ctx.users.append((email, await _register(client, email)))
+    # Pre-populate so list endpoints have rows to return from the first request
+    for _ in range(initial_reports):
+        await op_upload(ctx)
+
+
+async def drive(ctx: Context, mix: dict[str, float], concurrency: int, duration: float,
+                max_requests: int | None) -> float:
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    deadline = time.perf_counter() + duration
+    issued = 0
+
+    async def worker() -> None:
+        nonlocal issued
+        while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+            issued += 1
+            await OPERATIONS[ctx.rng.choices(names, weights)[0]](ctx)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started
+
+
+def import_profile(workdir: Path, top: int = 15) -> dict:
+    """
+    `python -X importtime -c "import app"` in a fresh interpreter: total import
+    time plus the most expensive modules imported by app or its direct imports.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=workdir, env={**os.environ, "PYTHONPATH": str(BACKEND_DIR)}, capture_output=True, text=True,
+    )
+    modules = []
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part for part in line.replace("import time:", "|", 1).split("|"))
+        depth = (len(name) - len(name.lstrip())) // 2
+        module = name.strip()
+        if module == "app":
+            total_us = int(cumulative_us)
+        elif depth <= 2:
+            modules.append((int(cumulative_us), module))
+    modules.sort(reverse=True)
+    return {
+        "total_ms": round(total_us / 1000.0, 1),
+        "top": [{"module": m, "cumulative_ms": round(us / 1000.0, 1)} for us, m in modules[:top]],
+    }
+
+
+def _wait_ready(base_url: str, proc: subprocess.Popen, timeout: float = 60.0) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if proc.poll() is not None:
+            raise SystemExit(f"Server exited early with code {proc.returncode}")
+        try:
+            if httpx.get(base_url + "/", timeout=1.0).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise SystemExit("Server did not become ready in time")
+
+
+async def run(args: argparse.Namespace, base_url: str) -> dict:
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        ctx = Context(client, recorder, rng, _images(16, args.seed))
+        await seed(ctx, args.users, args.initial_reports)
+        # Seeding traffic is not part of the measurement
+        ctx.recorder = Recorder()
+        elapsed = await drive(ctx, _parse_mix(args.mix), args.concurrency, args.duration, args.requests)
+        return ctx.recorder.summary(elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of measured load")
+    parser.add_argument("--requests", type=int, default=None, help="stop after this many requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted operations (default: {DEFAULT_MIX})")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--initial-reports", type=int, default=50)
+    parser.add_argument("--stub-latency-ms", type=float, default=300.0)
+    parser.add_argument("--stub-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--gemini", choices=("stub", "standin"), default="stub",
+                        help="stub: in-process fake verifier; standin: real client against bench/gemini_standin.py, "
+                             "with the --stub-* latency and error settings")
+    parser.add_argument("--standin-recordings", type=Path, default=None, help="recorded verdicts for the stand-in")
+    parser.add_argument("--standin-timeout-rate", type=float, default=0.0)
+    parser.add_argument("--standin-malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--label", default=None, help="free-form label stored with the results")
+    parser.add_argument("--out", type=Path, default=None, help="write JSON results here")
+    parser.add_argument("--keep-workdir", action="store_true")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="ewm-bench-"))
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        # The load generator measures the app, not the upload limiter; set RATE_LIMIT_ENABLED=1 to include it
+        "RATE_LIMIT_ENABLED": "0",
+        **os.environ,
+        "BENCH_WORKDIR": str(workdir),
+        "BENCH_STUB_LATENCY_MS": str(args.stub_latency_ms),
+        "BENCH_STUB_JITTER_MS": str(args.stub_jitter_ms),
+        "BENCH_STUB_ERROR_RATE": str(args.stub_error_rate),
+    }
+    standin = None
+    if args.gemini == "standin":
+        standin_port = _free_port()
+        cmd = [
+            sys.executable, str(BENCH_DIR / "gemini_standin.py"), "serve", "--port", str(standin_port),
+            "--seed", str(args.seed), "--latency-ms", str(args.stub_latency_ms),
+            "--jitter-ms", str(args.stub_jitter_ms), "--error-rate", str(args.stub_error_rate),
+            "--timeout-rate", str(args.standin_timeout_rate), "--malformed-rate", str(args.standin_malformed_rate),
+        ]
+        if args.standin_recordings:
+            cmd += ["--recordings", str(args.standin_recordings)]
+        standin = subprocess.Popen(cmd)
+        env.update({"GEMINI_API_ENDPOINT": f"http://127.0.0.1:{standin_port}", "GEMINI_API_KEY": "standin"})
+    imports = import_profile(workdir)
+    proc = subprocess.Popen([sys.executable, str(BENCH_DIR / "server.py"), "--port", str(port)], env=env)
+    try:
+        ready_s = _wait_ready(base_url, proc)
+        summary = asyncio.run(run(args, base_url))
+    finally:
+        for p in (proc, standin):
+            if p is None:
+                continue
+            p.terminate()
+            try:
+                p.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        if not args.keep_workdir:
+            import shutil
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "label": args.label,
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": {
+            "concurrency": args.concurrency, "duration": args.duration, "requests": args.requests,
+            "mix": args.mix, "users": args.users, "initial_reports": args.initial_reports,
+            "stub_latency_ms": args.stub_latency_ms, "stub_jitter_ms": args.stub_jitter_ms,
+            "stub_error_rate": args.stub_error_rate, "seed": args.seed, "gemini": args.gemini,
+            "standin_timeout_rate": args.standin_timeout_rate, "standin_malformed_rate": args.standin_malformed_rate,
+        },
+        "startup_s": round(ready_s, 3),
+        "import_profile": imports,
+        **summary,
+    }
+
+    print(f"{'route':48} {'reqs':>6} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, r in result["routes"].items():
+        print(f"{route:48} {r['requests']:6d} {r['errors']:5d} {r['throughput_rps']:8.1f} "
+              f"{r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f}")
+    print(f"total {result['total_requests']} requests in {result['elapsed_s']}s "
+          f"({result['throughput_rps']} req/s), server ready in {result['startup_s']}s")
+    print(f"import app: {imports['total_ms']} ms; slowest: " + ", ".join(
+        f"{m['module']} {m['cumulative_ms']} ms" for m in imports["top"][:5]
+    ))
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(result, indent=2))
+        print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
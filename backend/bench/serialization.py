@@ -0,0 +1,146 @@
+"""
+Compare list-endpoint serialization: the fast path (column tuples + orjson, see
+core/listings.py) against the previous ORM + per-row Pydantic path.
+
+Both run through the real app over FastAPI's TestClient against a scratch
+database holding --reports reports for one user spread over --centers centers.
+
+Usage (from the backend directory):
+    python bench/serialization.py --reports 5000 --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _seed(n_reports: int, n_centers: int) -> int:
+    from sqlalchemy import insert
+
+    from core.db import SessionLocal
+    from models.models import RecyclerCenter, Report, User
+
+    db = SessionLocal()
+    try:
+        user = User(email="bench@example.com", hashed_password="x", role="user")
+        db.add(user)
+        db.flush()
+        db.execute(insert(RecyclerCenter), [
+            {"id": i, "name": f"Center {i}", "latitude": 12.9, "longitude": 77.5, "approved": True,
+             "performance_score": 50.0, "total_recycled": 10, "total_co2_saved": 12.5, "rating": 4.2}
+            for i in range(1, n_centers + 1)
+        ])
+        now = datetime.utcnow()
+        db.execute(insert(Report), [
+            {"user_id": user.id, "image_path": f"{user.id}_{i:08d}.jpg", "category": "Battery", "confidence": 0.91,
+             "suggestion": "Take to a recycling center; avoid general trash.", "recycler_id": i % n_centers + 1,
+             "status": "assigned", "co2_saved": 2.5, "points_awarded": 19, "created_at": now - timedelta(minutes=i)}
+            for i in range(n_reports)
+        ])
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def _legacy_router():
+    """The pre-fast-path /reports/history implementation, kept here as the baseline."""
+    from fastapi import APIRouter, Depends
+    from sqlalchemy.orm import Session
+
+    from core.db import get_db
+    from models.models import RecyclerCenter, Report, User
+    from routers.reports import get_current_user
+    from schemas.schemas import ReportOut
+
+    router = APIRouter()
+
+    @router.get("/legacy-history", response_model=List[ReportOut])
+    def legacy_history(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+        reports = db.query(Report).filter(Report.user_id == current_user.id).order_by(Report.created_at.desc()).all()
+        center_ids = {r.recycler_id for r in reports if r.recycler_id}
+        center_lookup = {c.id: c for c in db.query(RecyclerCenter).filter(RecyclerCenter.id.in_(center_ids))}
+        return [
+            ReportOut(
+                id=r.id, image_url=f"/uploads/{r.image_path}", category=r.category, confidence=r.confidence,
+                suggestion=r.suggestion, recycler=center_lookup.get(r.recycler_id), status=r.status,
+                co2_saved=r.co2_saved, points_awarded=r.points_awarded, created_at=r.created_at,
+            )
+            for r in reports
+        ]
+
+    return router
+
+
+def _time(client, url: str, repeat: int) -> tuple[list[float], int]:
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        resp = client.get(url)
+        samples.append((time.perf_counter() - started) * 1000.0)
+        resp.raise_for_status()
+        size = len(resp.content)
+    return samples, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=5000)
+    parser.add_argument("--centers", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="ewm-serialization-"))
+    sys.path.insert(0, str(BACKEND_DIR))
+    from fastapi.testclient import TestClient
+
+    import app as app_module
+    from core import listings
+    from core.db import SessionLocal
+    from models.models import User
+    from routers import reports
+
+    app = app_module.app
+    app.include_router(_legacy_router(), prefix="/bench")
+    with TestClient(app) as client:
+        user_id = _seed(args.reports, args.centers)
+
+        def current_user():
+            db = SessionLocal()
+            try:
+                return db.get(User, user_id)
+            finally:
+                db.close()
+
+        app.dependency_overrides[reports.get_current_user] = current_user
+        print(f"{args.reports} reports, {args.centers} centers, {args.repeat} runs; "
+              f"encoder: {'orjson' if listings.orjson is not None else 'json'}")
+        print(f"{'path':32} {'median ms':>10} {'p95 ms':>8} {'bytes':>10}")
+        results = {}
+        for label, url in [
+            ("legacy (ORM + Pydantic)", "/bench/legacy-history"),
+            ("fast", "/reports/history"),
+            ("fast, compact", "/reports/history?compact=true"),
+        ]:
+            _time(client, url, 2)  # warm caches
+            samples, size = _time(client, url, args.repeat)
+            samples.sort()
+            results[label] = statistics.median(samples)
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            print(f"{label:32} {results[label]:10.1f} {p95:8.1f} {size:10d}")
+        base = results["legacy (ORM + Pydantic)"]
+        print(f"speed-up: fast {base / results['fast']:.1f}x, compact {base / results['fast, compact']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Boot the API for benchmarking inside a scratch directory, with Gemini stubbed out.
+
+The working directory (SQLite file and uploads) is taken from BENCH_WORKDIR. The
+stub verifier honours:
+    BENCH_STUB_LATENCY_MS   mean simulated Gemini latency (default 300)
+    BENCH_STUB_JITTER_MS    uniform +/- jitter around the mean (default 100)
+    BENCH_STUB_ERROR_RATE   fraction of calls that fail with 502 (default 0)
+
+With GEMINI_API_ENDPOINT set, the stub is skipped and the real verifier talks
+to that endpoint instead (see bench/gemini_standin.py).
+
+Usage:
+    python bench/server.py --port 8100
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def stub_detect_ewaste(image_bytes: bytes, mime_type: str | None = None) -> tuple[bool, str]:
+    from fastapi import HTTPException
+
+    latency = float(os.environ.get("BENCH_STUB_LATENCY_MS", "300"))
+    jitter = float(os.environ.get("BENCH_STUB_JITTER_MS", "100"))
+    error_rate = float(os.environ.get("BENCH_STUB_ERROR_RATE", "0"))
+    time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)) / 1000.0)
+    if random.random() < error_rate:
+        raise HTTPException(status_code=502, detail="Gemini request failed: stubbed error")
+    return True, "Stubbed verdict"
+
+
+def stub_detect_ewaste_batch(images: list[tuple[bytes, str | None]]) -> tuple[list, int]:
+    """Batched verification (GEMINI_BATCH_SIZE > 1) as one stubbed call for the whole batch."""
+    return [stub_detect_ewaste(b"")] * len(images), 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+
+    workdir = Path(os.environ.get("BENCH_WORKDIR", "."))
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.chdir(workdir)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    import uvicorn
+    from routers import ml, reports
+
+    if not os.environ.get("GEMINI_API_ENDPOINT"):
+        ml.detect_ewaste = stub_detect_ewaste
+        ml.detect_ewaste_batch = stub_detect_ewaste_batch
+        reports.detect_ewaste = stub_detect_ewaste
+    from app import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import bindparam, func, insert, select, union, update
+from sqlalchemy.orm import Session
+
+from core import stats
+
+logger = logging.getLogger(__name__)
+
+ACHIEVEMENT_RULES_TTL = float(os.environ.get("ACHIEVEMENT_RULES_TTL", "60"))
+
+# Metrics a requirement can depend on. Stored columns are read from `users`;
+# `reports` and `streak_days` are derived from the reports table only when a
+# candidate rule actually needs them.
+METRICS = {"points", "level", "items_recycled", "co2_saved", "reports", "streak_days"}
+REPORT_CREATED_METRICS = frozenset({"points", "level", "co2_saved", "reports", "streak_days"})
+REPORT_RECYCLED_METRICS = frozenset({"items_recycled"})
+
+_OPERATORS: dict[str, Callable[[float, float], bool]] = {
+    "gte": lambda v, t: v >= t,
+    "gt": lambda v, t: v > t,
+    "lte": lambda v, t: v <= t,
+    "lt": lambda v, t: v < t,
+    "eq": lambda v, t: v == t,
+}
+
+
+class RequirementError(ValueError):
+    pass
+
+
+class Rule:
+    __slots__ = ("achievement_id", "points_reward", "metrics", "predicate")
+
+    def __init__(self, achievement_id: int, points_reward: int, metrics: frozenset[str],
+                 predicate: Callable[[dict], bool]) -> None:
+        self.achievement_id = achievement_id
+        self.points_reward = points_reward
+        self.metrics = metrics
+        self.predicate = predicate
+
+
+def compile_requirement(requirement: object) -> tuple[frozenset[str], Callable[[dict], bool]]:
+    """
+    Compile a requirement into (metrics it depends on, predicate over a metrics dict).
+
+    Accepted shapes:
+      {"metric": "points", "gte": 500}      explicit comparison (gte/gt/lte/lt/eq)
+      {"items_recycled": 10}                shorthand for gte
+      {"all": [req, ...]} / {"any": [...]}  combinations
+    """
+    if not isinstance(requirement, dict) or not requirement:
+        raise RequirementError(f"Unsupported requirement: {requirement!r}")
+
+    if "all" in requirement or "any" in requirement:
+        combinator = "all" if "all" in requirement else "any"
+        parts = [compile_requirement(r) for r in requirement[combinator]]
+        if not parts:
+            raise RequirementError(f"Empty '{combinator}' requirement")
+        metrics = frozenset().union(*(m for m, _ in parts))
+        preds = [p for _, p in parts]
+        if combinator == "all":
+            return metrics, lambda values: all(p(values) for p in preds)
+        return metrics, lambda values: any(p(values) for p in preds)
+
+    if "metric" in requirement:
+        metric = requirement["metric"]
+        comparisons = [(op, requirement[op]) for op in _OPERATORS if op in requirement]
+    else:
+        if len(requirement) != 1:
+            raise RequirementError(f"Ambiguous requirement: {requirement!r}")
+        ((metric, threshold),) = requirement.items()
+        comparisons = [("gte", threshold)]
+    if metric not in METRICS:
+        raise RequirementError(f"Unknown metric: {metric!r}")
+    if not comparisons:
+        raise RequirementError(f"No comparison for metric {metric!r}")
+    checks = [(_OPERATORS[op], float(threshold)) for op, threshold in comparisons]
+    return frozenset({metric}), lambda values: all(fn(values.get(metric, 0), t) for fn, t in checks)
+
+
+class AchievementEngine:
+    """
+    Rule engine over the `achievements` table.
+
+    Requirements are compiled once into predicates and indexed by the metrics
+    they depend on, so a change to one metric only evaluates the rules that read it.
+    """
+
+    def __init__(self, ttl: float = ACHIEVEMENT_RULES_TTL) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._by_metric: dict[str, list[Rule]] = {}
+        self._loaded_at: Optional[float] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def _rules(self, db: Session) -> dict[str, list[Rule]]:
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                self.cache_hits += 1
+                return self._by_metric
+            self.cache_misses += 1
+            from models.models import Achievement
+
+            by_metric: dict[str, list[Rule]] = {}
+            rows = db.execute(select(Achievement.id, Achievement.requirement, Achievement.points_reward)).all()
+            for achievement_id, requirement, points_reward in rows:
+                if not requirement:
+                    continue
+                try:
+                    metrics, predicate = compile_requirement(json.loads(requirement))
+                except (ValueError, TypeError, KeyError) as exc:
+                    logger.warning("Skipping achievement %s: %s", achievement_id, exc)
+                    continue
+                rule = Rule(achievement_id, points_reward or 0, metrics, predicate)
+                for metric in metrics:
+                    by_metric.setdefault(metric, []).append(rule)
+            self._by_metric = by_metric
+            self._loaded_at = time.monotonic()
+            return by_metric
+
+    def candidates(self, db: Session, changed: Iterable[str]) -> list[Rule]:
+        by_metric = self._rules(db)
+        seen: dict[int, Rule] = {}
+        for metric in changed:
+            for rule in by_metric.get(metric, ()):
+                seen.setdefault(rule.achievement_id, rule)
+        return list(seen.values())
+
+    def evaluate(self, db: Session, changes: dict[int, Iterable[str]], max_rounds: int = 3) -> dict[int, list[int]]:
+        """
+        Evaluate the rules affected by ``changes`` ({user_id: changed metrics}) and
+        award newly satisfied achievements in bulk. Points rewards can unlock further
+        points-based rules, so evaluation repeats for awarded users a few times.
+        The caller owns the transaction. Returns {user_id: [achievement_id, ...]}.
+        """
+        awarded: dict[int, list[int]] = {}
+        pending = {uid: set(metrics) for uid, metrics in changes.items()}
+        for _ in range(max_rounds):
+            if not pending:
+                break
+            round_awards = self._evaluate_once(db, pending)
+            for uid, ids in round_awards.items():
+                awarded.setdefault(uid, []).extend(ids)
+            pending = {uid: {"points", "level"} for uid in round_awards}
+        return awarded
+
+    def _evaluate_once(self, db: Session, changes: dict[int, set[str]]) -> dict[int, list[int]]:
+        from models.models import UserAchievement
+
+        by_user: dict[int, list[Rule]] = {}
+        for uid, metrics in changes.items():
+            rules = self.candidates(db, metrics)
+            if rules:
+                by_user[uid] = rules
+        if not by_user:
+            return {}
+
+        user_ids = list(by_user)
+        earned: set[tuple[int, int]] = set(
+            db.execute(
+                select(UserAchievement.user_id, UserAchievement.achievement_id)
+                .where(UserAchievement.user_id.in_(user_ids))
+            ).all()
+        )
+        needed = frozenset().union(*(r.metrics for rules in by_user.values() for r in rules))
+        values = user_metrics(db, user_ids, needed)
+
+        awards: dict[int, list[Rule]] = {}
+        for uid, rules in by_user.items():
+            current = values.get(uid)
+            if current is None:
+                continue
+            for rule in rules:
+                if (uid, rule.achievement_id) in earned:
+                    continue
+                if rule.predicate(current):
+                    awards.setdefault(uid, []).append(rule)
+        if awards:
+            _award(db, awards, {uid: current["badges"] for uid, current in values.items()})
+        return {uid: [r.achievement_id for r in rules] for uid, rules in awards.items()}
+
+
+def user_metrics(db: Session, user_ids: list[int], needed: Iterable[str] = METRICS) -> dict[int, dict]:
+    """Current metric values per user, including stat deltas still buffered by the coalescer."""
+    from models.models import ArchivedReport, Report, ReportRollup, User
+
+    needed = set(needed)
+    out: dict[int, dict] = {}
+    rows = db.execute(
+        select(User.id, User.points, User.level, User.total_items_recycled, User.total_co2_saved, User.badges)
+        .where(User.id.in_(user_ids))
+    ).all()
+    for uid, points, level, items, co2, badges in rows:
+        values = {
+            "points": points or 0,
+            "level": level or 1,
+            "items_recycled": items or 0,
+            "co2_saved": co2 or 0.0,
+            "badges": badges,
+        }
+        pending = stats.coalescer.pending_user(uid) if stats.STATS_COALESCE_ENABLED else None
+        if pending is not None:
+            values["points"] += pending.points
+            values["level"] = max(values["level"], values["points"] // 100 + 1)
+            values["items_recycled"] += pending.items_recycled
+            values["co2_saved"] += pending.co2_saved
+        out[uid] = values
+
+    if "reports" in needed:
+        counts = dict(
+            db.execute(
+                select(Report.user_id, func.count(Report.id))
+                .where(Report.user_id.in_(user_ids))
+                .group_by(Report.user_id)
+            ).all()
+        )
+        # Reports moved out by the retention job (core.retention) still count
+        for uid, n in db.execute(
+            select(ReportRollup.user_id, func.sum(ReportRollup.reports))
+            .where(ReportRollup.user_id.in_(user_ids))
+            .group_by(ReportRollup.user_id)
+        ).all():
+            counts[uid] = counts.get(uid, 0) + int(n)
+        for uid, values in out.items():
+            values["reports"] = counts.get(uid, 0)
+
+    if "streak_days" in needed:
+        since = datetime.utcnow() - timedelta(days=366)
+        days: dict[int, set[date]] = {}
+        for uid, day in db.execute(
+            union(
+                select(Report.user_id, func.date(Report.created_at))
+                .where(Report.user_id.in_(user_ids), Report.created_at >= since),
+                select(ArchivedReport.user_id, func.date(ArchivedReport.created_at))
+                .where(ArchivedReport.user_id.in_(user_ids), ArchivedReport.created_at >= since),
+            )
+        ).all():
+            days.setdefault(uid, set()).add(date.fromisoformat(day))
+        today = datetime.utcnow().date()
+        for uid, values in out.items():
+            values["streak_days"] = _streak(days.get(uid, set()), today)
+    return out
+
+
+def _streak(days: set[date], today: date) -> int:
+    """Consecutive days with at least one report, ending today or yesterday."""
+    day = today if today in days else today - timedelta(days=1)
+    streak = 0
+    while day in days:
+        streak += 1
+        day -= timedelta(days=1)
+    return streak
+
+
+def _award(db: Session, awards: dict[int, list["Rule"]], badges: dict[int, Optional[str]]) -> None:
+    from models.models import User, UserAchievement
+
+    now = datetime.utcnow()
+    conn = db.connection()
+    conn.execute(
+        insert(UserAchievement.__table__),
+        [
+            {"user_id": uid, "achievement_id": rule.achievement_id, "earned_at": now}
+            for uid, rules in awards.items()
+            for rule in rules
+        ],
+    )
+    users = User.__table__
+    badge_rows = []
+    for uid, rules in awards.items():
+        try:
+            current = json.loads(badges.get(uid) or "[]")
+        except ValueError:
+            current = []
+        current.extend(rule.achievement_id for rule in rules if rule.achievement_id not in current)
+        badge_rows.append({"b_id": uid, "v_badges": json.dumps(current)})
+    conn.execute(
+        update(users).where(users.c.id == bindparam("b_id")).values(badges=bindparam("v_badges")),
+        badge_rows,
+    )
+    for uid, rules in awards.items():
+        reward = sum(rule.points_reward for rule in rules)
+        if reward:
+            stats.record_user(db, uid, points=reward)
+
+
+engine = AchievementEngine()
+
+
+def backfill(db: Session, batch_size: int = 500) -> int:
+    """Evaluate every rule for every existing user, committing once per batch of users."""
+    from models.models import User
+
+    engine.invalidate()
+    total = 0
+    last_id = 0
+    while True:
+        user_ids = list(
+            db.execute(
+                select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+            ).scalars()
+        )
+        if not user_ids:
+            break
+        awarded = engine.evaluate(db, {uid: METRICS for uid in user_ids})
+        db.commit()
+        total += sum(len(ids) for ids in awarded.values())
+        last_id = user_ids[-1]
+    return total
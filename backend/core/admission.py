@@ -0,0 +1,189 @@
+"""
+Admission control for uploads and a fair-share scheduler for Gemini calls.
+
+Uploads pass a per-user and a global token bucket before any work is done;
+an empty bucket answers 429 with Retry-After. Verification calls then queue
+per user and are released round-robin across users at GEMINI_RPM, so one
+client's burst waits behind its own earlier requests rather than everyone
+else's. When the queue is full, or the expected wait is longer than
+GEMINI_MAX_WAIT_SECONDS, the request is shed with 429 instead of being queued.
+
+Limits are per process: with several workers, divide the global rates.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException
+
+from core import metrics
+
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") == "1"
+UPLOAD_RATE_PER_USER = float(os.environ.get("UPLOAD_RATE_PER_USER", "10"))  # per minute
+UPLOAD_BURST_PER_USER = float(os.environ.get("UPLOAD_BURST_PER_USER", "5"))
+UPLOAD_RATE_GLOBAL = float(os.environ.get("UPLOAD_RATE_GLOBAL", "600"))  # per minute
+UPLOAD_BURST_GLOBAL = float(os.environ.get("UPLOAD_BURST_GLOBAL", "50"))
+GEMINI_RPM = float(os.environ.get("GEMINI_RPM", "60"))
+GEMINI_BURST = float(os.environ.get("GEMINI_BURST", "5"))
+GEMINI_MAX_QUEUE = int(os.environ.get("GEMINI_MAX_QUEUE", "100"))
+GEMINI_MAX_QUEUE_PER_USER = int(os.environ.get("GEMINI_MAX_QUEUE_PER_USER", "5"))
+GEMINI_MAX_WAIT_SECONDS = float(os.environ.get("GEMINI_MAX_WAIT_SECONDS", "30"))
+
+REJECTIONS = metrics.Counter("admission_rejections_total", "Requests shed with 429", ("limit",))
+GEMINI_WAIT = metrics.Histogram(
+    "gemini_queue_wait_seconds", "Time verification calls waited for a Gemini slot",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, burst: float) -> None:
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(burst, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: Optional[float] = None) -> float:
+        """Take one token; returns 0.0 on success, else seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+    def give_back(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + 1.0)
+
+
+def _reject(limit: str, retry_after: float, detail: str) -> HTTPException:
+    REJECTIONS.inc((limit,))
+    seconds = max(1, math.ceil(retry_after)) if math.isfinite(retry_after) else 60
+    return HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(seconds)})
+
+
+class UploadLimiter:
+    # Buckets idle long enough to be full again carry no state worth keeping
+    MAX_TRACKED_USERS = 10000
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._global = TokenBucket(UPLOAD_RATE_GLOBAL, UPLOAD_BURST_GLOBAL)
+        self._users: OrderedDict[int, TokenBucket] = OrderedDict()
+
+    def admit(self, user_id: int) -> None:
+        """Raise 429 if ``user_id`` or the whole service is over its upload rate."""
+        if not RATE_LIMIT_ENABLED:
+            return
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._users.get(user_id)
+            if bucket is None:
+                bucket = self._users[user_id] = TokenBucket(UPLOAD_RATE_PER_USER, UPLOAD_BURST_PER_USER)
+                if len(self._users) > self.MAX_TRACKED_USERS:
+                    self._users.popitem(last=False)
+            else:
+                self._users.move_to_end(user_id)
+            wait = bucket.try_take(now)
+            if wait:
+                raise _reject("user", wait, "Too many uploads; please slow down")
+            wait = self._global.try_take(now)
+            if wait:
+                bucket.give_back()
+                raise _reject("global", wait, "Upload capacity exhausted; please retry shortly")
+
+
+class GeminiScheduler:
+    """
+    Round-robin across users, paced by a token bucket at GEMINI_RPM. Runs on the
+    event loop: waiters are futures granted from ``_dispatch``, which re-arms
+    itself with call_later until the next token is due.
+    """
+
+    def __init__(self) -> None:
+        self._bucket = TokenBucket(GEMINI_RPM, GEMINI_BURST)
+        self._queues: OrderedDict[int, deque[asyncio.Future]] = OrderedDict()
+        self._depth = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    @property
+    def users(self) -> int:
+        return len(self._queues)
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        while self._queues:
+            user_id, queue = next(iter(self._queues.items()))
+            while queue and queue[0].done():  # cancelled: client went away
+                queue.popleft()
+                self._depth -= 1
+            if not queue:
+                del self._queues[user_id]
+                continue
+            wait = self._bucket.try_take()
+            if wait:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            queue.popleft().set_result(None)
+            self._depth -= 1
+            # Next turn goes to the next user in line
+            self._queues.move_to_end(user_id)
+            if not queue:
+                del self._queues[user_id]
+
+    def refund(self, slots: int) -> None:
+        """
+        Return tokens for slots that did not cost a Gemini call of their own,
+        e.g. when the batching verifier (core.verifier) folded them into one.
+        """
+        if slots > 0:
+            self._bucket.tokens = min(self._bucket.capacity, self._bucket.tokens + slots)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user_id: int) -> AsyncIterator[None]:
+        if not RATE_LIMIT_ENABLED:
+            yield
+            return
+        queue = self._queues.get(user_id)
+        if self._depth >= GEMINI_MAX_QUEUE:
+            raise _reject("queue", self._depth / max(self._bucket.rate, 1e-9), "Verification queue is full")
+        if queue is not None and len(queue) >= GEMINI_MAX_QUEUE_PER_USER:
+            raise _reject("user_queue", len(queue) / max(self._bucket.rate, 1e-9), "Too many verifications in flight")
+        self._bucket._refill(time.monotonic())
+        expected = (self._depth + 1 - self._bucket.tokens) / max(self._bucket.rate, 1e-9)
+        if expected > GEMINI_MAX_WAIT_SECONDS:
+            raise _reject("queue_wait", expected, "Verification is busy; please retry shortly")
+        future = asyncio.get_running_loop().create_future()
+        if queue is None:
+            queue = self._queues[user_id] = deque()
+        queue.append(future)
+        self._depth += 1
+        started = time.monotonic()
+        if self._timer is None:
+            self._dispatch()
+        await future
+        GEMINI_WAIT.observe((), time.monotonic() - started)
+        yield
+
+
+uploads = UploadLimiter()
+gemini = GeminiScheduler()
+
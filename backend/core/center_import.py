@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import csv
+import json
+import math
+from typing import Iterable, Iterator, Optional, TextIO
+
+from sqlalchemy import bindparam, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from core import fts
+
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportResult:
+    def __init__(self) -> None:
+        self.inserted = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors: list[dict] = []
+
+    def error(self, row: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+class ParseError(ValueError):
+    """
+    The file cannot be read past ``row`` (None when unknown). ``import_centers``
+    attaches the result of the batches committed before the failure.
+    """
+
+    def __init__(self, row: Optional[int], message: str) -> None:
+        super().__init__(message if row is None else f"row {row}: {message}")
+        self.row = row
+        self.message = message
+        self.result: Optional[ImportResult] = None
+
+
+def _require_utf8(row: Optional[int], *texts: str) -> None:
+    """
+    Streams should be opened with errors="surrogateescape", so bytes that are not
+    UTF-8 reach this check as lone surrogates on the row that holds them. A
+    strict decoder fails a whole read-ahead chunk at a time instead.
+    """
+    for value in texts:
+        try:
+            value.encode("utf-8")
+        except UnicodeEncodeError as exc:
+            raise ParseError(row, "not valid UTF-8") from exc
+
+
+def parse_csv(stream: TextIO) -> Iterator[tuple[int, dict]]:
+    """Yield (row number, fields) from a CSV with a header row: name, latitude, longitude[, description, contact_info]."""
+    reader = csv.DictReader(stream)
+    try:
+        for row in reader:
+            _require_utf8(reader.line_num, *(k for k in row if k), *(
+                v if isinstance(v, str) else "".join(v) for v in row.values() if v is not None
+            ))
+            yield reader.line_num, {(k or "").strip().lower(): v for k, v in row.items()}
+    except csv.Error as exc:
+        # DictReader.line_num only advances after a row parses; the inner reader's includes the bad line
+        raise ParseError(reader.reader.line_num, str(exc)) from exc
+    except UnicodeDecodeError as exc:
+        raise ParseError(None, f"not valid UTF-8: {exc.reason}") from exc
+
+
+def parse_geojson(stream: TextIO) -> Iterator[tuple[int, dict]]:
+    """
+    Yield (feature number, fields) from GeoJSON Point features.
+
+    Newline-delimited features (GeoJSON Text Sequences) are streamed line by line;
+    a regular FeatureCollection document has to be parsed as a whole.
+    """
+    try:
+        first = ""
+        for first in stream:
+            if first.strip():
+                break
+        try:
+            head = json.loads(first.strip().lstrip("\x1e"))
+        except ValueError:
+            head = None
+        if isinstance(head, dict) and head.get("type") == "Feature":
+            _require_utf8(1, first)
+            yield 1, _feature_fields(head)
+            for n, line in enumerate(stream, start=2):
+                line = line.strip().lstrip("\x1e")
+                if not line:
+                    continue
+                _require_utf8(n, line)
+                try:
+                    yield n, _feature_fields(json.loads(line))
+                except ValueError as exc:
+                    yield n, {"_error": f"invalid JSON: {exc}"}
+            return
+        document = first + stream.read()
+        _require_utf8(None, document)
+        doc = json.loads(document)
+    except UnicodeDecodeError as exc:
+        raise ParseError(None, f"not valid UTF-8: {exc.reason}") from exc
+    except json.JSONDecodeError as exc:
+        raise ParseError(None, f"invalid JSON at line {exc.lineno}: {exc.msg}") from exc
+    features = doc.get("features", []) if isinstance(doc, dict) else []
+    for n, feature in enumerate(features, start=1):
+        yield n, _feature_fields(feature)
+
+
+def _feature_fields(feature: object) -> dict:
+    if not isinstance(feature, dict):
+        return {"_error": "feature is not an object"}
+    geometry = feature.get("geometry") or {}
+    props = feature.get("properties") or {}
+    coords = geometry.get("coordinates") if geometry.get("type") == "Point" else None
+    if not isinstance(coords, list) or len(coords) < 2:
+        return {"_error": "geometry must be a Point"}
+    # GeoJSON order is [longitude, latitude]
+    return {
+        "name": props.get("name"),
+        "longitude": coords[0],
+        "latitude": coords[1],
+        "description": props.get("description"),
+        "contact_info": props.get("contact_info"),
+    }
+
+
+def validate(fields: dict) -> tuple[Optional[dict], Optional[str]]:
+    if "_error" in fields:
+        return None, fields["_error"]
+    name = (fields.get("name") or "").strip()
+    if not name:
+        return None, "name is required"
+    if len(name) > 255:
+        return None, "name longer than 255 characters"
+    try:
+        lat = float(fields.get("latitude"))
+        lon = float(fields.get("longitude"))
+    except (TypeError, ValueError):
+        return None, "latitude and longitude must be numbers"
+    if not (math.isfinite(lat) and -90.0 <= lat <= 90.0):
+        return None, f"latitude out of range: {lat}"
+    if not (math.isfinite(lon) and -180.0 <= lon <= 180.0):
+        return None, f"longitude out of range: {lon}"
+    contact = (fields.get("contact_info") or "").strip() or None
+    if contact is not None and len(contact) > 255:
+        return None, "contact_info longer than 255 characters"
+    return {
+        "name": name,
+        "latitude": lat,
+        "longitude": lon,
+        "description": (fields.get("description") or "").strip() or None,
+        "contact_info": contact,
+    }, None
+
+
+def _key(name: str, lat: float, lon: float) -> tuple[str, float, float]:
+    return name, round(lat, 6), round(lon, 6)
+
+
+def import_centers(db: Session, rows: Iterable[tuple[int, dict]], approve: bool = False,
+                   batch_size: int = 500) -> ImportResult:
+    """
+    Upsert centers by (name, location). Rows are validated as they stream in and
+    written with one executemany INSERT and one executemany UPDATE per batch.
+    Derived indexes are refreshed once at the end, after the final commit.
+
+    A ParseError from ``rows`` discards the open batch and is re-raised with the
+    result of the batches already committed.
+    """
+    from models.models import RecyclerCenter
+
+    centers = RecyclerCenter.__table__
+    existing = {
+        _key(name, lat, lon): cid
+        for cid, name, lat, lon in db.execute(
+            select(centers.c.id, centers.c.name, centers.c.latitude, centers.c.longitude)
+        ).all()
+    }
+    insert_stmt = insert(centers)
+    update_stmt = (
+        update(centers)
+        .where(centers.c.id == bindparam("b_id"))
+        .values(description=bindparam("v_description"), contact_info=bindparam("v_contact_info"))
+    )
+    result = ImportResult()
+    inserts: list[dict] = []
+    updates: list[dict] = []
+    pending: dict[tuple, int] = {}  # keys inserted in the current batch, to fold duplicates within the file
+
+    def flush() -> None:
+        conn = db.connection()
+        if inserts:
+            conn.execute(insert_stmt, inserts)
+        if updates:
+            conn.execute(update_stmt, updates)
+        db.commit()
+        result.inserted += len(inserts)
+        result.updated += len(updates)
+        inserts.clear()
+        updates.clear()
+
+    try:
+        for row_no, fields in rows:
+            values, error = validate(fields)
+            if error:
+                result.error(row_no, error)
+                continue
+            key = _key(values["name"], values["latitude"], values["longitude"])
+            if key in existing:
+                updates.append({
+                    "b_id": existing[key],
+                    "v_description": values["description"],
+                    "v_contact_info": values["contact_info"],
+                })
+            elif key in pending:
+                inserts[pending[key]].update(description=values["description"], contact_info=values["contact_info"])
+            else:
+                pending[key] = len(inserts)
+                inserts.append({
+                    **values,
+                    "approved": approve,
+                    "performance_score": 0.0,
+                    "total_recycled": 0,
+                    "total_co2_saved": 0.0,
+                    "rating": 0.0,
+                })
+            if len(inserts) + len(updates) >= batch_size:
+                flush()
+                if pending:
+                    _remember_inserted(db, pending, existing)
+                    pending.clear()
+    except ParseError as exc:
+        db.rollback()
+        if result.inserted or result.updated:
+            refresh_center_indexes(db)
+        exc.result = result
+        raise
+    flush()
+    if pending:
+        _remember_inserted(db, pending, existing)
+    refresh_center_indexes(db)
+    return result
+
+
+def _remember_inserted(db: Session, pending: dict[tuple, int], existing: dict[tuple, int]) -> None:
+    """Map keys inserted in the last batch to their new ids so later rows update instead of duplicating."""
+    from models.models import RecyclerCenter
+
+    names = {k[0] for k in pending}
+    for cid, name, lat, lon in db.execute(
+        select(RecyclerCenter.id, RecyclerCenter.name, RecyclerCenter.latitude, RecyclerCenter.longitude)
+        .where(RecyclerCenter.name.in_(names))
+    ).all():
+        existing.setdefault(_key(name, lat, lon), cid)
+
+
+def refresh_center_indexes(db: Session) -> None:
+    """Rebuild structures derived from `recycler_centers` after a bulk change."""
+    conn = db.connection()
+    fts.optimize(conn, "centers_fts")
+    conn.execute(text("ANALYZE recycler_centers"))
+    db.commit()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import CompoundSelect, Integer, Select, bindparam, func, select, union_all, update
+from sqlalchemy.orm import Session
+
+from core import stats
+
+CHALLENGE_CACHE_TTL = float(os.environ.get("CHALLENGE_CACHE_TTL", "60"))
+
+
+class _ActiveChallenge:
+    __slots__ = ("id", "start", "end", "metric", "category")
+
+    def __init__(self, id: int, start: datetime, end: datetime, metric: str, category: Optional[str]) -> None:
+        self.id = id
+        self.start = start
+        self.end = end
+        self.metric = metric
+        self.category = category
+
+
+class ChallengeIndex:
+    """
+    Interval index over active challenges, sorted by start date.
+
+    Lookups bisect on the start date and filter the remaining candidates by end
+    date, metric and category, so each report event costs O(active challenges)
+    without touching the database.
+    """
+
+    def __init__(self, ttl: float = CHALLENGE_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._starts: list[datetime] = []
+        self._items: list[_ActiveChallenge] = []
+        self._loaded_at: Optional[float] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def _load(self, db: Session) -> list[_ActiveChallenge]:
+        from models.models import Challenge
+
+        rows = db.execute(
+            select(Challenge.id, Challenge.start_date, Challenge.end_date, Challenge.metric, Challenge.category)
+            .where(Challenge.is_active.is_(True))
+            .order_by(Challenge.start_date)
+        ).all()
+        return [_ActiveChallenge(cid, start, end, metric or "recycled", category)
+                for cid, start, end, metric, category in rows]
+
+    def match(self, db: Session, at: datetime, metric: str, category: Optional[str]) -> list[int]:
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self.cache_misses += 1
+                self._items = self._load(db)
+                self._starts = [c.start for c in self._items]
+                self._loaded_at = time.monotonic()
+            else:
+                self.cache_hits += 1
+            items = self._items[: bisect.bisect_right(self._starts, at)]
+        return [
+            c.id for c in items
+            if c.end >= at and c.metric == metric and (c.category is None or c.category == category)
+        ]
+
+
+index = ChallengeIndex()
+
+
+def _increment(db: Session, counts: dict[int, int], at: datetime) -> None:
+    """Add ``counts`` ({challenge id: n}) to progress and award any challenge that just reached its target."""
+    from models.models import Challenge
+
+    if not counts:
+        return
+    challenges = Challenge.__table__
+    db.connection().execute(
+        update(challenges)
+        .where(challenges.c.id == bindparam("b_id"))
+        .values(current_progress=challenges.c.current_progress + bindparam("d_progress", type_=Integer)),
+        [{"b_id": cid, "d_progress": n} for cid, n in counts.items()],
+    )
+    # The conditional UPDATE only succeeds once per challenge, so the reward is paid exactly once
+    completed = db.execute(
+        update(challenges)
+        .where(
+            challenges.c.id.in_(list(counts)),
+            challenges.c.completed_at.is_(None),
+            challenges.c.current_progress >= challenges.c.target,
+        )
+        .values(completed_at=at)
+        .returning(challenges.c.id, challenges.c.reward_points)
+    ).all()
+    for cid, reward in completed:
+        if reward:
+            _reward_participants(db, cid, reward)
+
+
+def _matching_reports(challenge) -> CompoundSelect:
+    """
+    User ids of reports counting towards a challenge (``challenge`` is a Challenge
+    row or entity), one row per report, live and archived.
+    """
+    from models.models import ArchivedReport, Report
+
+    def matching(table) -> Select:
+        if challenge.metric == "reports":
+            stmt = select(table.user_id).where(
+                table.created_at >= challenge.start_date, table.created_at <= challenge.end_date
+            )
+        else:
+            stmt = select(table.user_id).where(
+                table.status == "recycled",
+                table.recycled_at >= challenge.start_date,
+                table.recycled_at <= challenge.end_date,
+            )
+        if challenge.category is not None:
+            stmt = stmt.where(table.category == challenge.category)
+        return stmt
+
+    return union_all(matching(Report), matching(ArchivedReport))
+
+
+def _reward_participants(db: Session, challenge_id: int, reward: int) -> None:
+    from models.models import Challenge
+
+    challenge = db.execute(
+        select(Challenge.start_date, Challenge.end_date, Challenge.metric, Challenge.category)
+        .where(Challenge.id == challenge_id)
+    ).one()
+    reports = _matching_reports(challenge).subquery()
+    for (user_id,) in db.execute(select(reports.c.user_id).distinct()).all():
+        stats.record_user(db, user_id, points=reward)
+
+
+def record(db: Session, occurrences: list[tuple[datetime, str, Optional[str]]]) -> None:
+    """
+    Count (timestamp, metric, category) occurrences against the active challenges
+    they fall into, with one progress update per affected challenge.
+    """
+    counts: dict[int, int] = {}
+    latest: Optional[datetime] = None
+    for at, metric, category in occurrences:
+        for cid in index.match(db, at, metric, category):
+            counts[cid] = counts.get(cid, 0) + 1
+        latest = at if latest is None or at > latest else latest
+    if counts:
+        _increment(db, counts, latest)
+
+
+def recompute(db: Session) -> list[tuple[int, int, int]]:
+    """
+    Rebuild ``current_progress`` for every challenge from live and archived reports.
+    Returns (challenge id, stored progress, recomputed progress) for each challenge.
+    Completion state and rewards are left untouched.
+    """
+    from models.models import Challenge
+
+    out: list[tuple[int, int, int]] = []
+    for challenge in db.query(Challenge).order_by(Challenge.id).all():
+        count = db.execute(
+            select(func.count()).select_from(_matching_reports(challenge).subquery())
+        ).scalar_one()
+        out.append((challenge.id, challenge.current_progress or 0, int(count)))
+        challenge.current_progress = int(count)
+    db.commit()
+    index.invalidate()
+    return out
+
+
+def progress_percentage(current: int, target: int) -> float:
+    if not target:
+        return 0.0
+    return round(min(100.0, (current or 0) * 100.0 / target), 1)
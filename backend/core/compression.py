@@ -0,0 +1,163 @@
+"""
+Response compression for API payloads.
+
+Brotli is used when the `brotli` package is installed and the client accepts
+it, gzip otherwise. Only text-like content types are compressed; images,
+already-encoded responses and Server-Sent Events (which must reach the client
+unbuffered) pass through. Bodies below COMPRESSION_MIN_BYTES are sent as-is.
+Streaming responses without a Content-Length are compressed chunk by chunk.
+"""
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "1") == "1"
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "4"))
+
+_COMPRESSIBLE = ("application/json", "application/x-ndjson", "application/javascript", "image/svg+xml", "text/")
+
+
+def _accepted(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = _accepted(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str) -> None:
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+            self._gz = None
+        else:
+            self._br = None
+            # wbits 16+MAX_WBITS: gzip container
+            self._gz = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._br.process(data) if self._br else self._gz.compress(data)
+
+    def flush(self) -> bytes:
+        return self._br.finish() if self._br else self._gz.flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _Responder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+
+    def _eligible(self, message: Message) -> bool:
+        if message["status"] < 200 or message["status"] in (204, 206, 304):
+            return False
+        headers = Headers(raw=message["headers"])
+        content_type = headers.get("content-type", "").lower()
+        if not content_type.startswith(_COMPRESSIBLE) or content_type.startswith("text/event-stream"):
+            return False
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+        length = headers.get("content-length")
+        return length is None or int(length) >= self.minimum_size
+
+    def _encoded_headers(self, length: Optional[int]) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if "etag" in headers and not headers["etag"].startswith("W/"):
+            # The representation differs from the identity one
+            headers["etag"] = "W/" + headers["etag"]
+        if length is None:
+            del headers["content-length"]
+        else:
+            headers["content-length"] = str(length)
+
+    async def send_wrapper(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+        if message["type"] == "http.response.start":
+            if not self._eligible(message):
+                self.passthrough = True
+                await self.send(message)
+                return
+            # Held back until the first body chunk shows whether the body is streamed
+            self.start = message
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if not more_body:
+                # Whole body in one message: compress only if it is worth it
+                if len(body) < self.minimum_size:
+                    await self.send(self.start)
+                    await self.send(message)
+                    return
+                compressor = _Compressor(self.encoding)
+                payload = compressor.compress(body) + compressor.flush()
+                self._encoded_headers(len(payload))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": payload, "more_body": False})
+                return
+            self.compressor = _Compressor(self.encoding)
+            self._encoded_headers(None)
+            await self.send(self.start)
+
+        payload = self.compressor.compress(body)
+        if not more_body:
+            payload += self.compressor.flush()
+        if payload or not more_body:
+            await self.send({"type": "http.response.body", "body": payload, "more_body": more_body})
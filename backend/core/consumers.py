@@ -0,0 +1,151 @@
+"""
+Report lifecycle consumers fed by the `report_events` outbox (see core.events).
+
+Event kinds and payloads:
+  created         points, co2_saved, category, created_at
+  status_changed  old_status, status, co2_saved, category, recycled_at
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core import achievements, challenges, stats, storage
+from core.events import Event, dispatcher
+from core.pubsub import center_channel, hub, user_channel
+
+
+def _recycled(event: Event) -> bool:
+    return (
+        event.kind == "status_changed"
+        and event.payload.get("status") == "recycled"
+        and event.payload.get("old_status") != "recycled"
+    )
+
+
+@dispatcher.consumer("stats")
+def update_stats(db: Session, events: list[Event]) -> None:
+    """User points/CO2/last_active and center totals/performance score, aggregated per batch."""
+    users: dict[int, stats.UserDelta] = {}
+    centers: dict[int, stats.CenterDelta] = {}
+    for event in events:
+        if event.kind == "created":
+            users.setdefault(event.user_id, stats.UserDelta()).add(
+                points=event.payload["points"],
+                co2_saved=event.payload["co2_saved"],
+                last_active=datetime.fromisoformat(event.payload["created_at"]),
+            )
+        elif _recycled(event):
+            users.setdefault(event.user_id, stats.UserDelta()).add(items_recycled=1)
+            if event.recycler_id is not None:
+                centers.setdefault(event.recycler_id, stats.CenterDelta()).add(
+                    recycled=1, co2_saved=event.payload["co2_saved"], performance=2.0
+                )
+    stats.record_deltas(db, users, centers)
+
+
+@dispatcher.consumer("achievements", depends_on=("stats",))
+def evaluate_achievements(db: Session, events: list[Event]) -> None:
+    changes: dict[int, set[str]] = {}
+    for event in events:
+        if event.kind == "created":
+            changes.setdefault(event.user_id, set()).update(achievements.REPORT_CREATED_METRICS)
+        elif _recycled(event):
+            changes.setdefault(event.user_id, set()).update(achievements.REPORT_RECYCLED_METRICS)
+    if changes:
+        achievements.engine.evaluate(db, changes)
+
+
+@dispatcher.consumer("challenges", depends_on=("stats",))
+def advance_challenges(db: Session, events: list[Event]) -> None:
+    occurrences = []
+    for event in events:
+        if event.kind == "created":
+            occurrences.append(
+                (datetime.fromisoformat(event.payload["created_at"]), "reports", event.payload["category"])
+            )
+        elif _recycled(event):
+            occurrences.append(
+                (datetime.fromisoformat(event.payload["recycled_at"]), "recycled", event.payload["category"])
+            )
+    challenges.record(db, occurrences)
+
+
+def report_messages(db: Session, events: list[Event]) -> list[tuple[tuple[str, ...], dict]]:
+    """
+    Build live-update messages for report events: the current state of each report,
+    addressed to its owner's channel and, when assigned, its center's channel.
+    """
+    from models.models import RecyclerCenter, Report
+    from schemas.schemas import RecyclerCenterOut, ReportOut
+
+    report_ids = {e.report_id for e in events}
+    reports = {r.id: r for r in db.execute(select(Report).where(Report.id.in_(report_ids))).scalars()}
+    center_ids = {r.recycler_id for r in reports.values() if r.recycler_id}
+    centers = {
+        c.id: RecyclerCenterOut.model_validate(c)
+        for c in db.execute(select(RecyclerCenter).where(RecyclerCenter.id.in_(center_ids))).scalars()
+    } if center_ids else {}
+
+    out = []
+    for event in events:
+        r = reports.get(event.report_id)
+        if r is None:
+            continue
+        channels = [user_channel(r.user_id)]
+        if r.recycler_id:
+            channels.append(center_channel(r.recycler_id))
+        data = ReportOut(
+            id=r.id,
+            image_url=storage.image_url(r.image_path),
+            category=r.category,
+            confidence=r.confidence,
+            suggestion=r.suggestion,
+            recycler=centers.get(r.recycler_id),
+            status=r.status,
+            co2_saved=r.co2_saved,
+            points_awarded=r.points_awarded,
+            created_at=r.created_at,
+        ).model_dump(mode="json")
+        out.append((tuple(channels), {"id": event.id, "event": "report", "data": data}))
+    return out
+
+
+def stats_messages(db: Session, user_ids: Iterable[int]) -> list[tuple[tuple[str, ...], dict]]:
+    """Current points/level/totals for each user, including deltas still buffered by the coalescer."""
+    values = achievements.user_metrics(db, list(user_ids), needed=())
+    return [
+        (
+            (user_channel(uid),),
+            {
+                "event": "stats",
+                "data": {
+                    "points": v["points"],
+                    "level": v["level"],
+                    "items_recycled": v["items_recycled"],
+                    "co2_saved_kg": round(v["co2_saved"], 1),
+                },
+            },
+        )
+        for uid, v in values.items()
+    ]
+
+
+@dispatcher.consumer("notifications", depends_on=("stats",))
+def push_live_updates(db: Session, events: list[Event]) -> None:
+    """Fan report and stats deltas out to connected dashboards; a no-op when nobody is listening."""
+    watched = [
+        e for e in events
+        if hub.has_subscribers(user_channel(e.user_id))
+        or (e.recycler_id is not None and hub.has_subscribers(center_channel(e.recycler_id)))
+    ]
+    if not watched:
+        return
+    messages = report_messages(db, watched)
+    messages += stats_messages(db, {e.user_id for e in watched if hub.has_subscribers(user_channel(e.user_id))})
+    for channels, message in messages:
+        for channel in channels:
+            hub.publish(channel, message)
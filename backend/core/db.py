@@ -3,8 +3,9 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Generator
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import Table, create_engine, event, text
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
+from sqlalchemy.schema import CreateTable
 
 DB_PATH = Path("ewm.db")
 DATABASE_URL = f"sqlite:///{DB_PATH}"
@@ -15,6 +16,18 @@ class Base(DeclarativeBase):
 
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+
+@event.listens_for(engine, "connect")
+def _sqlite_pragmas(dbapi_connection, _record) -> None:
+    cursor = dbapi_connection.cursor()
+    # WAL lets long-running readers (exports, dashboards) proceed without blocking writers
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -26,12 +39,32 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+# Stored in SQLite's `PRAGMA user_version` once create_all and the column
+# migrations below have run. Bump it whenever a model or migration changes so
+# existing databases go through schema setup again on their next start.
+SCHEMA_VERSION = 5
+
+
+def _schema_version() -> int:
+    with engine.connect() as conn:
+        return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+
 def init_db() -> None:
     # Lazily import models to ensure metadata is complete
     from models import models  # noqa: F401
-    Base.metadata.create_all(bind=engine)
-    _ensure_manager_column()
-    _ensure_new_columns()
+    if _schema_version() != SCHEMA_VERSION:
+        Base.metadata.create_all(bind=engine)
+        _ensure_manager_column()
+        _ensure_new_columns()
+        # Archived reports keep their ids, so live ones must never reuse them
+        _ensure_autoincrement(models.Report.__table__, "SELECT MAX(id) FROM reports_archive")
+        # Consumers resume after their checkpoint; pruned event ids must not come back below it
+        _ensure_autoincrement(models.ReportEvent.__table__, "SELECT MAX(last_event_id) FROM event_checkpoints")
+        with engine.connect() as conn:
+            conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
+            conn.commit()
+    _ensure_search_indexes()
     # Ensure uploads directory exists
     Path("uploads").mkdir(parents=True, exist_ok=True)
 
@@ -76,6 +109,16 @@ def _ensure_new_columns() -> None:
             conn.execute(text("ALTER TABLE recycler_centers ADD COLUMN description TEXT"))
         if "contact_info" not in center_columns:
             conn.execute(text("ALTER TABLE recycler_centers ADD COLUMN contact_info TEXT"))
+
+        # Check and add challenge columns
+        result = conn.execute(text("PRAGMA table_info(challenges)"))
+        challenge_columns = [row[1] for row in result]
+        if "metric" not in challenge_columns:
+            conn.execute(text("ALTER TABLE challenges ADD COLUMN metric VARCHAR(20) DEFAULT 'recycled'"))
+        if "category" not in challenge_columns:
+            conn.execute(text("ALTER TABLE challenges ADD COLUMN category VARCHAR(100)"))
+        if "completed_at" not in challenge_columns:
+            conn.execute(text("ALTER TABLE challenges ADD COLUMN completed_at DATETIME"))
         
         conn.commit()
 
@@ -88,3 +131,46 @@ def _ensure_manager_column() -> None:
             conn.execute(text("ALTER TABLE recycler_centers ADD COLUMN manager_user_id INTEGER REFERENCES users(id)"))
 
 
+def _ensure_autoincrement(table: Table, *floor_queries: str) -> None:
+    """
+    Rebuild ``table`` as AUTOINCREMENT if it was created without it, so ids of
+    deleted rows are never handed out again. The sequence starts above the
+    current max id and above every ``floor_queries`` result (ids still referenced
+    elsewhere).
+    """
+    from core import fts
+
+    name = table.name
+    with engine.connect() as conn:
+        ddl = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}
+        ).scalar()
+        if ddl is None or "AUTOINCREMENT" in ddl.upper():
+            return
+        # Triggers go with the old table; ensure_fts recreates the index and its triggers afterwards
+        for index_name, spec in fts.INDEXES.items():
+            if spec["source"] == name:
+                fts.drop(conn, index_name)
+        rebuild = f"{name}_rebuild"
+        create = str(CreateTable(table).compile(engine)).replace(f"CREATE TABLE {name} ", f"CREATE TABLE {rebuild} ", 1)
+        existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({name})"))}
+        columns = ", ".join(c.name for c in table.columns if c.name in existing)
+        conn.execute(text(create))
+        conn.execute(text(f"INSERT INTO {rebuild} ({columns}) SELECT {columns} FROM {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+        conn.execute(text(f"ALTER TABLE {rebuild} RENAME TO {name}"))
+        for index in table.indexes:
+            index.create(conn)
+        floor = max(
+            conn.execute(text(query)).scalar() or 0
+            for query in (f"SELECT MAX(id) FROM {name}", *floor_queries)
+        )
+        conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": name})
+        conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"), {"name": name, "seq": floor})
+        conn.commit()
+
+
+def _ensure_search_indexes() -> None:
+    from core.fts import ensure_fts
+    with engine.connect() as conn:
+        ensure_fts(conn)
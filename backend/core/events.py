@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from core.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# "1": consumers run on a background dispatcher thread (default).
+# "0": consumers run in the request thread right after the report change commits.
+REPORT_EVENTS_ASYNC = os.environ.get("REPORT_EVENTS_ASYNC", "1") == "1"
+REPORT_EVENTS_BATCH_SIZE = int(os.environ.get("REPORT_EVENTS_BATCH_SIZE", "500"))
+REPORT_EVENTS_POLL_MS = int(os.environ.get("REPORT_EVENTS_POLL_MS", "1000"))
+REPORT_EVENTS_RETENTION_DAYS = int(os.environ.get("REPORT_EVENTS_RETENTION_DAYS", "7"))
+
+
+class Event:
+    __slots__ = ("id", "kind", "report_id", "user_id", "recycler_id", "payload", "created_at")
+
+    def __init__(self, id: int, kind: str, report_id: int, user_id: int, recycler_id: Optional[int],
+                 payload: dict, created_at: datetime) -> None:
+        self.id = id
+        self.kind = kind
+        self.report_id = report_id
+        self.user_id = user_id
+        self.recycler_id = recycler_id
+        self.payload = payload
+        self.created_at = created_at
+
+
+Handler = Callable[[Session, list[Event]], None]
+
+
+class Consumer:
+    __slots__ = ("name", "handler", "depends_on")
+
+    def __init__(self, name: str, handler: Handler, depends_on: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.handler = handler
+        self.depends_on = depends_on
+
+
+def _event_row(kind: str, report_id: int, user_id: int, recycler_id: Optional[int], payload: dict) -> dict:
+    return {
+        "kind": kind,
+        "report_id": report_id,
+        "user_id": user_id,
+        "recycler_id": recycler_id,
+        "payload": json.dumps(payload, default=str),
+        "created_at": datetime.utcnow(),
+    }
+
+
+def emit(db: Session, kind: str, report, **payload) -> None:
+    """Append an event for ``report`` to the outbox in ``db``'s transaction. The report must be flushed."""
+    emit_many(db, [(kind, report.id, report.user_id, report.recycler_id, payload)])
+
+
+def emit_many(db: Session, events: Iterable[tuple[str, int, int, Optional[int], dict]]) -> None:
+    """Append (kind, report_id, user_id, recycler_id, payload) events with one executemany INSERT."""
+    from models.models import ReportEvent
+
+    rows = [_event_row(*e) for e in events]
+    if rows:
+        db.connection().execute(insert(ReportEvent.__table__), rows)
+
+
+class Dispatcher:
+    """
+    Delivers outbox events to registered consumers in batches.
+
+    Each consumer has its own checkpoint in `event_checkpoints`; the consumer's
+    handler and the checkpoint advance commit in one transaction, and a failed
+    batch is retried on the next cycle, so delivery is at-least-once. A consumer
+    never moves past the checkpoints of the consumers it depends on.
+    """
+
+    def __init__(self, batch_size: int = 500, poll_ms: int = 1000) -> None:
+        self.batch_size = batch_size
+        self.poll = poll_ms / 1000.0
+        self.consumers: list[Consumer] = []
+        self._run_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_prune = 0.0
+        self.delivered: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+
+    def register(self, name: str, handler: Handler, depends_on: tuple[str, ...] = ()) -> None:
+        if any(c.name == name for c in self.consumers):
+            raise ValueError(f"Consumer {name!r} already registered")
+        self.consumers.append(Consumer(name, handler, depends_on))
+        self.delivered.setdefault(name, 0)
+        self.errors.setdefault(name, 0)
+
+    def consumer(self, name: str, depends_on: tuple[str, ...] = ()) -> Callable[[Handler], Handler]:
+        def decorator(handler: Handler) -> Handler:
+            self.register(name, handler, depends_on)
+            return handler
+        return decorator
+
+    def _checkpoints(self, db: Session) -> dict[str, int]:
+        from models.models import EventCheckpoint
+
+        return dict(db.execute(select(EventCheckpoint.consumer, EventCheckpoint.last_event_id)).all())
+
+    def _deliver(self, consumer: Consumer, checkpoints: dict[str, int]) -> int:
+        from models.models import EventCheckpoint, ReportEvent
+
+        start = checkpoints.get(consumer.name, 0)
+        db = SessionLocal()
+        try:
+            stmt = select(ReportEvent).where(ReportEvent.id > start).order_by(ReportEvent.id).limit(self.batch_size)
+            if consumer.depends_on:
+                ceiling = min(checkpoints.get(dep, 0) for dep in consumer.depends_on)
+                stmt = stmt.where(ReportEvent.id <= ceiling)
+            batch = [
+                Event(e.id, e.kind, e.report_id, e.user_id, e.recycler_id, json.loads(e.payload or "{}"), e.created_at)
+                for e in db.execute(stmt).scalars()
+            ]
+            if not batch:
+                return 0
+            consumer.handler(db, batch)
+            last = batch[-1].id
+            # Compare-and-set so two dispatchers (e.g. several workers) never both apply a batch
+            if consumer.name in checkpoints:
+                advanced = db.execute(
+                    update(EventCheckpoint)
+                    .where(EventCheckpoint.consumer == consumer.name, EventCheckpoint.last_event_id == start)
+                    .values(last_event_id=last, updated_at=datetime.utcnow())
+                ).rowcount
+            else:
+                db.add(EventCheckpoint(consumer=consumer.name, last_event_id=last))
+                db.flush()
+                advanced = 1
+            if not advanced:
+                db.rollback()
+                return 0
+            db.commit()
+            checkpoints[consumer.name] = last
+            self.delivered[consumer.name] += len(batch)
+            return len(batch)
+        except Exception:
+            db.rollback()
+            self.errors[consumer.name] += 1
+            logger.exception("Event consumer %s failed after event %d; will retry", consumer.name, start)
+            return 0
+        finally:
+            db.close()
+
+    def run_once(self) -> int:
+        """Deliver one batch to every consumer. Returns the number of events delivered."""
+        with self._run_lock:
+            db = SessionLocal()
+            try:
+                checkpoints = self._checkpoints(db)
+            finally:
+                db.close()
+            return sum(self._deliver(consumer, checkpoints) for consumer in self.consumers)
+
+    def drain(self, max_cycles: int = 1000) -> None:
+        for _ in range(max_cycles):
+            if not self.run_once():
+                break
+
+    def prune(self, retention_days: int = REPORT_EVENTS_RETENTION_DAYS) -> int:
+        """Delete events every consumer has processed that are older than the retention window."""
+        from models.models import ReportEvent
+
+        db = SessionLocal()
+        try:
+            checkpoints = self._checkpoints(db)
+            if not self.consumers or any(c.name not in checkpoints for c in self.consumers):
+                return 0
+            floor = min(checkpoints[c.name] for c in self.consumers)
+            cutoff = datetime.utcnow() - timedelta(days=retention_days)
+            deleted = db.query(ReportEvent).filter(
+                ReportEvent.id <= floor, ReportEvent.created_at < cutoff
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    def notify(self) -> None:
+        """Signal that new events were committed."""
+        if self._thread is not None:
+            self._wake.set()
+        elif not REPORT_EVENTS_ASYNC:
+            self.drain()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.poll)
+            self._wake.clear()
+            try:
+                while self.run_once() and not self._stopping.is_set():
+                    pass
+                if time.monotonic() - self._last_prune > 600:
+                    self._last_prune = time.monotonic()
+                    self.prune()
+            except Exception:
+                logger.exception("Event dispatcher loop error")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="report-events", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and deliver whatever is still pending."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.drain()
+
+    def metrics(self) -> dict:
+        from models.models import ReportEvent
+
+        db = SessionLocal()
+        try:
+            head = db.execute(select(func.max(ReportEvent.id))).scalar() or 0
+            checkpoints = self._checkpoints(db)
+        finally:
+            db.close()
+        return {
+            "async": REPORT_EVENTS_ASYNC,
+            "head_event_id": head,
+            "consumers": {
+                c.name: {
+                    "checkpoint": checkpoints.get(c.name, 0),
+                    "lag_events": head - checkpoints.get(c.name, 0),
+                    "delivered": self.delivered[c.name],
+                    "errors": self.errors[c.name],
+                }
+                for c in self.consumers
+            },
+        }
+
+
+dispatcher = Dispatcher(REPORT_EVENTS_BATCH_SIZE, REPORT_EVENTS_POLL_MS)
+
+
+def notify() -> None:
+    dispatcher.notify()
+
+
+def start() -> None:
+    if REPORT_EVENTS_ASYNC:
+        dispatcher.start()
+
+
+def shutdown() -> None:
+    dispatcher.stop()
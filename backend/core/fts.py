@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+# Tables whose FTS5 index was created successfully. SQLite builds without FTS5
+# (or older than 3.34, without the trigram tokenizer) fall back to LIKE scans.
+available: set[str] = set()
+
+# External-content FTS5 tables kept in sync with their source table by triggers.
+# Trigram tokenization gives prefix and substring matching for queries of 3+ characters.
+INDEXES: dict[str, dict] = {
+    "users_fts": {
+        "source": "users",
+        "columns": ("email", "name"),
+        "tokenize": "trigram",
+    },
+    # Ranked word search (bm25) with prefix matching and English stemming
+    "reports_fts": {
+        "source": "reports",
+        "columns": ("category", "suggestion"),
+        "tokenize": "porter unicode61",
+    },
+    "centers_fts": {
+        "source": "recycler_centers",
+        "columns": ("name", "description"),
+        "tokenize": "porter unicode61",
+    },
+}
+
+
+def _ddl(fts: str, spec: dict) -> list[str]:
+    source = spec["source"]
+    cols = spec["columns"]
+    col_list = ", ".join(cols)
+    new_vals = ", ".join(f"new.{c}" for c in cols)
+    old_vals = ", ".join(f"old.{c}" for c in cols)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({col_list}, content='{source}', content_rowid='id', "
+        f"tokenize='{spec['tokenize']}')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {col_list} ON {source} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals}); "
+        f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_vals}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def ensure_fts(conn: Connection) -> None:
+    """Create missing FTS5 indexes and their sync triggers, populating them from existing rows."""
+    existing = {
+        row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))
+    }
+    for fts, spec in INDEXES.items():
+        if fts in existing:
+            available.add(fts)
+            continue
+        try:
+            for stmt in _ddl(fts, spec):
+                conn.execute(text(stmt))
+            conn.commit()
+            available.add(fts)
+        except Exception as exc:
+            conn.rollback()
+            logger.warning("FTS index %s unavailable, falling back to LIKE search: %s", fts, exc)
+
+
+def drop(conn: Connection, fts: str) -> None:
+    """Remove an index and its triggers, e.g. before a bulk load; ``ensure_fts`` recreates and repopulates it."""
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{suffix}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {fts}"))
+    available.discard(fts)
+
+
+def rebuild(conn: Connection, fts: str) -> None:
+    if fts in available:
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def optimize(conn: Connection, fts: str) -> None:
+    """Merge index segments after a bulk load."""
+    if fts in available:
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('optimize')"))
+
+
+def prefix_terms(q: str) -> str:
+    """Each word of ``q`` as a quoted prefix term; all terms must match."""
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in q.split())
+
+
+def match_query(q: str) -> str:
+    """Quote user input as a single FTS5 phrase so operators and punctuation are matched literally."""
+    return '"' + q.replace('"', '""') + '"'
+
+
+def like_literal(q: str) -> str:
+    """Escape LIKE wildcards in user input; use with ``.like(pattern, escape="\\")`` in the LIKE fallbacks."""
+    return q.replace("\\", "\\\\").replace("%", r"\%").replace("_", r"\_")
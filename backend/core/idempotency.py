@@ -0,0 +1,186 @@
+"""
+Idempotency-Key support for retried POSTs.
+
+The first request with a given (user, key) claims a row in `idempotency_keys`
+and runs; its response is stored there for IDEMPOTENCY_TTL_HOURS. Duplicates
+arriving while it runs wait for that result (on an in-process future, or by
+polling the row when the first request landed on another worker) instead of
+doing the work again; later duplicates get the stored response with an
+`Idempotent-Replayed: true` header. Reusing a key for a different payload is
+rejected with 422.
+
+Client errors (4xx other than 409/429) are stored like successes. Server errors
+and throttling release the claim so a retry can run again.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from core import listings
+from core.db import SessionLocal
+
+IDEMPOTENCY_TTL_HOURS = float(os.environ.get("IDEMPOTENCY_TTL_HOURS", "24"))
+# How long a duplicate waits for the in-flight original before answering 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", "30"))
+# An in-flight claim older than this is assumed abandoned (crashed worker) and taken over
+IDEMPOTENCY_LOCK_SECONDS = float(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", "120"))
+
+MAX_KEY_LENGTH = 255
+_POLL_SECONDS = 0.1
+_PURGE_INTERVAL = 60.0
+
+# (user_id, key) -> future resolved with (status_code, body), or None when the claim was released
+_inflight: dict[tuple[int, str], asyncio.Future] = {}
+_last_purge = 0.0
+
+
+def fingerprint(*parts: bytes | str | None) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        data = b"" if part is None else part.encode("utf-8") if isinstance(part, str) else part
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def _stored(status_code: int) -> bool:
+    return status_code < 500 and status_code not in (409, 429)
+
+
+def _purge_expired(db, now: datetime) -> None:
+    global _last_purge
+    if time.monotonic() - _last_purge < _PURGE_INTERVAL:
+        return
+    _last_purge = time.monotonic()
+    from models.models import IdempotencyRecord
+
+    db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.expires_at < now))
+    db.commit()
+
+
+def _claim(user_id: int, key: str, fp: str):
+    """Returns None when the claim was taken, otherwise the existing record."""
+    from models.models import IdempotencyRecord
+
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        _purge_expired(db, now)
+        expires = now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+        db.add(IdempotencyRecord(user_id=user_id, key=key, fingerprint=fp, created_at=now, expires_at=expires))
+        try:
+            db.commit()
+            return None
+        except IntegrityError:
+            db.rollback()
+        record = db.get(IdempotencyRecord, (user_id, key))
+        if record is None:
+            return _claim(user_id, key, fp)  # released between our insert and read
+        if record.expires_at < now or (
+            record.status_code is None
+            and record.created_at < now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+        ):
+            taken = db.execute(
+                update(IdempotencyRecord)
+                .where(
+                    IdempotencyRecord.user_id == user_id,
+                    IdempotencyRecord.key == key,
+                    IdempotencyRecord.created_at == record.created_at,
+                )
+                .values(fingerprint=fp, status_code=None, response=None, created_at=now, expires_at=expires)
+            ).rowcount
+            db.commit()
+            if taken:
+                return None
+            record = db.get(IdempotencyRecord, (user_id, key))
+        db.expunge(record)
+        return record
+    finally:
+        db.close()
+
+
+def _finish(user_id: int, key: str, status_code: Optional[int], body: Optional[bytes]) -> None:
+    from models.models import IdempotencyRecord
+
+    db = SessionLocal()
+    try:
+        where = (IdempotencyRecord.user_id == user_id, IdempotencyRecord.key == key)
+        if status_code is None:
+            db.execute(delete(IdempotencyRecord).where(*where))
+        else:
+            db.execute(update(IdempotencyRecord).where(*where).values(
+                status_code=status_code, response=body.decode("utf-8"),
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _response(status_code: int, body: bytes, replayed: bool) -> Response:
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+async def run(user_id: int, key: str, fp: str, handler: Callable[[], Awaitable[Any]]) -> Response:
+    """
+    Run ``handler`` once per (user_id, key) and return its JSON response, or the
+    stored / in-flight result of an earlier request with the same key.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        # Blocking commits (and busy waits on the WAL write lock) stay off the event loop
+        record = await run_in_threadpool(_claim, user_id, key, fp)
+        if record is None:
+            break
+        if record.fingerprint != fp:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        if record.status_code is not None:
+            return _response(record.status_code, record.response.encode("utf-8"), replayed=True)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise HTTPException(
+                status_code=409, detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+        waiter = _inflight.get((user_id, key))
+        if waiter is None:
+            await asyncio.sleep(min(_POLL_SECONDS, remaining))
+            continue
+        try:
+            result = await asyncio.wait_for(asyncio.shield(waiter), remaining)
+        except asyncio.TimeoutError:
+            continue
+        if result is not None:
+            return _response(*result, replayed=True)
+        # Original failed transiently and released the key: try to claim it ourselves
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[(user_id, key)] = future
+    result = None
+    try:
+        try:
+            body = listings.dumps(jsonable_encoder(await handler()))
+            result = (200, body)
+        except HTTPException as exc:
+            if _stored(exc.status_code):
+                result = (exc.status_code, listings.dumps({"detail": exc.detail}))
+            raise
+        finally:
+            await run_in_threadpool(_finish, user_id, key, *(result or (None, None)))
+    finally:
+        del _inflight[(user_id, key)]
+        future.set_result(result)
+    return _response(*result, replayed=False)
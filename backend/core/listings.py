@@ -0,0 +1,120 @@
+"""
+Fast path for the large list endpoints (report history, assigned reports, centers).
+
+Rows are fetched as plain column tuples instead of ORM entities, shaped into
+dicts with the same keys and order as ReportOut / RecyclerCenterOut, and
+encoded with orjson when it is installed (stdlib json otherwise). This skips
+per-row Pydantic validation and FastAPI's jsonable_encoder pass. Centers
+referenced by many reports are built once and shared.
+
+Compact mode returns {"reports": [...], "centers": {id: center}} with a
+`recycler_id` on each report instead of repeating the nested center.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Iterable, Optional
+
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core import storage
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+CENTER_FIELDS = (
+    "name", "latitude", "longitude", "description", "contact_info", "id", "approved",
+    "performance_score", "manager_user_id", "total_recycled", "total_co2_saved", "rating",
+)
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        # Naive datetimes serialize like Pydantic's, without an offset
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def _center_columns():
+    from models.models import RecyclerCenter
+
+    return [getattr(RecyclerCenter, f) for f in CENTER_FIELDS]
+
+
+def _center_dict(row) -> dict:
+    center = dict(zip(CENTER_FIELDS, row))
+    # Defaults the response model would otherwise apply to NULLs from older rows
+    for field in ("performance_score", "total_co2_saved", "rating"):
+        center[field] = center[field] or 0.0
+    center["approved"] = bool(center["approved"])
+    center["total_recycled"] = center["total_recycled"] or 0
+    return center
+
+
+def centers(db: Session, ids: Optional[Iterable[int]] = None) -> dict[int, dict]:
+    """Center dicts keyed by id; all centers when ``ids`` is None."""
+    from models.models import RecyclerCenter
+
+    stmt = select(*_center_columns()).order_by(RecyclerCenter.id)
+    if ids is not None:
+        ids = list(ids)
+        if not ids:
+            return {}
+        stmt = stmt.where(RecyclerCenter.id.in_(ids))
+    return {c["id"]: c for c in map(_center_dict, db.execute(stmt).all())}
+
+
+def reports(db: Session, *criteria) -> list[tuple]:
+    """Report columns needed by ReportOut, newest first."""
+    from models.models import Report
+
+    return db.execute(
+        select(
+            Report.id, Report.image_path, Report.category, Report.confidence, Report.suggestion,
+            Report.recycler_id, Report.status, Report.co2_saved, Report.points_awarded, Report.created_at,
+        )
+        .where(*criteria)
+        .order_by(Report.created_at.desc())
+    ).all()
+
+
+def report_payload(rows: list[tuple], center_lookup: dict[int, dict], compact: bool = False):
+    out = []
+    for rid, image_path, category, confidence, suggestion, recycler_id, status, co2, points, created_at in rows:
+        item = {
+            "id": rid,
+            "image_url": storage.image_url(image_path),
+            "category": category,
+            "confidence": confidence,
+            "suggestion": suggestion,
+        }
+        if compact:
+            item["recycler_id"] = recycler_id if recycler_id in center_lookup else None
+        else:
+            item["recycler"] = center_lookup.get(recycler_id)
+        item["status"] = status
+        item["co2_saved"] = co2 or 0.0
+        item["points_awarded"] = points or 0
+        item["created_at"] = created_at
+        out.append(item)
+    if compact:
+        return {"reports": out, "centers": center_lookup}
+    return out
@@ -0,0 +1,359 @@
+"""
+In-process metrics with Prometheus text exposition (served at GET /metrics).
+
+Recording is a dict lookup and a few additions under a per-metric lock, so it is
+safe to call on the request hot path and from worker threads. Values that
+already live elsewhere (cache counters, coalescer backlog, consumer lag) are read
+by collectors at scrape time instead of being mirrored on every update.
+"""
+from __future__ import annotations
+
+import bisect
+import contextvars
+import math
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Iterable, Optional
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def expose(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: tuple, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def expose(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list[float]] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            slots = self._values.get(labels)
+            if slots is None:
+                slots = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            slots[i] += 1
+            slots[-1] += value
+
+    def expose(self) -> list[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = self.header()
+        for key, slots in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), slots):
+                cumulative += n
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(slots[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+registry: list[_Metric] = []
+# Called at scrape time; each returns ready-made exposition lines
+collectors: list[Callable[[], list[str]]] = []
+
+
+def collector(fn: Callable[[], list[str]]) -> Callable[[], list[str]]:
+    collectors.append(fn)
+    return fn
+
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being handled", ("method", "route"))
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ("method", "route"),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+REQUEST_DB_TIME = Histogram("http_request_db_seconds", "Time spent in SQL per request", ("method", "route"))
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed", ("statement",))
+DB_QUERY_TIME = Histogram(
+    "db_query_duration_seconds", "SQL statement latency", ("statement",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+GEMINI_CALLS = Counter("gemini_requests_total", "Gemini generateContent calls", ("model", "outcome"))
+GEMINI_LATENCY = Histogram(
+    "gemini_request_duration_seconds", "Gemini generateContent latency", ("model",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0),
+)
+GEMINI_BATCH_IMAGES = Histogram(
+    "gemini_batch_images", "Images sent per batched verification call", buckets=(1, 2, 3, 4, 6, 8, 12, 16),
+)
+GEMINI_BATCH_FALLBACKS = Counter("gemini_batch_fallbacks_total", "Batched images re-verified with a single call")
+EWASTE_VERDICTS = Counter("ewaste_verifications_total", "E-waste verification results", ("result",))
+IMAGE_BYTES = Counter("image_bytes_processed_total", "Bytes of uploaded images processed", ("source",))
+
+
+# Per-request SQL accounting: [statement count, seconds]. A mutable list so that
+# worker threads running sync endpoints (which get a copy of the context) update
+# the same accumulator the middleware reads.
+_request_db: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("request_db", default=None)
+
+
+def _statement_kind(statement: str) -> str:
+    head = statement.lstrip()[:6].upper()
+    for kind in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+        if head.startswith(kind):
+            return kind.lower()
+    return "other"
+
+
+def instrument_engine(engine) -> None:
+    """Count and time every statement executed through ``engine``."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("_metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info["_metrics_started"].pop()
+        elapsed = time.perf_counter() - started
+        kind = _statement_kind(statement)
+        DB_QUERIES.inc((kind,))
+        DB_QUERY_TIME.observe((kind,), elapsed)
+        acc = _request_db.get()
+        if acc is not None:
+            acc[0] += 1
+            acc[1] += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context) -> None:
+        stack = context.connection.info.get("_metrics_started") if context.connection is not None else None
+        if stack:
+            stack.pop()
+
+
+def route_template(app, scope) -> str:
+    """Path template of the route that will handle ``scope``; keeps label cardinality bounded."""
+    return _matcher(app.router)(scope["method"], scope["path"], scope.get("root_path", ""))
+
+
+# id(router) -> (router, cached matcher); routers are not hashable
+_matchers: dict[int, tuple] = {}
+
+
+def _matcher(router) -> Callable[[str, str, str], str]:
+    entry = _matchers.get(id(router))
+    if entry is not None and entry[0] is router:
+        return entry[1]
+
+    # Matching walks every route, so results are cached per (method, path); ids in paths
+    # make the key space unbounded, hence the LRU bound
+    @lru_cache(maxsize=2048)
+    def match(method: str, path: str, root_path: str) -> str:
+        from starlette.routing import Match, Mount
+
+        scope = {"type": "http", "method": method, "path": path, "root_path": root_path}
+        for route in router.routes:
+            matched, _ = route.matches(scope)
+            if matched == Match.FULL:
+                return route.path + "/{path}" if isinstance(route, Mount) else route.path
+        return "unmatched"
+
+    _matchers[id(router)] = (router, match)
+    return match
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no response buffering, so SSE streams pass through
+    untouched) recording count, latency, in-flight requests and SQL usage per route.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        route = scope["route_template"] = route_template(scope["app"], scope)
+        labels = (method, route)
+        status = [500]
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        acc = [0, 0.0]
+        token = _request_db.set(acc)
+        HTTP_IN_FLIGHT.inc(labels)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec(labels)
+            _request_db.reset(token)
+            HTTP_REQUESTS.inc((method, route, str(status[0])))
+            HTTP_LATENCY.observe(labels, elapsed)
+            REQUEST_DB_QUERIES.observe(labels, acc[0])
+            REQUEST_DB_TIME.observe(labels, acc[1])
+
+
+def _gauge_lines(name: str, help: str, samples: list[tuple[dict, float]], kind: str = "gauge") -> list[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        names = tuple(labels)
+        lines.append(f"{name}{_labels(names, tuple(labels[n] for n in names))} {_number(value)}")
+    return lines
+
+
+@collector
+def _cache_metrics() -> list[str]:
+    from core import achievements, challenges
+
+    caches = {
+        "achievement_rules": achievements.engine,
+        "active_challenges": challenges.index,
+    }
+    hits = [({"cache": name}, c.cache_hits) for name, c in caches.items()]
+    misses = [({"cache": name}, c.cache_misses) for name, c in caches.items()]
+    ratios = [
+        ({"cache": name}, c.cache_hits / (c.cache_hits + c.cache_misses) if c.cache_hits + c.cache_misses else 0.0)
+        for name, c in caches.items()
+    ]
+    return (
+        _gauge_lines("cache_hits_total", "Cache lookups served from memory", hits, "counter")
+        + _gauge_lines("cache_misses_total", "Cache lookups that reloaded from the database", misses, "counter")
+        + _gauge_lines("cache_hit_ratio", "Hits over lookups since process start", ratios)
+    )
+
+
+@collector
+def _coalescer_metrics() -> list[str]:
+    from core import stats
+
+    m = stats.coalescer.metrics()
+    return (
+        _gauge_lines("stats_coalescer_pending_events", "Buffered stat deltas not yet flushed",
+                     [({}, m["pending_events"])])
+        + _gauge_lines("stats_coalescer_pending_age_seconds", "Age of the oldest buffered delta",
+                       [({}, m["pending_age_ms"] / 1000.0)])
+        + _gauge_lines("stats_coalescer_flush_errors_total", "Failed coalescer flushes",
+                       [({}, m["flush_errors"])], "counter")
+    )
+
+
+@collector
+def _event_consumer_metrics() -> list[str]:
+    from core import events
+
+    m = events.dispatcher.metrics()
+    lag = [({"consumer": name}, c["lag_events"]) for name, c in m["consumers"].items()]
+    return _gauge_lines("report_event_consumer_lag", "Outbox events not yet processed by each consumer", lag)
+
+
+@collector
+def _admission_metrics() -> list[str]:
+    from core import admission
+
+    return (
+        _gauge_lines("gemini_queue_depth", "Verification calls waiting for a Gemini slot",
+                     [({}, admission.gemini.depth)])
+        + _gauge_lines("gemini_queue_users", "Users with verification calls waiting",
+                       [({}, admission.gemini.users)])
+    )
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in registry:
+        lines.extend(metric.expose())
+    for fn in collectors:
+        try:
+            lines.extend(fn())
+        except Exception:
+            # A failing collector must not take the whole scrape down
+            continue
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,176 @@
+"""
+Opt-in per-request SQL profiler (SQL_PROFILE_ENABLED=1).
+
+Every statement executed while handling a request is recorded with its timing.
+Statements are grouped by shape (literals and IN-lists collapsed); a shape that
+repeats SQL_PROFILE_N_PLUS_ONE_THRESHOLD or more times in one request is logged
+as a likely N+1. Responses carry a Server-Timing header splitting DB time from
+the rest of the handler, and recent profiles are kept for GET /admin/debug/sql.
+
+Tests can enable the same recording temporarily with ``capture()``; see
+bench/query_budget.py for the pytest plugin built on it.
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SQL_PROFILE_ENABLED = os.environ.get("SQL_PROFILE_ENABLED", "0") == "1"
+SQL_PROFILE_N_PLUS_ONE_THRESHOLD = int(os.environ.get("SQL_PROFILE_N_PLUS_ONE_THRESHOLD", "5"))
+SQL_PROFILE_HISTORY = int(os.environ.get("SQL_PROFILE_HISTORY", "100"))
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so executions differing only in parameters compare equal."""
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(?)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+class RequestProfile:
+    def __init__(self, method: str, route: str, path: str) -> None:
+        self.method = method
+        self.route = route
+        self.path = path
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.statements: list[tuple[str, float]] = []  # (statement, seconds)
+        self._lock = threading.Lock()
+
+    def add(self, statement: str, seconds: float) -> None:
+        with self._lock:
+            self.statements.append((statement, seconds))
+
+    @property
+    def db_time(self) -> float:
+        return sum(s for _, s in self.statements)
+
+    def repeated(self, threshold: int = SQL_PROFILE_N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """Statement shapes executed at least ``threshold`` times, most frequent first."""
+        counts = Counter(statement_shape(s) for s, _ in self.statements)
+        return [(shape, n) for shape, n in counts.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        total = (time.perf_counter() - self.started) * 1000.0
+        db = self.db_time * 1000.0
+        return (
+            f'db;dur={db:.1f};desc="{len(self.statements)} queries", '
+            f"app;dur={max(total - db, 0.0):.1f}, total;dur={total:.1f}"
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "route": self.route,
+            "path": self.path,
+            "elapsed_ms": round(self.elapsed * 1000.0, 2),
+            "db_ms": round(self.db_time * 1000.0, 2),
+            "query_count": len(self.statements),
+            "repeated": [{"shape": shape, "count": n} for shape, n in self.repeated()],
+            "statements": [{"sql": s, "ms": round(t * 1000.0, 3)} for s, t in self.statements],
+        }
+
+
+_current: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar("sql_profile", default=None)
+history: deque[RequestProfile] = deque(maxlen=SQL_PROFILE_HISTORY)
+# Active capture() sinks; while any exist, requests are profiled even when the mode is off
+_captures: list[list[RequestProfile]] = []
+_captures_lock = threading.Lock()
+
+
+def active() -> bool:
+    return SQL_PROFILE_ENABLED or bool(_captures)
+
+
+def instrument_engine(engine) -> None:
+    """Attribute statements executed through ``engine`` to the request being profiled."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        if _current.get() is not None:
+            conn.info.setdefault("_profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        profile = _current.get()
+        if profile is None:
+            return
+        stack = conn.info.get("_profile_started")
+        if stack:
+            profile.add(statement, time.perf_counter() - stack.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context) -> None:
+        stack = context.connection.info.get("_profile_started") if context.connection is not None else None
+        if stack:
+            stack.pop()
+
+
+def _finish(profile: RequestProfile) -> None:
+    profile.elapsed = time.perf_counter() - profile.started
+    for shape, n in profile.repeated():
+        logger.warning("Possible N+1 in %s %s: %d x %s", profile.method, profile.route, n, shape)
+    if SQL_PROFILE_ENABLED:
+        history.append(profile)
+    with _captures_lock:
+        for sink in _captures:
+            sink.append(profile)
+
+
+class ProfilerMiddleware:
+    """Pure ASGI middleware; a pass-through unless profiling is on or a capture is active."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not active():
+            await self.app(scope, receive, send)
+            return
+        from core.metrics import route_template
+
+        route = scope.get("route_template") or route_template(scope["app"], scope)
+        profile = RequestProfile(scope["method"], route, scope["path"])
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            _finish(profile)
+
+
+@contextlib.contextmanager
+def capture() -> Iterator[list[RequestProfile]]:
+    """Collect a RequestProfile for every request completed inside the block."""
+    sink: list[RequestProfile] = []
+    with _captures_lock:
+        _captures.append(sink)
+    try:
+        yield sink
+    finally:
+        with _captures_lock:
+            _captures.remove(sink)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Optional
+
+
+class Subscription:
+    """An asyncio queue bound to the event loop of the SSE request that owns it."""
+
+    __slots__ = ("channels", "queue", "loop")
+
+    def __init__(self, channels: tuple[str, ...], maxsize: int) -> None:
+        self.channels = channels
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.loop = asyncio.get_running_loop()
+
+    def _offer(self, message: dict) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow client: drop the delta, it resyncs via Last-Event-ID on reconnect
+            pass
+
+
+class PubSub:
+    """
+    In-process publish/subscribe keyed by channel name (``user:<id>``, ``center:<id>``).
+
+    Publishing is thread-safe and may happen from the event dispatcher thread;
+    messages are handed to each subscriber's own event loop.
+    """
+
+    def __init__(self, queue_size: int = 256) -> None:
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._channels: dict[str, set[Subscription]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, channels: tuple[str, ...]) -> Subscription:
+        sub = Subscription(channels, self.queue_size)
+        with self._lock:
+            for channel in channels:
+                self._channels.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            for channel in sub.channels:
+                subs = self._channels.get(channel)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._channels[channel]
+
+    def has_subscribers(self, channel: str) -> bool:
+        return channel in self._channels
+
+    def publish(self, channel: str, message: dict) -> int:
+        with self._lock:
+            subs = list(self._channels.get(channel, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, message)
+            except RuntimeError:
+                # Subscriber's loop already closed
+                self.dropped += 1
+        self.published += len(subs)
+        return len(subs)
+
+    def subscriber_count(self, channel: Optional[str] = None) -> int:
+        with self._lock:
+            if channel is not None:
+                return len(self._channels.get(channel, ()))
+            return len({sub for subs in self._channels.values() for sub in subs})
+
+
+hub = PubSub()
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def center_channel(center_id: int) -> str:
+    return f"center:{center_id}"
@@ -0,0 +1,206 @@
+"""
+Tiered retention for reports.
+
+Recycled reports older than REPORT_RETENTION_DAYS (by recycled_at, falling back
+to created_at) are moved in batches from `reports` into `reports_archive`, and
+their counts, CO2 and points are added to `report_rollups`. Readers that
+report totals (analytics overview, user stats, achievement counts) add the
+rollups, and the admin export reads both tables, so nothing visible changes
+except that the hot table and its indexes stop growing.
+
+Images of archived reports are moved to a cold tier: downscaled to
+COLD_IMAGE_MAX_SIDE and re-encoded as JPEG at COLD_IMAGE_QUALITY. The result
+gets a new content-addressed name, never an overwrite, because served image
+URLs are cached as immutable. An original is deleted only after the batch
+commits and when no hot or archived report still points at it.
+
+The minimum age is 60 days, so the 30-day growth windows and the 7-day timeline
+always read live rows.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta
+from io import BytesIO
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from core import storage
+
+logger = logging.getLogger(__name__)
+
+REPORT_RETENTION_DAYS = int(os.environ.get("REPORT_RETENTION_DAYS", "365"))
+RETENTION_BATCH_SIZE = int(os.environ.get("RETENTION_BATCH_SIZE", "500"))
+COLD_IMAGE_MAX_SIDE = int(os.environ.get("COLD_IMAGE_MAX_SIDE", "1024"))
+COLD_IMAGE_QUALITY = int(os.environ.get("COLD_IMAGE_QUALITY", "60"))
+
+MIN_RETENTION_DAYS = 60
+
+ARCHIVE_COLUMNS = (
+    "id", "user_id", "image_path", "category", "confidence", "suggestion", "recycler_id",
+    "status", "co2_saved", "points_awarded", "created_at", "recycled_at",
+)
+
+
+def recompress(data: bytes) -> Optional[bytes]:
+    """Cold-tier JPEG for ``data``, or None when it would not be smaller or cannot be decoded."""
+    from PIL import Image
+
+    try:
+        with Image.open(BytesIO(data)) as img:
+            img.thumbnail((COLD_IMAGE_MAX_SIDE, COLD_IMAGE_MAX_SIDE))
+            out = BytesIO()
+            img.convert("RGB").save(out, "JPEG", quality=COLD_IMAGE_QUALITY, optimize=True)
+    except Exception:
+        return None
+    cold = out.getvalue()
+    return cold if len(cold) < len(data) else None
+
+
+class _ColdTier:
+    """Per-run memo: one re-encode per original, one stored object per (user, cold image)."""
+
+    def __init__(self) -> None:
+        self.encoded: dict[str, Optional[tuple[str, bytes]]] = {}
+        self.saved: set[str] = set()
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    def move(self, user_id: int, name: str) -> str:
+        if name not in self.encoded:
+            try:
+                data = storage.backend.read(name)
+            except Exception:
+                logger.warning("Cannot read %s for cold storage; keeping it", name)
+                data = None
+            cold = recompress(data) if data is not None else None
+            self.encoded[name] = (hashlib.sha256(cold).hexdigest(), cold) if cold is not None else None
+            if cold is not None:
+                self.bytes_before += len(data)
+                self.bytes_after += len(cold)
+        encoded = self.encoded[name]
+        if encoded is None:
+            return name
+        digest, cold = encoded
+        cold_name = f"{user_id}_{digest}.jpg"
+        if cold_name not in self.saved:
+            if not storage.backend.exists(cold_name):
+                storage.backend.save(cold_name, cold)
+            self.saved.add(cold_name)
+        return cold_name
+
+
+def _unreferenced(db: Session, names: set[str]) -> set[str]:
+    from models.models import ArchivedReport, Report
+
+    if not names:
+        return set()
+    used = set(db.execute(
+        union_all(
+            select(Report.image_path).where(Report.image_path.in_(names)),
+            select(ArchivedReport.image_path).where(ArchivedReport.image_path.in_(names)),
+        )
+    ).scalars())
+    return names - used
+
+
+def _add_rollups(db: Session, rows: list[dict]) -> None:
+    from models.models import ReportRollup
+
+    deltas: dict[tuple, list] = {}
+    for row in rows:
+        key = (row["user_id"], row["recycler_id"] or 0, row["category"])
+        acc = deltas.setdefault(key, [0, 0.0, 0])
+        acc[0] += 1
+        acc[1] += row["co2_saved"] or 0.0
+        acc[2] += row["points_awarded"] or 0
+    for (user_id, recycler_id, category), (n, co2, points) in deltas.items():
+        stmt = sqlite_insert(ReportRollup).values(
+            user_id=user_id, recycler_id=recycler_id, category=category,
+            reports=n, co2_saved=co2, points_awarded=points,
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["user_id", "recycler_id", "category"],
+            set_={
+                "reports": ReportRollup.reports + n,
+                "co2_saved": ReportRollup.co2_saved + co2,
+                "points_awarded": ReportRollup.points_awarded + points,
+            },
+        ))
+
+
+def archive(
+    db: Session,
+    older_than_days: int = REPORT_RETENTION_DAYS,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    cold_images: bool = True,
+    dry_run: bool = False,
+) -> dict:
+    """Archive eligible reports in batches of ``batch_size``; returns counts for the run."""
+    from models.models import ArchivedReport, Report
+
+    if older_than_days < MIN_RETENTION_DAYS:
+        raise ValueError(f"Retention must be at least {MIN_RETENTION_DAYS} days")
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    eligible = (
+        Report.status == "recycled",
+        func.coalesce(Report.recycled_at, Report.created_at) < cutoff,
+    )
+    if dry_run:
+        return {"archived": 0, "eligible": db.execute(select(func.count(Report.id)).where(*eligible)).scalar()}
+
+    tier = _ColdTier()
+    archived = images_deleted = 0
+    last_id = 0
+    columns = [getattr(Report, c) for c in ARCHIVE_COLUMNS]
+    while True:
+        rows = [
+            dict(zip(ARCHIVE_COLUMNS, r))
+            for r in db.execute(
+                select(*columns).where(*eligible, Report.id > last_id).order_by(Report.id).limit(batch_size)
+            ).all()
+        ]
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        originals = {r["image_path"] for r in rows}
+        if cold_images:
+            # Cold copies are written before the rows that point at them are committed
+            for row in rows:
+                row["image_path"] = tier.move(row["user_id"], row["image_path"])
+        now = datetime.utcnow()
+        db.execute(insert(ArchivedReport), [{**r, "archived_at": now} for r in rows])
+        db.execute(delete(Report).where(Report.id.in_([r["id"] for r in rows])))
+        _add_rollups(db, rows)
+        db.commit()
+        archived += len(rows)
+        if cold_images:
+            for name in _unreferenced(db, originals - tier.saved):
+                storage.backend.delete(name)
+                images_deleted += 1
+        logger.info("Archived %d reports (through id %d)", archived, last_id)
+    return {
+        "archived": archived,
+        "images_recompressed": len(tier.saved),
+        "images_deleted": images_deleted,
+        "image_bytes_before": tier.bytes_before,
+        "image_bytes_after": tier.bytes_after,
+    }
+
+
+def rollup_totals(db: Session, *criteria) -> tuple[int, float, int]:
+    """(reports, co2_saved, points_awarded) summed over archived reports matching ``criteria``."""
+    from models.models import ReportRollup
+
+    n, co2, points = db.execute(
+        select(
+            func.sum(ReportRollup.reports), func.sum(ReportRollup.co2_saved), func.sum(ReportRollup.points_awarded),
+        ).where(*criteria)
+    ).one()
+    return int(n or 0), float(co2 or 0.0), int(points or 0)
+
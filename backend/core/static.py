@@ -0,0 +1,121 @@
+"""
+Static file serving for /uploads with long-lived caching and byte ranges.
+
+Uploads are stored under content-addressed names (`<user>_<sha256>.<ext>`), so a
+URL never changes meaning: such files are served `immutable` for a year, with
+the content hash as a deploy-independent ETag. Other files (older uploads
+named before content addressing) get a short max-age and revalidate via
+ETag / Last-Modified. Single byte ranges, including If-Range, are answered
+with 206 Partial Content.
+"""
+from __future__ import annotations
+
+import os
+import re
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+UPLOADS_MUTABLE_MAX_AGE = int(os.environ.get("UPLOADS_MUTABLE_MAX_AGE", "3600"))
+
+CONTENT_ADDRESSED = re.compile(r"^\d+_([0-9a-f]{64})\.[A-Za-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    (start, end) inclusive for a single `bytes=` range. Returns None to serve
+    the whole file (absent, malformed or multi-range headers) and raises
+    ValueError when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first.isdigit() or first == "") or not (last.isdigit() or last == "") or first == last == "":
+        return None
+    if first == "":
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    end = int(last) if last else size - 1
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class PartialFileResponse(FileResponse):
+    """206 response streaming bytes ``start``..``end`` (inclusive) of a file."""
+
+    def __init__(self, path, start: int, end: int, size: int, headers: Headers) -> None:
+        super().__init__(path, status_code=206)
+        self.start = start
+        self.end = end
+        for key in ("etag", "last-modified", "cache-control", "accept-ranges"):
+            if key in headers:
+                self.headers[key] = headers[key]
+        self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+        self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # File shrank underneath us; close the body so the client sees a short read
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class CachedStaticFiles(StaticFiles):
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        match = CONTENT_ADDRESSED.match(os.path.basename(full_path))
+        if match:
+            response.headers["cache-control"] = IMMUTABLE
+            response.headers["etag"] = f'"{match.group(1)}"'
+        else:
+            response.headers["cache-control"] = f"public, max-age={UPLOADS_MUTABLE_MAX_AGE}"
+        response.headers["accept-ranges"] = "bytes"
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        range_header = request_headers.get("range")
+        if range_header and status_code == 200:
+            if_range = request_headers.get("if-range")
+            if if_range is not None and if_range.strip() not in (
+                response.headers["etag"], response.headers["last-modified"]
+            ):
+                return response
+            size = stat_result.st_size
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                return Response(status_code=416, headers={"content-range": f"bytes */{size}"})
+            if byte_range is not None:
+                return PartialFileResponse(full_path, *byte_range, size=size, headers=response.headers)
+        return response
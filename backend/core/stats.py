@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Float, Integer, bindparam, func, update
+from sqlalchemy.orm import Session
+
+from core.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+STATS_COALESCE_ENABLED = os.environ.get("STATS_COALESCE_ENABLED", "0") == "1"
+STATS_COALESCE_INTERVAL_MS = int(os.environ.get("STATS_COALESCE_INTERVAL_MS", "500"))
+STATS_COALESCE_MAX_EVENTS = int(os.environ.get("STATS_COALESCE_MAX_EVENTS", "200"))
+
+
+class UserDelta:
+    __slots__ = ("points", "co2_saved", "items_recycled", "last_active")
+
+    def __init__(self) -> None:
+        self.points = 0
+        self.co2_saved = 0.0
+        self.items_recycled = 0
+        self.last_active: Optional[datetime] = None
+
+    def add(self, points: int = 0, co2_saved: float = 0.0, items_recycled: int = 0,
+            last_active: Optional[datetime] = None) -> None:
+        self.points += points
+        self.co2_saved += co2_saved
+        self.items_recycled += items_recycled
+        if last_active is not None and (self.last_active is None or last_active > self.last_active):
+            self.last_active = last_active
+
+    def merge(self, other: "UserDelta") -> None:
+        self.add(other.points, other.co2_saved, other.items_recycled, other.last_active)
+
+
+class CenterDelta:
+    __slots__ = ("recycled", "co2_saved", "performance")
+
+    def __init__(self) -> None:
+        self.recycled = 0
+        self.co2_saved = 0.0
+        self.performance = 0.0
+
+    def add(self, recycled: int = 0, co2_saved: float = 0.0, performance: float = 0.0) -> None:
+        self.recycled += recycled
+        self.co2_saved += co2_saved
+        self.performance += performance
+
+    def merge(self, other: "CenterDelta") -> None:
+        self.add(other.recycled, other.co2_saved, other.performance)
+
+
+def apply_deltas(db: Session, user_deltas: dict[int, UserDelta], center_deltas: dict[int, CenterDelta]) -> None:
+    """
+    Apply aggregated stat deltas with one executemany UPDATE per table.
+    Increments are computed in SQL so concurrent writers never overwrite each other.
+    The caller owns the transaction.
+    """
+    from models.models import User, RecyclerCenter
+
+    conn = db.connection()
+    if user_deltas:
+        users = User.__table__
+        stmt = (
+            update(users)
+            .where(users.c.id == bindparam("b_id"))
+            .values(
+                points=users.c.points + bindparam("d_points", type_=Integer),
+                # 100 points per level; levels never go down
+                level=func.max(users.c.level, (users.c.points + bindparam("d_points", type_=Integer)) // 100 + 1),
+                total_co2_saved=users.c.total_co2_saved + bindparam("d_co2", type_=Float),
+                total_items_recycled=users.c.total_items_recycled + bindparam("d_items", type_=Integer),
+                last_active=func.coalesce(bindparam("d_active", type_=DateTime), users.c.last_active),
+            )
+        )
+        conn.execute(stmt, [
+            {"b_id": uid, "d_points": d.points, "d_co2": d.co2_saved,
+             "d_items": d.items_recycled, "d_active": d.last_active}
+            for uid, d in user_deltas.items()
+        ])
+    if center_deltas:
+        centers = RecyclerCenter.__table__
+        stmt = (
+            update(centers)
+            .where(centers.c.id == bindparam("b_id"))
+            .values(
+                total_recycled=centers.c.total_recycled + bindparam("d_recycled", type_=Integer),
+                total_co2_saved=centers.c.total_co2_saved + bindparam("d_co2", type_=Float),
+                performance_score=func.min(100.0, centers.c.performance_score + bindparam("d_perf", type_=Float)),
+            )
+        )
+        conn.execute(stmt, [
+            {"b_id": cid, "d_recycled": d.recycled, "d_co2": d.co2_saved, "d_perf": d.performance}
+            for cid, d in center_deltas.items()
+        ])
+
+
+class StatsCoalescer:
+    """
+    Write-behind buffer for user/center stat deltas.
+
+    Deltas are merged per user and per center in memory and flushed in a single
+    transaction every ``interval_ms`` milliseconds or after ``max_events`` events,
+    whichever comes first. ``stop()`` drains whatever is still buffered.
+    """
+
+    def __init__(self, interval_ms: int = 500, max_events: int = 200) -> None:
+        self.interval = interval_ms / 1000.0
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._users: dict[int, UserDelta] = {}
+        self._centers: dict[int, CenterDelta] = {}
+        self._pending_events = 0
+        self._oldest_pending: Optional[float] = None
+        # Metrics
+        self.flushes = 0
+        self.flush_errors = 0
+        self.events_flushed = 0
+        self.last_flush_lag_ms = 0.0
+        self.max_flush_lag_ms = 0.0
+        self.last_flush_duration_ms = 0.0
+
+    def _note_event(self) -> None:
+        self._pending_events += 1
+        if self._oldest_pending is None:
+            self._oldest_pending = time.monotonic()
+        if self._pending_events >= self.max_events:
+            self._wake.set()
+
+    def add_user(self, user_id: int, points: int = 0, co2_saved: float = 0.0, items_recycled: int = 0,
+                 last_active: Optional[datetime] = None) -> None:
+        with self._lock:
+            self._users.setdefault(user_id, UserDelta()).add(points, co2_saved, items_recycled, last_active)
+            self._note_event()
+
+    def add_center(self, center_id: int, recycled: int = 0, co2_saved: float = 0.0, performance: float = 0.0) -> None:
+        with self._lock:
+            self._centers.setdefault(center_id, CenterDelta()).add(recycled, co2_saved, performance)
+            self._note_event()
+
+    def add_deltas(self, user_deltas: dict[int, UserDelta], center_deltas: dict[int, CenterDelta]) -> None:
+        with self._lock:
+            for uid, d in user_deltas.items():
+                self._users.setdefault(uid, UserDelta()).merge(d)
+                self._note_event()
+            for cid, d in center_deltas.items():
+                self._centers.setdefault(cid, CenterDelta()).merge(d)
+                self._note_event()
+
+    def pending_user(self, user_id: int) -> Optional[UserDelta]:
+        """Buffered, not yet flushed delta for a user (read-your-writes for callers)."""
+        with self._lock:
+            pending = self._users.get(user_id)
+            if pending is None:
+                return None
+            copy = UserDelta()
+            copy.merge(pending)
+            return copy
+
+    def flush(self) -> int:
+        """Write all buffered deltas in one transaction. Returns the number of events flushed."""
+        with self._flush_lock:
+            with self._lock:
+                users, self._users = self._users, {}
+                centers, self._centers = self._centers, {}
+                events, self._pending_events = self._pending_events, 0
+                oldest, self._oldest_pending = self._oldest_pending, None
+            if not events:
+                return 0
+            started = time.monotonic()
+            db = SessionLocal()
+            try:
+                apply_deltas(db, users, centers)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self.flush_errors += 1
+                logger.exception("Stats flush failed; re-queueing %d events", events)
+                self._requeue(users, centers, events, oldest)
+                return 0
+            finally:
+                db.close()
+            finished = time.monotonic()
+            self.flushes += 1
+            self.events_flushed += events
+            self.last_flush_duration_ms = (finished - started) * 1000.0
+            self.last_flush_lag_ms = (finished - oldest) * 1000.0 if oldest is not None else 0.0
+            self.max_flush_lag_ms = max(self.max_flush_lag_ms, self.last_flush_lag_ms)
+            return events
+
+    def _requeue(self, users: dict[int, UserDelta], centers: dict[int, CenterDelta], events: int,
+                 oldest: Optional[float]) -> None:
+        with self._lock:
+            for uid, d in users.items():
+                self._users.setdefault(uid, UserDelta()).merge(d)
+            for cid, d in centers.items():
+                self._centers.setdefault(cid, CenterDelta()).merge(d)
+            self._pending_events += events
+            if oldest is not None and (self._oldest_pending is None or oldest < self._oldest_pending):
+                self._oldest_pending = oldest
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Stats coalescer loop error")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="stats-coalescer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background flusher and drain anything still buffered."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            pending = self._pending_events
+            oldest = self._oldest_pending
+        return {
+            "enabled": STATS_COALESCE_ENABLED,
+            "pending_events": pending,
+            "pending_age_ms": round((time.monotonic() - oldest) * 1000.0, 1) if oldest is not None else 0.0,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "events_flushed": self.events_flushed,
+            "last_flush_lag_ms": round(self.last_flush_lag_ms, 1),
+            "max_flush_lag_ms": round(self.max_flush_lag_ms, 1),
+            "last_flush_duration_ms": round(self.last_flush_duration_ms, 1),
+        }
+
+
+coalescer = StatsCoalescer(STATS_COALESCE_INTERVAL_MS, STATS_COALESCE_MAX_EVENTS)
+
+
+def record_deltas(db: Session, user_deltas: dict[int, UserDelta], center_deltas: dict[int, CenterDelta]) -> None:
+    """Record pre-aggregated deltas, buffered when coalescing is enabled, otherwise in ``db``'s transaction."""
+    if STATS_COALESCE_ENABLED:
+        coalescer.add_deltas(user_deltas, center_deltas)
+        return
+    apply_deltas(db, user_deltas, center_deltas)
+
+
+def record_user(db: Session, user_id: int, points: int = 0, co2_saved: float = 0.0, items_recycled: int = 0,
+                last_active: Optional[datetime] = None) -> None:
+    """Record a user stat change, buffered when coalescing is enabled, otherwise in ``db``'s transaction."""
+    if STATS_COALESCE_ENABLED:
+        coalescer.add_user(user_id, points, co2_saved, items_recycled, last_active)
+        return
+    delta = UserDelta()
+    delta.add(points, co2_saved, items_recycled, last_active)
+    apply_deltas(db, {user_id: delta}, {})
+
+
+def record_center(db: Session, center_id: int, recycled: int = 0, co2_saved: float = 0.0,
+                  performance: float = 0.0) -> None:
+    """Record a center stat change, buffered when coalescing is enabled, otherwise in ``db``'s transaction."""
+    if STATS_COALESCE_ENABLED:
+        coalescer.add_center(center_id, recycled, co2_saved, performance)
+        return
+    delta = CenterDelta()
+    delta.add(recycled, co2_saved, performance)
+    apply_deltas(db, {}, {center_id: delta})
+
+
+def start() -> None:
+    if STATS_COALESCE_ENABLED:
+        coalescer.start()
+
+
+def shutdown() -> None:
+    coalescer.stop()
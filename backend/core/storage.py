@@ -0,0 +1,140 @@
+"""
+Image storage backends.
+
+`backend` is chosen by STORAGE_BACKEND:
+
+- `local` (default): files under UPLOAD_DIR, served by the app at /uploads.
+- `s3`: an S3-compatible bucket (AWS, MinIO, R2, ...), requires `boto3`.
+  Images are served straight from the bucket through presigned GET URLs, or
+  from STORAGE_PUBLIC_BASE_URL (a CDN or public bucket) when it is set, so API
+  nodes never stream image bytes and share no local state.
+
+Callers pass stored names (the `image_path` column); `image_url(name)` turns
+one into the URL clients should fetch.
+"""
+from __future__ import annotations
+
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from core.static import CONTENT_ADDRESSED, IMMUTABLE
+
+try:
+    import boto3
+except ImportError:  # optional, only for STORAGE_BACKEND=s3
+    boto3 = None
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "local")
+UPLOAD_DIR = Path(os.environ.get("UPLOAD_DIR", "uploads"))
+# CDN or public-bucket base; when set, image URLs are "<base>/<name>" and nothing is presigned
+STORAGE_PUBLIC_BASE_URL = os.environ.get("STORAGE_PUBLIC_BASE_URL", "").rstrip("/")
+S3_BUCKET = os.environ.get("S3_BUCKET", "")
+S3_PREFIX = os.environ.get("S3_PREFIX", "uploads/")
+S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL") or None  # e.g. http://localhost:9000 for MinIO
+S3_REGION = os.environ.get("S3_REGION") or None
+S3_PRESIGN_EXPIRES = int(os.environ.get("S3_PRESIGN_EXPIRES", "3600"))
+
+
+def _content_type(name: str) -> str:
+    suffix = Path(name).suffix.lower()
+    return {".png": "image/png", ".gif": "image/gif", ".webp": "image/webp"}.get(suffix, "image/jpeg")
+
+
+class LocalStorage:
+    serves_files = True
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def exists(self, name: str) -> bool:
+        return (self.root / name).exists()
+
+    def save(self, name: str, data: bytes) -> None:
+        # Write-then-rename so a concurrent reader never sees a partial file
+        tmp = self.root / f".{name}.tmp"
+        tmp.write_bytes(data)
+        tmp.replace(self.root / name)
+
+    def read(self, name: str) -> bytes:
+        return (self.root / name).read_bytes()
+
+    def delete(self, name: str) -> None:
+        (self.root / name).unlink(missing_ok=True)
+
+    def url(self, name: str) -> str:
+        if STORAGE_PUBLIC_BASE_URL:
+            return f"{STORAGE_PUBLIC_BASE_URL}/{name}"
+        return f"/uploads/{name}"
+
+
+class S3Storage:
+    serves_files = False
+
+    def __init__(self, bucket: str, prefix: str = "") -> None:
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the boto3 package")
+        if not bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        self.bucket = bucket
+        self.prefix = prefix
+        # Credentials come from the usual AWS chain (AWS_ACCESS_KEY_ID, profiles, instance roles)
+        self.client = boto3.client("s3", endpoint_url=S3_ENDPOINT_URL, region_name=S3_REGION)
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    def exists(self, name: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(name))
+            return True
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def save(self, name: str, data: bytes) -> None:
+        cache_control = IMMUTABLE if CONTENT_ADDRESSED.match(name) else "public, max-age=3600"
+        self.client.put_object(
+            Bucket=self.bucket, Key=self._key(name), Body=data,
+            ContentType=_content_type(name), CacheControl=cache_control,
+        )
+
+    def read(self, name: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(name))["Body"].read()
+
+    def delete(self, name: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(name))
+
+    def url(self, name: str) -> str:
+        if STORAGE_PUBLIC_BASE_URL:
+            return f"{STORAGE_PUBLIC_BASE_URL}/{self._key(name)}"
+        # URLs are signed for a full period but reused for half of it: list endpoints
+        # don't re-sign every row, and browsers see a stable URL they can cache
+        window = int(time.time() // (S3_PRESIGN_EXPIRES / 2))
+        return self._presigned(name, window)
+
+    @lru_cache(maxsize=50000)
+    def _presigned(self, name: str, _window: int) -> str:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": self._key(name)}, ExpiresIn=S3_PRESIGN_EXPIRES,
+        )
+
+
+def _make_backend(kind: str):
+    if kind == "local":
+        return LocalStorage(UPLOAD_DIR)
+    if kind == "s3":
+        return S3Storage(S3_BUCKET, S3_PREFIX)
+    raise RuntimeError(f"Unknown STORAGE_BACKEND {kind!r}; expected 'local' or 's3'")
+
+
+backend = _make_backend(STORAGE_BACKEND)
+
+
+def image_url(name: str) -> str:
+    return backend.url(name)
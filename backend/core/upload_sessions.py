@@ -0,0 +1,176 @@
+"""
+On-disk storage for resumable (tus-style) image uploads.
+
+A session is two files in UPLOAD_SESSION_DIR: `<id>.json` with its metadata and
+`<id>.part` with the bytes received so far. The size of the part file is the
+session offset, so bytes that reached disk before a dropped connection count
+and the client resumes from there. Sessions expire UPLOAD_SESSION_TTL_HOURS
+after their last write; expired ones are removed on access and by a sweep that
+runs at most every few minutes when sessions are created.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import secrets
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import anyio
+from fastapi import HTTPException
+from starlette.requests import ClientDisconnect
+
+UPLOAD_SESSION_DIR = Path(os.environ.get("UPLOAD_SESSION_DIR", "upload_sessions"))
+UPLOAD_SESSION_TTL_HOURS = float(os.environ.get("UPLOAD_SESSION_TTL_HOURS", "24"))
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+
+_SWEEP_INTERVAL = 300.0
+_last_sweep = 0.0
+# Session id -> lock held while a PATCH is writing to it
+_writing: dict[str, asyncio.Lock] = {}
+
+
+class UploadSession:
+    def __init__(self, id: str, user_id: int, filename: str, content_type: Optional[str], size: int,
+                 created_at: datetime, expires_at: datetime) -> None:
+        self.id = id
+        self.user_id = user_id
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.created_at = created_at
+        self.expires_at = expires_at
+
+    @property
+    def part_path(self) -> Path:
+        return UPLOAD_SESSION_DIR / f"{self.id}.part"
+
+    @property
+    def meta_path(self) -> Path:
+        return UPLOAD_SESSION_DIR / f"{self.id}.json"
+
+    @property
+    def offset(self) -> int:
+        try:
+            return self.part_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.size
+
+    def _save(self) -> None:
+        tmp = self.meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "id": self.id, "user_id": self.user_id, "filename": self.filename,
+            "content_type": self.content_type, "size": self.size,
+            "created_at": self.created_at.isoformat(), "expires_at": self.expires_at.isoformat(),
+        }))
+        tmp.replace(self.meta_path)
+
+    def touch(self) -> None:
+        self.expires_at = datetime.utcnow() + timedelta(hours=UPLOAD_SESSION_TTL_HOURS)
+        self._save()
+
+
+def _valid_id(session_id: str) -> bool:
+    return len(session_id) == 32 and all(c in "0123456789abcdef" for c in session_id)
+
+
+def create(user_id: int, filename: str, content_type: Optional[str], size: int) -> UploadSession:
+    if size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Uploads are limited to {UPLOAD_MAX_BYTES} bytes")
+    UPLOAD_SESSION_DIR.mkdir(parents=True, exist_ok=True)
+    sweep()
+    now = datetime.utcnow()
+    session = UploadSession(
+        secrets.token_hex(16), user_id, filename, content_type, size,
+        now, now + timedelta(hours=UPLOAD_SESSION_TTL_HOURS),
+    )
+    session.part_path.touch()
+    session._save()
+    return session
+
+
+def _load(session_id: str) -> Optional[UploadSession]:
+    if not _valid_id(session_id):
+        return None
+    try:
+        meta = json.loads((UPLOAD_SESSION_DIR / f"{session_id}.json").read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    return UploadSession(
+        meta["id"], meta["user_id"], meta["filename"], meta["content_type"], meta["size"],
+        datetime.fromisoformat(meta["created_at"]), datetime.fromisoformat(meta["expires_at"]),
+    )
+
+
+def get(session_id: str, user_id: int) -> UploadSession:
+    """The caller's live session, or 404 (other users' sessions are not revealed)."""
+    session = _load(session_id)
+    if session is not None and session.expires_at < datetime.utcnow():
+        delete(session)
+        session = None
+    if session is None or session.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+
+async def append(session: UploadSession, offset: int, chunks: AsyncIterator[bytes]) -> int:
+    """
+    Append a byte range starting at ``offset``. Returns the new offset; whatever
+    arrived before a client disconnect is kept.
+    """
+    lock = _writing.setdefault(session.id, asyncio.Lock())
+    if lock.locked():
+        raise HTTPException(status_code=409, detail="Another request is writing to this upload")
+    async with lock:
+        try:
+            current = session.offset
+            if offset != current:
+                raise HTTPException(status_code=409, detail="Upload-Offset does not match",
+                                    headers={"Upload-Offset": str(current)})
+            async with await anyio.open_file(session.part_path, mode="ab") as part:
+                try:
+                    async for chunk in chunks:
+                        if current + len(chunk) > session.size:
+                            await part.truncate(offset)
+                            raise HTTPException(status_code=413, detail="Chunk runs past the declared upload size")
+                        await part.write(chunk)
+                        current += len(chunk)
+                except ClientDisconnect:
+                    pass
+            session.touch()
+            return current
+        finally:
+            _writing.pop(session.id, None)
+
+
+def read(session: UploadSession) -> bytes:
+    return session.part_path.read_bytes()
+
+
+def delete(session: UploadSession) -> None:
+    for path in (session.part_path, session.meta_path):
+        path.unlink(missing_ok=True)
+
+
+def sweep(force: bool = False) -> int:
+    """Remove expired sessions; rate-limited unless ``force``. Returns the number removed."""
+    global _last_sweep
+    if not force and time.monotonic() - _last_sweep < _SWEEP_INTERVAL:
+        return 0
+    _last_sweep = time.monotonic()
+    removed = 0
+    now = datetime.utcnow()
+    for meta_path in UPLOAD_SESSION_DIR.glob("*.json"):
+        session = _load(meta_path.stem)
+        if session is None or session.expires_at < now:
+            meta_path.unlink(missing_ok=True)
+            (UPLOAD_SESSION_DIR / f"{meta_path.stem}.part").unlink(missing_ok=True)
+            removed += 1
+    return removed
@@ -0,0 +1,86 @@
+"""
+Batching front end for Gemini e-waste verification.
+
+With GEMINI_BATCH_SIZE > 1, images that arrive within GEMINI_BATCH_WINDOW_MS
+of each other are verified together in one generateContent call
+(routers.ml.detect_ewaste_batch), up to GEMINI_BATCH_SIZE per call. A full
+batch is sent at once; a partial one when the window closes. The window is
+the latency paid for fewer outbound calls: 0 sends whatever is queued
+immediately, so only uploads that are already waiting are combined.
+
+The admission scheduler (core.admission) still releases requests one by one,
+in fair order; the slots a batch folds into a single call are refunded, so
+GEMINI_RPM keeps counting outbound calls. Images that fall back to single
+calls are not refunded, and a failed image fails only its own upload.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from core import admission
+
+GEMINI_BATCH_SIZE = int(os.environ.get("GEMINI_BATCH_SIZE", "1"))
+GEMINI_BATCH_WINDOW_MS = float(os.environ.get("GEMINI_BATCH_WINDOW_MS", "150"))
+
+
+class BatchVerifier:
+    def __init__(self, max_batch: int = GEMINI_BATCH_SIZE, window_ms: float = GEMINI_BATCH_WINDOW_MS) -> None:
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window_ms) / 1000.0
+        self._pending: list[tuple[bytes, Optional[str], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Strong references: the loop only keeps weak ones to running tasks
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch > 1
+
+    async def verify(self, image_bytes: bytes, mime_type: Optional[str]) -> tuple[bool, str]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((image_bytes, mime_type, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        batch = [item for item in batch if not item[2].done()]  # drop requests cancelled while waiting
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[bytes, Optional[str], asyncio.Future]]) -> None:
+        from routers.ml import detect_ewaste_batch
+
+        try:
+            results, calls = await run_in_threadpool(detect_ewaste_batch, [(data, mime) for data, mime, _ in batch])
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        # Only the calls the batch actually saved; fallbacks spend quota like single uploads
+        admission.gemini.refund(max(0, len(batch) - calls))
+        for (_, _, future), result in zip(batch, results):
+            if future.done():  # the waiting request may have been cancelled
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+batcher = BatchVerifier()
@@ -0,0 +1,50 @@
+"""
+Optional post-startup warm-up (STARTUP_WARMUP=1).
+
+Runs in a background thread after the app is serving, so readiness is not
+delayed: loads the achievement rule and active-challenge caches, imports
+Pillow, NumPy and the Gemini client, and builds the first Gemini model handle.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+STARTUP_WARMUP = os.environ.get("STARTUP_WARMUP", "0") == "1"
+
+
+def run() -> None:
+    from core import achievements, challenges
+    from core.db import SessionLocal
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        achievements.engine.candidates(db, achievements.METRICS)
+        challenges.index.match(db, datetime.utcnow(), "reports", None)
+    finally:
+        db.close()
+
+    import numpy  # noqa: F401  (upload pre-filter)
+    from PIL import Image  # noqa: F401
+    from routers import ml
+
+    ml.warm_up()
+    logger.info("Warm-up finished in %.0f ms", (time.perf_counter() - started) * 1000.0)
+
+
+def _run_safely() -> None:
+    try:
+        run()
+    except Exception:
+        logger.exception("Warm-up failed")
+
+
+def start() -> None:
+    if STARTUP_WARMUP:
+        threading.Thread(target=_run_safely, name="warmup", daemon=True).start()
@@ -54,6 +54,8 @@ class RecyclerCenter(Base):
 
 class Report(Base):
     __tablename__ = "reports"
+    # Ids of archived reports (reports_archive) must never be handed out again
+    __table_args__ = {"sqlite_autoincrement": True}
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     image_path: Mapped[str] = mapped_column(String(512), nullable=False)
@@ -102,10 +104,13 @@ class Challenge(Base):
     description: Mapped[str] = mapped_column(Text, nullable=False)
     target: Mapped[int] = mapped_column(Integer, nullable=False)  # Target number of items
     current_progress: Mapped[int] = mapped_column(Integer, default=0)
+    metric: Mapped[str] = mapped_column(String(20), default="recycled")  # reports, recycled
+    category: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)  # None matches every category
     start_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     end_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     reward_points: Mapped[int] = mapped_column(Integer, default=0)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
@@ -118,3 +123,65 @@ class ImpactMetric(Base):
     total_co2_saved: Mapped[float] = mapped_column(Float, default=0.0)
     total_users: Mapped[int] = mapped_column(Integer, default=0)
     total_centers: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class ReportEvent(Base):
+    """Transactional outbox: one row per report lifecycle change, written with the change itself."""
+    __tablename__ = "report_events"
+    # Consumers track the last id they processed; ids of pruned events must never be reused
+    __table_args__ = {"sqlite_autoincrement": True}
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(30), nullable=False)  # created, status_changed
+    report_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    recycler_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    payload: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class EventCheckpoint(Base):
+    __tablename__ = "event_checkpoints"
+    consumer: Mapped[str] = mapped_column(String(100), primary_key=True)
+    last_event_id: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class IdempotencyRecord(Base):
+    """Outcome of a request sent with an Idempotency-Key; status_code is NULL while it is in flight."""
+    __tablename__ = "idempotency_keys"
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    response: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON body as sent
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class ArchivedReport(Base):
+    """Recycled reports moved out of `reports` by the retention job (core.retention); ids are kept."""
+    __tablename__ = "reports_archive"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    image_path: Mapped[str] = mapped_column(String(512), nullable=False)  # cold-tier copy when recompressed
+    category: Mapped[str] = mapped_column(String(100), nullable=False)
+    confidence: Mapped[float] = mapped_column(Float, nullable=False)
+    suggestion: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    recycler_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    co2_saved: Mapped[float] = mapped_column(Float, default=0.0)
+    points_awarded: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    recycled_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class ReportRollup(Base):
+    """Aggregates of archived reports, so totals over `reports` can add them without scanning the archive."""
+    __tablename__ = "report_rollups"
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    recycler_id: Mapped[int] = mapped_column(Integer, primary_key=True)  # 0 when unassigned
+    category: Mapped[str] = mapped_column(String(100), primary_key=True)
+    reports: Mapped[int] = mapped_column(Integer, default=0)
+    co2_saved: Mapped[float] = mapped_column(Float, default=0.0)
+    points_awarded: Mapped[int] = mapped_column(Integer, default=0)
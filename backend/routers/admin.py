@@ -1,14 +1,22 @@
-from typing import List
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator, List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import func
+from sqlalchemy import or_, select, text
 from sqlalchemy.orm import Session
 
-from core.db import get_db
+from core import events, fts, profiler, stats
+from core.center_import import ParseError, import_centers, parse_csv, parse_geojson
+from core.db import engine, get_db
 from core.security import decode_token
-from models.models import User, RecyclerCenter, Report
-from schemas.schemas import RecyclerCenterOut
+from models.models import User, RecyclerCenter, Report, ArchivedReport
+from schemas.schemas import UserDirectoryEntry, UserDirectoryPage
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -34,8 +42,206 @@ def approve_center(center_id: int, _: User = Depends(get_current_admin), db: Ses
     return {"ok": True}
 
 
+@router.post("/centers/import")
+def import_centers_file(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "geojson"]] = Query(None, description="defaults to the file extension"),
+    approve: bool = False,
+    _: User = Depends(get_current_admin),
+    db: Session = Depends(get_db),
+) -> dict:
+    """Bulk upsert recycler centers from CSV or GeoJSON, reporting row-level errors."""
+    fmt = format or ("csv" if (file.filename or "").lower().endswith(".csv") else "geojson")
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="surrogateescape", newline="")
+    try:
+        rows = parse_csv(stream) if fmt == "csv" else parse_geojson(stream)
+        result = import_centers(db, rows, approve=approve)
+    except ParseError as exc:
+        # Earlier batches stay committed; tell the caller how far the import got
+        raise HTTPException(status_code=400, detail={
+            "error": f"Could not parse {fmt} file: {exc.message}",
+            "row": exc.row,
+            **exc.result.as_dict(),
+        })
+    except (ValueError, UnicodeDecodeError) as exc:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Could not parse {fmt} file: {exc}")
+    finally:
+        stream.detach()
+    return result.as_dict()
+
+
 @router.get("/users", response_model=List[str])
 def list_users(_: User = Depends(get_current_admin), db: Session = Depends(get_db)) -> list[str]:
-    return [u.email for u in db.query(User).all()]
+    return list(db.execute(select(User.email).order_by(User.id)).scalars())
+
+
+@router.get("/users/directory", response_model=UserDirectoryPage)
+def user_directory(
+    q: Optional[str] = Query(None, description="prefix or substring of email or name"),
+    role: Optional[str] = None,
+    active_since: Optional[datetime] = Query(None, description="last_active >= active_since"),
+    inactive_since: Optional[datetime] = Query(None, description="no activity since this time"),
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    _: User = Depends(get_current_admin),
+    db: Session = Depends(get_db),
+) -> UserDirectoryPage:
+    """Keyset-paginated user search; reads only the listed columns."""
+    stmt = (
+        select(User.id, User.email, User.name, User.role, User.points, User.last_active, User.created_at)
+        .where(User.id > after_id)
+        .order_by(User.id)
+        .limit(limit + 1)
+    )
+    q = (q or "").strip()
+    if q:
+        if len(q) >= 3 and "users_fts" in fts.available:
+            stmt = stmt.where(
+                text("users.id IN (SELECT rowid FROM users_fts WHERE users_fts MATCH :q)")
+                .bindparams(q=fts.match_query(q))
+            )
+        else:
+            # Trigram matching needs 3+ characters; shorter input is a prefix match
+            pattern = fts.like_literal(q) + "%"
+            stmt = stmt.where(or_(User.email.like(pattern, escape="\\"), User.name.like(pattern, escape="\\")))
+    if role:
+        stmt = stmt.where(User.role == role)
+    if active_since is not None:
+        stmt = stmt.where(User.last_active >= active_since)
+    if inactive_since is not None:
+        stmt = stmt.where(or_(User.last_active.is_(None), User.last_active < inactive_since))
+    rows = db.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return UserDirectoryPage(
+        items=[UserDirectoryEntry(**row._mapping) for row in rows],
+        next_after_id=rows[-1].id if has_more else None,
+    )
+
+
+@router.get("/stats/coalescer")
+def coalescer_metrics(_: User = Depends(get_current_admin)) -> dict:
+    return stats.coalescer.metrics()
+
+
+@router.get("/events/consumers")
+def event_consumers(_: User = Depends(get_current_admin)) -> dict:
+    return events.dispatcher.metrics()
+
+
+@router.get("/debug/sql")
+def sql_profiles(
+    route: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    _: User = Depends(get_current_admin),
+) -> list[dict]:
+    """Most recent request SQL profiles, newest first (only with SQL_PROFILE_ENABLED=1)."""
+    if not profiler.SQL_PROFILE_ENABLED:
+        raise HTTPException(status_code=404, detail="SQL profiling is disabled")
+    profiles = [p for p in reversed(profiler.history) if route is None or p.route == route]
+    return [p.as_dict() for p in profiles[:limit]]
+
+
+EXPORT_COLUMNS = [
+    "id", "created_at", "status", "category", "confidence", "co2_saved", "points_awarded", "recycled_at",
+    "user_id", "user_email", "user_name", "center_id", "center_name",
+]
+EXPORT_BATCH_SIZE = 2000
+
+
+def _export_rows(start: Optional[datetime], end: Optional[datetime], status: Optional[str],
+                 center_id: Optional[int], include_archived: bool = True) -> Iterator[list]:
+    """Yield batches of export rows from a dedicated connection, never holding more than one batch."""
+
+    def rows_from(model):
+        stmt = (
+            select(
+                model.id, model.created_at, model.status, model.category, model.confidence, model.co2_saved,
+                model.points_awarded, model.recycled_at, model.user_id, User.email, User.name,
+                model.recycler_id, RecyclerCenter.name,
+            )
+            .join(User, User.id == model.user_id)
+            .outerjoin(RecyclerCenter, RecyclerCenter.id == model.recycler_id)
+        )
+        if start is not None:
+            stmt = stmt.where(model.created_at >= start)
+        if end is not None:
+            stmt = stmt.where(model.created_at < end)
+        if status is not None:
+            stmt = stmt.where(model.status == status)
+        if center_id is not None:
+            stmt = stmt.where(model.recycler_id == center_id)
+        return stmt
+
+    # Archived rows first, then live ones, each streamed in primary-key order. A single
+    # ordered UNION would make SQLite sort the whole export before sending the first row.
+    stmts = [rows_from(Report).order_by(Report.id)]
+    if include_archived:
+        stmts.insert(0, rows_from(ArchivedReport).order_by(ArchivedReport.id))
+    # Read-only connection in WAL mode: writers are not blocked while the export runs
+    with engine.connect() as conn:
+        for stmt in stmts:
+            result = conn.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(stmt)
+            for partition in result.partitions():
+                yield partition
+
+
+def _isoformat(value: object) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _encode_csv(batches: Iterator[list]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buf.getvalue().encode("utf-8")
+    for batch in batches:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(
+            [v.isoformat() if isinstance(v, datetime) else v for v in row] for row in batch
+        )
+        yield buf.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(batches: Iterator[list]) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=_isoformat, separators=(",", ":")) + "\n"
+            for row in batch
+        ).encode("utf-8")
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
 
 
+@router.get("/reports/export")
+def export_reports(
+    format: Literal["csv", "ndjson"] = "csv",
+    compress: Optional[Literal["gzip"]] = None,
+    start: Optional[datetime] = Query(None, description="created_at >= start"),
+    end: Optional[datetime] = Query(None, description="created_at < end"),
+    status: Optional[str] = None,
+    center_id: Optional[int] = None,
+    include_archived: bool = Query(True, description="include reports moved to the archive"),
+    _: User = Depends(get_current_admin),
+) -> StreamingResponse:
+    """Stream reports joined with user and center as CSV or NDJSON with constant memory."""
+    batches = _export_rows(start, end, status, center_id, include_archived)
+    body = _encode_csv(batches) if format == "csv" else _encode_ndjson(batches)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"reports-{datetime.utcnow():%Y%m%d%H%M%S}.{format}"
+    headers = {}
+    if compress == "gzip":
+        body = _gzip(body)
+        media_type = "application/gzip"
+        filename += ".gz"
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(body, media_type=media_type, headers=headers)
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import func
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 
+from core import retention
 from core.db import get_db
 from core.security import decode_token
-from models.models import User, Report, RecyclerCenter
+from models.models import User, Report, RecyclerCenter, ReportRollup
 from schemas.schemas import AnalyticsOverview
 
 router = APIRouter()
@@ -29,6 +30,9 @@ def overview(_: User = Depends(get_current_admin), db: Session = Depends(get_db)
     # Waste by category
     cat_rows = db.query(Report.category, func.count(Report.id)).group_by(Report.category).all()
     by_category = {c: int(n) for c, n in cat_rows}
+    # Archived reports are counted from their rollups (core.retention)
+    for c, n in db.query(ReportRollup.category, func.sum(ReportRollup.reports)).group_by(ReportRollup.category):
+        by_category[c] = by_category.get(c, 0) + int(n)
 
     # Top contributors by points
     users = db.query(User).order_by(User.points.desc()).limit(5).all()
@@ -42,52 +46,56 @@ def overview(_: User = Depends(get_current_admin), db: Session = Depends(get_db)
         .group_by(RecyclerCenter.name)
         .all()
     )
-    center_performance = [{"name": n, "recycled": int(cnt)} for n, cnt in perf_rows]
+    recycled_by_center = {n: int(cnt) for n, cnt in perf_rows}
+    for n, cnt in (
+        db.query(RecyclerCenter.name, func.sum(ReportRollup.reports))
+        .join(ReportRollup, ReportRollup.recycler_id == RecyclerCenter.id)
+        .group_by(RecyclerCenter.name)
+    ):
+        recycled_by_center[n] = recycled_by_center.get(n, 0) + int(cnt)
+    center_performance = [{"name": n, "recycled": cnt} for n, cnt in recycled_by_center.items()]
 
-    # CO2 saved: sum from reports
-    total_co2 = db.query(func.sum(Report.co2_saved)).scalar() or 0.0
-    co2_saved_kg = round(float(total_co2), 1)
-    
-    # Total stats
-    total_reports = db.query(func.count(Report.id)).scalar() or 0
-    total_recycled = db.query(func.count(Report.id)).filter(Report.status == "recycled").scalar() or 0
-    total_users = db.query(func.count(User.id)).scalar() or 0
-    total_centers = db.query(func.count(RecyclerCenter.id)).scalar() or 0
-    
-    # Growth rate (last 30 days vs previous 30 days)
+    # Report totals, recycled count and the 30-day growth window in one scan
     now = datetime.utcnow()
     last_30 = now - timedelta(days=30)
     prev_30 = last_30 - timedelta(days=30)
-    
-    recent_reports = db.query(func.count(Report.id)).filter(Report.created_at >= last_30).scalar() or 0
-    previous_reports = db.query(func.count(Report.id)).filter(
-        Report.created_at >= prev_30, Report.created_at < last_30
-    ).scalar() or 0
-    
+    totals = db.query(
+        func.count(Report.id),
+        func.sum(Report.co2_saved),
+        func.sum(case((Report.status == "recycled", 1), else_=0)),
+        func.sum(case((Report.created_at >= last_30, 1), else_=0)),
+        func.sum(case(((Report.created_at >= prev_30) & (Report.created_at < last_30), 1), else_=0)),
+    ).one()
+    archived, archived_co2, _ = retention.rollup_totals(db)
+    total_reports = int(totals[0] or 0) + archived
+    co2_saved_kg = round(float(totals[1] or 0.0) + archived_co2, 1)
+    total_recycled = int(totals[2] or 0) + archived
+    recent_reports = int(totals[3] or 0)
+    previous_reports = int(totals[4] or 0)
+    total_users = db.query(func.count(User.id)).scalar() or 0
+    total_centers = db.query(func.count(RecyclerCenter.id)).scalar() or 0
+
     growth_rate = ((recent_reports - previous_reports) / previous_reports * 100) if previous_reports > 0 else 0.0
-    
-    # Impact timeline (last 7 days)
+
+    # Impact timeline (last 7 days), grouped by day in a single query
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    day = func.date(Report.created_at)
+    per_day = {
+        d: (n, co2)
+        for d, n, co2 in db.query(day, func.count(Report.id), func.sum(Report.co2_saved))
+        .filter(Report.created_at >= today - timedelta(days=6), Report.created_at < today + timedelta(days=1))
+        .group_by(day)
+        .all()
+    }
     timeline = []
-    for i in range(7):
-        date = now - timedelta(days=i)
-        date_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        date_end = date_start + timedelta(days=1)
-        
-        day_reports = db.query(func.count(Report.id)).filter(
-            Report.created_at >= date_start, Report.created_at < date_end
-        ).scalar() or 0
-        
-        day_co2 = db.query(func.sum(Report.co2_saved)).filter(
-            Report.created_at >= date_start, Report.created_at < date_end
-        ).scalar() or 0.0
-        
+    for i in range(6, -1, -1):
+        date = (today - timedelta(days=i)).date().isoformat()
+        day_reports, day_co2 = per_day.get(date, (0, 0.0))
         timeline.append({
-            "date": date_start.date().isoformat(),
-            "reports": day_reports,
+            "date": date,
+            "reports": int(day_reports),
             "co2": round(float(day_co2 or 0), 1),
         })
-    
-    timeline.reverse()
 
     return AnalyticsOverview(
         by_category=by_category,
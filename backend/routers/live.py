@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, select
+from starlette.concurrency import run_in_threadpool
+
+from core.consumers import report_messages, stats_messages
+from core.db import SessionLocal
+from core.events import Event
+from core.pubsub import center_channel, hub, user_channel
+from core.security import decode_token
+from models.models import RecyclerCenter, ReportEvent, User
+
+router = APIRouter()
+
+LIVE_HEARTBEAT_SECONDS = float(os.environ.get("LIVE_HEARTBEAT_SECONDS", "15"))
+LIVE_REPLAY_LIMIT = int(os.environ.get("LIVE_REPLAY_LIMIT", "500"))
+
+
+def _format(message: dict) -> str:
+    lines = []
+    if message.get("id") is not None:
+        lines.append(f"id: {message['id']}")
+    lines.append(f"event: {message['event']}")
+    lines.append(f"data: {json.dumps(message['data'], separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _resolve_channels(token: str) -> tuple[int, list[int]]:
+    sub = decode_token(token)
+    if sub is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    db = SessionLocal()
+    try:
+        user = db.query(User).get(int(sub))
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        center_ids: list[int] = []
+        if user.role == "recycler":
+            center_ids = list(
+                db.execute(select(RecyclerCenter.id).where(RecyclerCenter.manager_user_id == user.id)).scalars()
+            )
+        return user.id, center_ids
+    finally:
+        db.close()
+
+
+def _replay(user_id: int, center_ids: list[int], last_event_id: Optional[int]) -> tuple[list[dict], bool]:
+    """Messages missed since ``last_event_id`` (from the outbox), plus a fresh stats snapshot."""
+    db = SessionLocal()
+    try:
+        messages: list[dict] = []
+        overflow = False
+        if last_event_id is not None:
+            match = ReportEvent.user_id == user_id
+            if center_ids:
+                match = or_(match, ReportEvent.recycler_id.in_(center_ids))
+            rows = db.execute(
+                select(ReportEvent)
+                .where(ReportEvent.id > last_event_id, match)
+                .order_by(ReportEvent.id)
+                .limit(LIVE_REPLAY_LIMIT + 1)
+            ).scalars().all()
+            overflow = len(rows) > LIVE_REPLAY_LIMIT
+            events = [
+                Event(e.id, e.kind, e.report_id, e.user_id, e.recycler_id, {}, e.created_at)
+                for e in rows[:LIVE_REPLAY_LIMIT]
+            ]
+            # Several events for one report collapse to its latest state
+            latest: dict[int, Event] = {}
+            for e in events:
+                latest[e.report_id] = e
+            if latest:
+                messages = [m for _, m in report_messages(db, sorted(latest.values(), key=lambda e: e.id))]
+        messages += [m for _, m in stats_messages(db, [user_id])]
+        return messages, overflow
+    finally:
+        db.close()
+
+
+@router.get("/stream")
+async def stream(
+    request: Request,
+    token: Optional[str] = Query(None, description="JWT; EventSource cannot send an Authorization header"),
+    last_event_id: Optional[int] = Query(None),
+    authorization: Optional[str] = Header(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """
+    Server-Sent Events stream of report and stats deltas for the caller.
+
+    Users receive updates for their own reports; recyclers also receive every report
+    assigned to a center they manage. Reconnecting clients resume from ``Last-Event-ID``.
+    """
+    if token is None and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    user_id, center_ids = await run_in_threadpool(_resolve_channels, token)
+    if last_event_id is None and last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+    channels = (user_channel(user_id),) + tuple(center_channel(cid) for cid in center_ids)
+
+    async def event_source() -> AsyncIterator[str]:
+        sub = hub.subscribe(channels)
+        try:
+            yield "retry: 3000\n\n"
+            # Subscribed before replaying, so nothing published in between is lost
+            replayed, overflow = await run_in_threadpool(_replay, user_id, center_ids, last_event_id)
+            last_sent = last_event_id or 0
+            if overflow:
+                yield _format({"event": "resync", "data": {"reason": "too many missed events"}})
+            for message in replayed:
+                yield _format(message)
+                last_sent = max(last_sent, message.get("id") or 0)
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), timeout=LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": heartbeat\n\n"
+                    continue
+                message_id = message.get("id")
+                if message_id is not None:
+                    if message_id <= last_sent:
+                        continue
+                    last_sent = message_id
+                yield _format(message)
+        finally:
+            hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,26 +1,55 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 import hashlib
 import json
+import logging
 import os
+import time
 from typing import Tuple, List
 
-import google.generativeai as genai
-
+from core import metrics
 from schemas.schemas import PredictOut
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 DEFAULT_MODEL = os.environ.get("GEMINI_MODEL_NAME", "gemini-1.5-flash-001")
+GEMINI_TIMEOUT_SECONDS = float(os.environ.get("GEMINI_TIMEOUT_SECONDS", "60"))
 _genai_configured = False
-_gemini_models: dict[str, genai.GenerativeModel] = {}
+_gemini_models: dict = {}
 _supported_models: List[str] | None = None
 
 
+def _genai():
+    """
+    The google.generativeai module, imported on first use: it pulls in the
+    gRPC/protobuf stack, which dominates app import time otherwise.
+    """
+    import google.generativeai as genai
+
+    return genai
+
+
+def _request_options() -> dict:
+    """
+    Bound each call, retries included, by GEMINI_TIMEOUT_SECONDS. The client's
+    default retries 503s for up to ten minutes, holding the upload that long.
+    """
+    from google.api_core import exceptions, retry
+
+    return {
+        "timeout": GEMINI_TIMEOUT_SECONDS,
+        "retry": retry.Retry(
+            predicate=retry.if_exception_type(exceptions.ServiceUnavailable),
+            initial=1.0, maximum=10.0, multiplier=1.3, timeout=GEMINI_TIMEOUT_SECONDS,
+        ),
+    }
+
+
 def _get_gemini_model(model_name: str):
     global _gemini_models
     _ensure_genai_configured()
     if model_name not in _gemini_models:
-        _gemini_models[model_name] = genai.GenerativeModel(model_name)
+        _gemini_models[model_name] = _genai().GenerativeModel(model_name)
     return _gemini_models[model_name]
 
 
@@ -47,7 +76,12 @@ def _ensure_genai_configured():
                 status_code=500,
                 detail="Gemini API key is empty. Please check backend/.env file."
             )
-        genai.configure(api_key=api_key)
+        endpoint = os.getenv("GEMINI_API_ENDPOINT")
+        if endpoint:
+            # e.g. the offline stand-in in bench/gemini_standin.py; REST, since gRPC needs TLS
+            _genai().configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+        else:
+            _genai().configure(api_key=api_key)
         _genai_configured = True
 
 
@@ -67,7 +101,7 @@ def _load_supported_models() -> List[str]:
     try:
         _ensure_genai_configured()
         # Try to list models, but if it fails, just use hardcoded models
-        raw_models = genai.list_models()
+        raw_models = _genai().list_models()
         
         # Process the models
         normalized: list[str] = []
@@ -126,13 +160,35 @@ def _candidate_models() -> List[str]:
     return deduped or ["gemini-1.5-flash-001"]
 
 
+def warm_up() -> None:
+    """Import the Gemini client, resolve candidate models and build the first model handle."""
+    try:
+        _get_gemini_model(_candidate_models()[0])
+    except HTTPException as exc:
+        # No API key configured; verification will report it on first use
+        logger.info("Skipping Gemini warm-up: %s", exc.detail)
+
+
+def _response_text(response) -> str:
+    return response.text or "".join(
+        part.text
+        for candidate in response.candidates
+        for part in candidate.content.parts
+        if getattr(part, "text", "")
+    )
+
+
+def _image_mime(mime_type: str | None) -> str:
+    return mime_type if (mime_type and mime_type.startswith("image/")) else "image/jpeg"
+
+
 def detect_ewaste(image_bytes: bytes, mime_type: str | None = None) -> Tuple[bool, str]:
     """
     Use Google Gemini to determine whether the supplied image contains e-waste.
     Returns (is_ewaste, reason). Raises HTTPException if the API response cannot
     be interpreted.
     """
-    resolved_mime = mime_type if (mime_type and mime_type.startswith("image/")) else "image/jpeg"
+    resolved_mime = _image_mime(mime_type)
     prompt = (
         "You are verifying whether the provided photo shows discarded electronic waste. "
         "Classify as ewaste only when there are clear electronic components such as circuit boards, "
@@ -143,6 +199,7 @@ def detect_ewaste(image_bytes: bytes, mime_type: str | None = None) -> Tuple[boo
     )
     last_exc: Exception | None = None
     for model_name in _candidate_models():
+        started = time.perf_counter()
         try:
             model = _get_gemini_model(model_name)
             response = model.generate_content(
@@ -151,30 +208,121 @@ def detect_ewaste(image_bytes: bytes, mime_type: str | None = None) -> Tuple[boo
                     {"mime_type": resolved_mime, "data": image_bytes},
                 ],
                 generation_config={"response_mime_type": "application/json"},
+                request_options=_request_options(),
             )
         except Exception as exc:
+            metrics.GEMINI_CALLS.inc((model_name, "error"))
             last_exc = exc
             continue
+        finally:
+            metrics.GEMINI_LATENCY.observe((model_name,), time.perf_counter() - started)
 
-        content = response.text or "".join(
-            part.text
-            for candidate in response.candidates
-            for part in candidate.content.parts
-            if getattr(part, "text", "")
-        )
         try:
-            payload = json.loads(content)
+            payload = json.loads(_response_text(response))
         except json.JSONDecodeError as exc:
+            metrics.GEMINI_CALLS.inc((model_name, "invalid_json"))
             last_exc = exc
             continue
 
+        metrics.GEMINI_CALLS.inc((model_name, "ok"))
         is_ewaste = bool(payload.get("ewaste"))
         reason = payload.get("reason") or "No reason provided."
+        metrics.EWASTE_VERDICTS.inc(("ewaste" if is_ewaste else "not_ewaste",))
         return is_ewaste, reason
 
+    metrics.EWASTE_VERDICTS.inc(("failed",))
     raise HTTPException(status_code=502, detail=f"Gemini request failed: {last_exc}")
 
 
+BATCH_PROMPT = (
+    "You are verifying whether each of the following numbered photos shows discarded electronic waste. "
+    "Classify an image as ewaste only when there are clear electronic components such as circuit boards, "
+    "batteries, cables, screens, or other electronic devices intended for disposal. "
+    "Judge every image on its own. Respond strictly with a JSON array containing one object per image: "
+    '[{"index": 0, "ewaste": true|false, "reason": "short explanation"}, ...]. '
+    "If you are unsure about an image, respond with ewaste=false for it."
+)
+
+
+def _parse_batch(content: str, count: int) -> dict[int, Tuple[bool, str]]:
+    payload = json.loads(content)
+    if not isinstance(payload, list):
+        raise ValueError("expected a JSON array")
+    results: dict[int, Tuple[bool, str]] = {}
+    for item in payload:
+        if not isinstance(item, dict):
+            continue
+        index = item.get("index")
+        # A verdict that is not a JSON boolean (e.g. the string "false") counts as missing
+        if isinstance(index, int) and 0 <= index < count and isinstance(item.get("ewaste"), bool):
+            results[index] = (item["ewaste"], item.get("reason") or "No reason provided.")
+    return results
+
+
+def _detect_or_error(image: Tuple[bytes, str | None]) -> Tuple[bool, str] | Exception:
+    try:
+        return detect_ewaste(*image)
+    except Exception as exc:
+        return exc
+
+
+def detect_ewaste_batch(
+    images: List[Tuple[bytes, str | None]],
+) -> Tuple[List[Tuple[bool, str] | Exception], int]:
+    """
+    Verify several images in one generateContent call, answered as a JSON array
+    keyed by image index. Images missing from the answer, or the whole batch
+    when it cannot be parsed, fall back to one detect_ewaste call each.
+
+    Returns the verdicts in order, with the exception in place of an image
+    whose verification failed, and the number of calls made: one per model
+    tried for the batch plus one per fallback.
+    """
+    if len(images) == 1:
+        return [_detect_or_error(images[0])], 1
+    parts: list = [BATCH_PROMPT]
+    for index, (image_bytes, mime_type) in enumerate(images):
+        parts.append(f"Image {index}:")
+        parts.append({"mime_type": _image_mime(mime_type), "data": image_bytes})
+    metrics.GEMINI_BATCH_IMAGES.observe((), len(images))
+
+    results: dict[int, Tuple[bool, str]] = {}
+    calls = 0
+    for model_name in _candidate_models():
+        started = time.perf_counter()
+        calls += 1
+        try:
+            response = _get_gemini_model(model_name).generate_content(
+                parts,
+                generation_config={"response_mime_type": "application/json"},
+                request_options=_request_options(),
+            )
+        except Exception:
+            metrics.GEMINI_CALLS.inc((model_name, "error"))
+            continue
+        finally:
+            metrics.GEMINI_LATENCY.observe((model_name,), time.perf_counter() - started)
+        try:
+            results = _parse_batch(_response_text(response), len(images))
+        except ValueError:  # includes JSONDecodeError
+            metrics.GEMINI_CALLS.inc((model_name, "invalid_json"))
+            break
+        metrics.GEMINI_CALLS.inc((model_name, "ok"))
+        break
+
+    out: List[Tuple[bool, str] | Exception] = []
+    for index, image in enumerate(images):
+        if index in results:
+            is_ewaste, reason = results[index]
+            metrics.EWASTE_VERDICTS.inc(("ewaste" if is_ewaste else "not_ewaste",))
+            out.append((is_ewaste, reason))
+        else:
+            metrics.GEMINI_BATCH_FALLBACKS.inc()
+            calls += 1
+            out.append(_detect_or_error(image))
+    return out, calls
+
+
 @router.post("/predict", response_model=PredictOut)
 async def predict(file: UploadFile = File(...)) -> PredictOut:
     # Deterministic pseudo-classification based on filename
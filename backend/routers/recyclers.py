@@ -1,13 +1,18 @@
-from typing import List
+from typing import List, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
+from core import events, listings
 from core.db import get_db
 from core.security import decode_token
 from models.models import RecyclerCenter, User, Report
-from schemas.schemas import RecyclerCenterOut, RecyclerCenterCreate, ReportOut, StatusUpdate
+from schemas.schemas import (
+    RecyclerCenterOut, RecyclerCenterCreate, ReportOut, StatusUpdate, BulkStatusUpdate, BulkStatusResult,
+    BulkStatusOutcome, CompactReportList,
+)
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -24,8 +29,8 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 
 
 @router.get("/centers", response_model=List[RecyclerCenterOut])
-def list_centers(db: Session = Depends(get_db)) -> list[RecyclerCenter]:
-    centers = db.query(RecyclerCenter).all()
+def list_centers(db: Session = Depends(get_db)) -> Response:
+    centers = listings.centers(db)
     # Seed mocks if empty
     if not centers:
         seed = [
@@ -53,8 +58,8 @@ def list_centers(db: Session = Depends(get_db)) -> list[RecyclerCenter]:
         ]
         db.add_all(seed)
         db.commit()
-        centers = db.query(RecyclerCenter).all()
-    return centers
+        centers = listings.centers(db)
+    return listings.FastJSONResponse(list(centers.values()))
 
 
 @router.post("/centers", response_model=RecyclerCenterOut)
@@ -85,56 +90,43 @@ def claim_center(center_id: int, current_user: User = Depends(get_current_user),
     return center
 
 
-@router.get("/assigned", response_model=List[ReportOut])
-def list_assigned(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> list[Report]:
+@router.get("/assigned", response_model=Union[List[ReportOut], CompactReportList])
+def list_assigned(
+    compact: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Response:
+    """
+    Reports assigned to the caller's centers, newest first. ``compact=true``
+    returns centers once in a side map, as for /reports/history.
+    """
     if current_user.role != "recycler":
         raise HTTPException(status_code=403, detail="Recycler only")
-    centers = (
-        db.query(RecyclerCenter)
-        .filter(RecyclerCenter.manager_user_id == current_user.id)
-        .all()
+    center_ids = list(
+        db.execute(select(RecyclerCenter.id).where(RecyclerCenter.manager_user_id == current_user.id)).scalars()
     )
-    if not centers:
-        return []
-    center_ids = [c.id for c in centers]
-    reports = (
-        db.query(Report)
-        .filter(Report.recycler_id.in_(center_ids))
-        .order_by(Report.created_at.desc())
-        .all()
-    )
-    center_lookup = {c.id: c for c in centers}
-    return [
-        ReportOut(
-            id=r.id,
-            image_url=f"/uploads/{r.image_path}",
-            category=r.category,
-            confidence=r.confidence,
-            suggestion=r.suggestion,
-            recycler=center_lookup.get(r.recycler_id),
-            status=r.status,
-            co2_saved=getattr(r, 'co2_saved', 0.0),
-            points_awarded=getattr(r, 'points_awarded', 0),
-            created_at=r.created_at,
-        )
-        for r in reports
-    ]
+    if not center_ids:
+        return listings.FastJSONResponse({"reports": [], "centers": {}} if compact else [])
+    center_lookup = listings.centers(db, center_ids)
+    rows = listings.reports(db, Report.recycler_id.in_(center_ids))
+    return listings.FastJSONResponse(listings.report_payload(rows, center_lookup, compact))
 
 
 @router.post("/assigned/{report_id}/status")
 def update_status(report_id: int, payload: StatusUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> dict:
     if current_user.role != "recycler":
         raise HTTPException(status_code=403, detail="Recycler only")
-    report = db.query(Report).get(report_id)
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    allowed_center_ids = (
-        db.query(RecyclerCenter.id)
-        .filter(RecyclerCenter.manager_user_id == current_user.id)
-        .all()
+    # Report and its center's manager in one round trip
+    row = (
+        db.query(Report, RecyclerCenter.manager_user_id)
+        .outerjoin(RecyclerCenter, RecyclerCenter.id == Report.recycler_id)
+        .filter(Report.id == report_id)
+        .first()
     )
-    allowed_ids = {cid for (cid,) in allowed_center_ids}
-    if report.recycler_id not in allowed_ids:
+    if not row:
+        raise HTTPException(status_code=404, detail="Report not found")
+    report, manager_user_id = row
+    if report.recycler_id is None or manager_user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not assigned to your center")
     if payload.status not in {"received", "recycled"}:
         raise HTTPException(status_code=400, detail="Invalid status")
@@ -143,24 +135,90 @@ def update_status(report_id: int, payload: StatusUpdate, current_user: User = De
     old_status = report.status
     report.status = payload.status
     
-    # If marking as recycled, update stats
     if payload.status == "recycled" and old_status != "recycled":
         report.recycled_at = datetime.utcnow()
-        
-        # Update user stats
-        user = db.query(User).get(report.user_id)
-        if user:
-            user.total_items_recycled += 1
-        
-        # Update center stats
-        center = db.query(RecyclerCenter).get(report.recycler_id)
-        if center:
-            center.total_recycled += 1
-            center.total_co2_saved += report.co2_saved
-            # Update performance score
-            center.performance_score = min(100.0, center.performance_score + 2.0)
     
+    # User/center stats, performance score, achievements and challenges are applied by outbox consumers
+    events.emit(
+        db, "status_changed", report,
+        old_status=old_status, status=report.status, co2_saved=report.co2_saved, category=report.category,
+        recycled_at=report.recycled_at.isoformat() if report.recycled_at else None,
+    )
     db.commit()
+    events.notify()
     return {"ok": True}
 
 
+@router.post("/assigned/status", response_model=BulkStatusResult)
+def bulk_update_status(payload: BulkStatusUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> BulkStatusResult:
+    """Apply one status to many assigned reports in a single transaction, with an outcome per id."""
+    if current_user.role != "recycler":
+        raise HTTPException(status_code=403, detail="Recycler only")
+    if payload.status not in {"received", "recycled"}:
+        raise HTTPException(status_code=400, detail="Invalid status")
+
+    from datetime import datetime
+    report_ids = list(dict.fromkeys(payload.report_ids))
+    # One set-based query for existence and authorization of every id
+    rows = db.execute(
+        select(
+            Report.id, Report.status, Report.user_id, Report.recycler_id, Report.co2_saved, Report.category,
+            RecyclerCenter.manager_user_id,
+        )
+        .outerjoin(RecyclerCenter, RecyclerCenter.id == Report.recycler_id)
+        .where(Report.id.in_(report_ids))
+    ).all()
+    found = {row.id: row for row in rows}
+
+    now = datetime.utcnow()
+    # Allowed ids that need a change, grouped by the status they were read with
+    pending: dict[str, list[int]] = {}
+    for rid in report_ids:
+        row = found.get(rid)
+        if row is not None and row.manager_user_id == current_user.id and row.status != payload.status:
+            pending.setdefault(row.status, []).append(rid)
+
+    # The read above is taken before the write lock, so each UPDATE only touches rows still in the
+    # status that was read; a concurrent call that got there first changes nothing here and emits
+    # no event. The first UPDATE takes the write lock, so later groups cannot race.
+    reports = Report.__table__
+    values = {"status": payload.status}
+    if payload.status == "recycled":
+        values["recycled_at"] = now
+    changed: set[int] = set()
+    for old_status, ids in pending.items():
+        changed.update(db.execute(
+            update(reports)
+            .where(reports.c.id.in_(ids), reports.c.status == old_status, reports.c.status != payload.status)
+            .values(**values)
+            .returning(reports.c.id)
+        ).scalars())
+
+    results: list[BulkStatusOutcome] = []
+    outbox = []
+    for rid in report_ids:
+        row = found.get(rid)
+        if row is None:
+            results.append(BulkStatusOutcome(id=rid, ok=False, error="not_found"))
+        elif row.manager_user_id != current_user.id:
+            results.append(BulkStatusOutcome(id=rid, ok=False, error="not_assigned"))
+        elif row.status == payload.status:
+            results.append(BulkStatusOutcome(id=rid, ok=True, status=payload.status))
+        elif rid not in changed:
+            results.append(BulkStatusOutcome(id=rid, ok=False, error="conflict"))
+        else:
+            outbox.append((
+                "status_changed", rid, row.user_id, row.recycler_id,
+                {"old_status": row.status, "status": payload.status, "co2_saved": row.co2_saved,
+                 "category": row.category, "recycled_at": now.isoformat() if "recycled_at" in values else None},
+            ))
+            results.append(BulkStatusOutcome(id=rid, ok=True, status=payload.status))
+
+    if changed:
+        # Stats consumers aggregate the per-user and per-center deltas for the whole batch
+        events.emit_many(db, outbox)
+        db.commit()
+        events.notify()
+    else:
+        db.rollback()
+    return BulkStatusResult(updated=len(changed), results=results)
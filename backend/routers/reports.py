@@ -1,26 +1,24 @@
-from typing import List, Annotated, Optional
+from typing import List, Annotated, Optional, Union
 import hashlib
+from functools import partial
 from pathlib import Path
-from datetime import datetime
 from io import BytesIO
 
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Header, HTTPException, Response
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from PIL import Image
+from starlette.concurrency import run_in_threadpool
 
+from core import admission, events, idempotency, listings, metrics, prefilter, storage, verifier
 from core.db import get_db
 from core.security import decode_token
 from models.models import User, Report, RecyclerCenter
-from schemas.schemas import ReportOut, ReportCreate
+from schemas.schemas import CompactReportList, ReportOut, ReportCreate
 from routers.ml import detect_ewaste
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-UPLOAD_DIR = Path("uploads")
-
-
 def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)) -> User:
     sub = decode_token(token)
     if sub is None:
@@ -50,27 +48,60 @@ def deterministic_predict(filename: str) -> tuple[str, float, str]:
 async def create_report(
     file: UploadFile = File(...),
     recycler_id: Optional[int] = Form(None),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
-) -> ReportOut:
-    # Save image
-    suffix = Path(file.filename).suffix or ".jpg"
-    safe_name = f"{current_user.id}_{hashlib.md5(file.filename.encode()).hexdigest()}{suffix}"
-    dest = UPLOAD_DIR / safe_name
+):
+    # Shed before the spooled upload is loaded into memory or an idempotency key is claimed;
+    # raises 429 with Retry-After
+    admission.uploads.admit(current_user.id)
     data = await file.read()
-    dest.write_bytes(data)
-    # Verify image loadable (basic)
+    handler = partial(create_report_from_image, data, file.filename, file.content_type, recycler_id, current_user, db)
+    if idempotency_key is None:
+        return await handler()
+    # Retries of the same upload replay the first outcome instead of verifying and awarding again.
+    # The filename is part of the request: it picks the category and points (deterministic_predict).
+    fp = idempotency.fingerprint(data, file.filename, file.content_type, str(recycler_id))
+    return await idempotency.run(current_user.id, idempotency_key, fp, handler)
+
+
+async def create_report_from_image(
+    data: bytes,
+    filename: str,
+    content_type: Optional[str],
+    recycler_id: Optional[int],
+    current_user: User,
+    db: Session,
+) -> ReportOut:
+    # Callers have already admitted the upload (admission.uploads)
+    metrics.IMAGE_BYTES.inc(("report",), len(data))
+    # Content-addressed name: a stored file never changes, so it can be served as immutable
+    suffix = (Path(filename).suffix or ".jpg").lower()
+    safe_name = f"{current_user.id}_{hashlib.sha256(data).hexdigest()}{suffix}"
+    # Verify image loadable (basic); Pillow is only needed here, so it loads on the first upload
+    from PIL import Image
+
     try:
         with Image.open(BytesIO(data)) as img:
             img.verify()
     except Exception:
-        dest.unlink(missing_ok=True)
         raise HTTPException(status_code=400, detail="Invalid image")
-    
-    # Check if image contains e-waste
-    has_ewaste, reason = detect_ewaste(data, file.content_type)
+
+    # Obvious non-photos (icons, blank frames, flat fills, heavy blur) never reach Gemini
+    try:
+        rejected = await run_in_threadpool(prefilter.check, data)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid image")
+    if rejected:
+        raise HTTPException(status_code=400, detail=f"Image rejected: {rejected}")
+
+    # Check if image contains e-waste; Gemini calls are paced per user and run off the event loop
+    async with admission.gemini.slot(current_user.id):
+        if verifier.batcher.enabled:
+            has_ewaste, reason = await verifier.batcher.verify(data, content_type)
+        else:
+            has_ewaste, reason = await run_in_threadpool(detect_ewaste, data, content_type)
     if not has_ewaste:
-        dest.unlink(missing_ok=True)
         raise HTTPException(
             status_code=400,
             detail=(
@@ -80,14 +111,15 @@ async def create_report(
             ),
         )
 
+    # Written only once the image is accepted; identical content already stored is reused
+    if not await run_in_threadpool(storage.backend.exists, safe_name):
+        await run_in_threadpool(storage.backend.save, safe_name, data)
+
     # Predict
-    category, confidence, suggestion = deterministic_predict(file.filename)
+    category, confidence, suggestion = deterministic_predict(filename)
 
-    assigned_id = None
-    if recycler_id:
-        center = db.query(RecyclerCenter).get(recycler_id)
-        if center:
-            assigned_id = center.id
+    center = db.query(RecyclerCenter).get(recycler_id) if recycler_id else None
+    assigned_id = center.id if center else None
 
     # Calculate CO2 saved (1.2 kg per item, varies by category)
     co2_by_category = {
@@ -102,11 +134,6 @@ async def create_report(
     # Calculate points (base 10 + bonus for confidence)
     points = 10 + int(confidence * 10)
     
-    # Update user level (100 points per level)
-    new_level = (current_user.points + points) // 100 + 1
-    if new_level > current_user.level:
-        current_user.level = new_level
-    
     report = Report(
         user_id=current_user.id,
         image_path=safe_name,
@@ -119,49 +146,43 @@ async def create_report(
         points_awarded=points,
     )
     
-    # Update user stats
-    current_user.points += points
-    current_user.total_co2_saved += co2_saved
-    current_user.last_active = datetime.utcnow()
-    
     db.add(report)
-    db.commit()
-    db.refresh(report)
-    recycler = db.query(RecyclerCenter).get(report.recycler_id) if report.recycler_id else None
-    return ReportOut(
+    db.flush()
+    # User stats, achievements and challenges are applied by outbox consumers (core.consumers)
+    events.emit(
+        db, "created", report,
+        points=points, co2_saved=co2_saved, category=category, created_at=report.created_at.isoformat(),
+    )
+    # Built before commit, while the flushed report and its center are still loaded (commit expires them)
+    out = ReportOut(
         id=report.id,
-        image_url=f"/uploads/{report.image_path}",
+        image_url=storage.image_url(report.image_path),
         category=report.category,
         confidence=report.confidence,
         suggestion=report.suggestion,
-        recycler=recycler,
+        recycler=center,
         status=report.status,
         co2_saved=report.co2_saved,
         points_awarded=report.points_awarded,
         created_at=report.created_at,
     )
+    db.commit()
+    events.notify()
+    return out
 
 
-@router.get("/history", response_model=List[ReportOut])
-def history(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> list[ReportOut]:
-    reports = db.query(Report).filter(Report.user_id == current_user.id).order_by(Report.created_at.desc()).all()
-    out: list[ReportOut] = []
-    for r in reports:
-        center = db.query(RecyclerCenter).get(r.recycler_id) if r.recycler_id else None
-        out.append(
-            ReportOut(
-                id=r.id,
-                image_url=f"/uploads/{r.image_path}",
-                category=r.category,
-                confidence=r.confidence,
-                suggestion=r.suggestion,
-                recycler=center,
-                status=r.status,
-                co2_saved=r.co2_saved,
-                points_awarded=r.points_awarded,
-                created_at=r.created_at,
-            )
-        )
-    return out
+@router.get("/history", response_model=Union[List[ReportOut], CompactReportList])
+def history(
+    compact: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Response:
+    """
+    The caller's reports, newest first. With ``compact=true`` the body is
+    {"reports": [...], "centers": {id: center}} and reports carry `recycler_id`.
+    """
+    rows = listings.reports(db, Report.user_id == current_user.id)
+    center_lookup = listings.centers(db, {r.recycler_id for r in rows if r.recycler_id})
+    return listings.FastJSONResponse(listings.report_payload(rows, center_lookup, compact))
 
 
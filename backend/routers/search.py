@@ -0,0 +1,133 @@
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import bindparam, or_, select, text
+from sqlalchemy.orm import Session
+
+from core import fts, storage
+from core.db import get_db
+from core.security import decode_token
+from models.models import User, Report, RecyclerCenter
+from schemas.schemas import SearchResults, ReportSearchHit, CenterSearchHit
+
+router = APIRouter()
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+
+
+def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)) -> User:
+    sub = decode_token(token)
+    if sub is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    user = db.query(User).get(int(sub))
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+
+def _report_scope(user: User, db: Session) -> tuple[str, dict]:
+    """SQL filter limiting reports to what ``user`` may see: all (admin), own centers (recycler), own reports."""
+    if user.role == "admin":
+        return "", {}
+    if user.role == "recycler":
+        center_ids = list(
+            db.execute(select(RecyclerCenter.id).where(RecyclerCenter.manager_user_id == user.id)).scalars()
+        )
+        return " AND r.recycler_id IN :center_ids", {"center_ids": center_ids or [-1]}
+    return " AND r.user_id = :user_id", {"user_id": user.id}
+
+
+def _search_reports(db: Session, user: User, q: str, limit: int, offset: int) -> list[ReportSearchHit]:
+    scope_sql, params = _report_scope(user, db)
+    if "reports_fts" in fts.available:
+        sql = (
+            "SELECT r.id, r.category, r.suggestion, r.status, r.image_path, r.recycler_id, r.created_at, "
+            "snippet(reports_fts, 1, '[', ']', '...', 10) AS snippet, bm25(reports_fts) AS rank "
+            "FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid "
+            "WHERE reports_fts MATCH :q" + scope_sql + " ORDER BY rank LIMIT :limit OFFSET :offset"
+        )
+        stmt = text(sql)
+        if "center_ids" in params:
+            stmt = stmt.bindparams(bindparam("center_ids", expanding=True))
+        rows = db.execute(stmt, {"q": fts.prefix_terms(q), "limit": limit, "offset": offset, **params}).all()
+        return [
+            ReportSearchHit(
+                id=r.id, category=r.category, suggestion=r.suggestion, status=r.status,
+                image_url=storage.image_url(r.image_path), recycler_id=r.recycler_id,
+                created_at=r.created_at, snippet=r.snippet, rank=r.rank,
+            )
+            for r in rows
+        ]
+    # No FTS5 in this SQLite build: unranked substring scan
+    pattern = f"%{fts.like_literal(q)}%"
+    stmt = select(Report).where(
+        or_(Report.category.like(pattern, escape="\\"), Report.suggestion.like(pattern, escape="\\"))
+    )
+    if "center_ids" in params:
+        stmt = stmt.where(Report.recycler_id.in_(params["center_ids"]))
+    elif "user_id" in params:
+        stmt = stmt.where(Report.user_id == params["user_id"])
+    rows = db.execute(stmt.order_by(Report.id.desc()).limit(limit).offset(offset)).scalars()
+    return [
+        ReportSearchHit(
+            id=r.id, category=r.category, suggestion=r.suggestion, status=r.status,
+            image_url=storage.image_url(r.image_path), recycler_id=r.recycler_id, created_at=r.created_at, rank=0.0,
+        )
+        for r in rows
+    ]
+
+
+def _search_centers(db: Session, q: str, limit: int, offset: int) -> list[CenterSearchHit]:
+    if "centers_fts" in fts.available:
+        rows = db.execute(
+            text(
+                "SELECT c.id, c.name, c.description, c.latitude, c.longitude, c.approved, "
+                "snippet(centers_fts, 1, '[', ']', '...', 10) AS snippet, bm25(centers_fts) AS rank "
+                "FROM centers_fts JOIN recycler_centers c ON c.id = centers_fts.rowid "
+                "WHERE centers_fts MATCH :q ORDER BY rank LIMIT :limit OFFSET :offset"
+            ),
+            {"q": fts.prefix_terms(q), "limit": limit, "offset": offset},
+        ).all()
+        return [CenterSearchHit(**row._mapping) for row in rows]
+    pattern = f"%{fts.like_literal(q)}%"
+    rows = db.execute(
+        select(RecyclerCenter)
+        .where(or_(
+            RecyclerCenter.name.like(pattern, escape="\\"), RecyclerCenter.description.like(pattern, escape="\\"),
+        ))
+        .order_by(RecyclerCenter.id)
+        .limit(limit)
+        .offset(offset)
+    ).scalars()
+    return [
+        CenterSearchHit(
+            id=c.id, name=c.name, description=c.description, latitude=c.latitude, longitude=c.longitude,
+            approved=c.approved, rank=0.0,
+        )
+        for c in rows
+    ]
+
+
+@router.get("", response_model=SearchResults)
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    scope: Literal["all", "reports", "centers"] = "all",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> SearchResults:
+    """
+    Ranked full-text search over report category/suggestion and center name/description.
+    Report hits are limited to what the caller may see.
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Empty query")
+    reports: list[ReportSearchHit] = []
+    centers: list[CenterSearchHit] = []
+    if scope in ("all", "reports"):
+        reports = _search_reports(db, current_user, q, limit, offset)
+    if scope in ("all", "centers"):
+        centers = _search_centers(db, q, limit, offset)
+    return SearchResults(reports=reports, centers=centers)
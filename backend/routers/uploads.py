@@ -0,0 +1,122 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from core import admission, idempotency, upload_sessions
+from core.db import get_db
+from core.security import decode_token
+from models.models import User
+from routers.reports import create_report_from_image
+from schemas.schemas import ReportOut, UploadSessionComplete, UploadSessionCreate, UploadSessionOut
+
+router = APIRouter()
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+
+
+def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)) -> User:
+    sub = decode_token(token)
+    if sub is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    user = db.query(User).get(int(sub))
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+
+def _out(session: upload_sessions.UploadSession) -> UploadSessionOut:
+    return UploadSessionOut(
+        id=session.id,
+        filename=session.filename,
+        content_type=session.content_type,
+        size=session.size,
+        offset=session.offset,
+        expires_at=session.expires_at,
+    )
+
+
+def _offset_headers(session: upload_sessions.UploadSession, offset: Optional[int] = None) -> dict:
+    return {
+        "Upload-Offset": str(session.offset if offset is None else offset),
+        "Upload-Length": str(session.size),
+        "Upload-Expires": session.expires_at.strftime("%a, %d %b %Y %H:%M:%S GMT"),
+        "Cache-Control": "no-store",
+    }
+
+
+@router.post("", response_model=UploadSessionOut, status_code=201)
+def create_session(
+    payload: UploadSessionCreate,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+) -> UploadSessionOut:
+    session = upload_sessions.create(current_user.id, payload.filename, payload.content_type, payload.size)
+    response.headers["Location"] = f"/upload-sessions/{session.id}"
+    response.headers.update(_offset_headers(session, 0))
+    return _out(session)
+
+
+@router.head("/{session_id}")
+def session_offset(session_id: str, current_user: User = Depends(get_current_user)) -> Response:
+    session = upload_sessions.get(session_id, current_user.id)
+    return Response(status_code=200, headers=_offset_headers(session))
+
+
+@router.get("/{session_id}", response_model=UploadSessionOut)
+def get_session(session_id: str, current_user: User = Depends(get_current_user)) -> UploadSessionOut:
+    return _out(upload_sessions.get(session_id, current_user.id))
+
+
+@router.patch("/{session_id}", status_code=204)
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    current_user: User = Depends(get_current_user),
+) -> Response:
+    """Append the raw request body at Upload-Offset; a 409 carries the offset to resume from."""
+    session = upload_sessions.get(session_id, current_user.id)
+    offset = await upload_sessions.append(session, upload_offset, request.stream())
+    return Response(status_code=204, headers=_offset_headers(session, offset))
+
+
+@router.post("/{session_id}/complete", response_model=ReportOut)
+async def complete_session(
+    session_id: str,
+    payload: UploadSessionComplete,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Create a report from the finished upload, as POST /reports/create would. The
+    session is consumed on success; send an Idempotency-Key to make retries safe.
+    """
+    # Shed before the upload is read back or an idempotency key is claimed, as POST /reports/create does
+    admission.uploads.admit(current_user.id)
+
+    async def handler() -> ReportOut:
+        session = upload_sessions.get(session_id, current_user.id)
+        if not session.complete:
+            raise HTTPException(status_code=409, detail="Upload is not complete", headers=_offset_headers(session))
+        # Up to UPLOAD_MAX_BYTES of file I/O: keep it off the event loop
+        data = await run_in_threadpool(upload_sessions.read, session)
+        out = await create_report_from_image(
+            data, session.filename, session.content_type, payload.recycler_id, current_user, db,
+        )
+        await run_in_threadpool(upload_sessions.delete, session)
+        return out
+
+    if idempotency_key is None:
+        return await handler()
+    # Keyed on the session rather than its bytes, so a retry still replays after the session is gone
+    fp = idempotency.fingerprint(session_id, str(payload.recycler_id))
+    return await idempotency.run(current_user.id, idempotency_key, fp, handler)
+
+
+@router.delete("/{session_id}", status_code=204)
+def delete_session(session_id: str, current_user: User = Depends(get_current_user)) -> Response:
+    upload_sessions.delete(upload_sessions.get(session_id, current_user.id))
+    return Response(status_code=204)
@@ -1,14 +1,17 @@
-from typing import Annotated, Optional
+from datetime import datetime
+from typing import Annotated, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from core import retention
+from core.challenges import progress_percentage
 from core.db import get_db
 from core.security import decode_token
-from models.models import User, Report
-from schemas.schemas import UserOut
+from models.models import User, Report, Challenge, ReportRollup
+from schemas.schemas import UserOut, ChallengeOut
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -35,6 +38,10 @@ def user_stats(current_user: User = Depends(get_current_user), db: Session = Dep
     recycled_count = db.query(func.count(Report.id)).filter(
         Report.user_id == current_user.id, Report.status == "recycled"
     ).scalar() or 0
+    # Archived reports are all recycled
+    archived, _, _ = retention.rollup_totals(db, ReportRollup.user_id == current_user.id)
+    total_reports += archived
+    recycled_count += archived
     co2_saved = round(total_reports * 1.2, 1)
     return {
         "points": current_user.points,
@@ -44,3 +51,27 @@ def user_stats(current_user: User = Depends(get_current_user), db: Session = Dep
     }
 
 
+@router.get("/challenges", response_model=List[ChallengeOut])
+def active_challenges(_: User = Depends(get_current_user), db: Session = Depends(get_db)) -> list[ChallengeOut]:
+    now = datetime.utcnow()
+    rows = (
+        db.query(Challenge)
+        .filter(Challenge.is_active.is_(True), Challenge.end_date >= now)
+        .order_by(Challenge.end_date)
+        .all()
+    )
+    return [
+        ChallengeOut(
+            id=c.id,
+            title=c.title,
+            description=c.description,
+            target=c.target,
+            current_progress=c.current_progress,
+            start_date=c.start_date,
+            end_date=c.end_date,
+            is_active=c.is_active,
+            reward_points=c.reward_points,
+            progress_percentage=progress_percentage(c.current_progress, c.target),
+        )
+        for c in rows
+    ]
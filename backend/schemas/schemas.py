@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -34,6 +34,21 @@ class UserOut(UserBase):
         from_attributes = True
 
 
+class UserDirectoryEntry(BaseModel):
+    id: int
+    email: str
+    name: Optional[str] = None
+    role: str
+    points: int
+    last_active: Optional[datetime] = None
+    created_at: datetime
+
+
+class UserDirectoryPage(BaseModel):
+    items: List[UserDirectoryEntry]
+    next_after_id: Optional[int] = None  # pass as after_id to fetch the next page
+
+
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
@@ -90,10 +105,66 @@ class ReportOut(BaseModel):
         from_attributes = True
 
 
+class ReportCompactOut(BaseModel):
+    """ReportOut with the center referenced by id; see CompactReportList."""
+    id: int
+    image_url: str
+    category: str
+    confidence: float
+    suggestion: Optional[str]
+    recycler_id: Optional[int]
+    status: str
+    co2_saved: float
+    points_awarded: int
+    created_at: datetime
+
+
+class CompactReportList(BaseModel):
+    """Report lists with ``compact=true``: each referenced center appears once, keyed by id."""
+    reports: List[ReportCompactOut]
+    centers: Dict[int, RecyclerCenterOut]
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(min_length=1, max_length=255)
+    content_type: Optional[str] = None
+    size: int = Field(gt=0)
+
+
+class UploadSessionOut(BaseModel):
+    id: str
+    filename: str
+    content_type: Optional[str] = None
+    size: int
+    offset: int
+    expires_at: datetime
+
+
+class UploadSessionComplete(BaseModel):
+    recycler_id: Optional[int] = None
+
+
 class StatusUpdate(BaseModel):
     status: str  # received | recycled
 
 
+class BulkStatusUpdate(BaseModel):
+    report_ids: List[int] = Field(min_length=1, max_length=1000)
+    status: str  # received | recycled
+
+
+class BulkStatusOutcome(BaseModel):
+    id: int
+    ok: bool
+    status: Optional[str] = None
+    error: Optional[str] = None  # not_found | not_assigned | conflict
+
+
+class BulkStatusResult(BaseModel):
+    updated: int
+    results: List[BulkStatusOutcome]
+
+
 class AnalyticsOverview(BaseModel):
     by_category: dict
     top_contributors: List[dict]
@@ -154,3 +225,31 @@ class ImpactStats(BaseModel):
     rank: int
     next_level_points: int
     achievements_count: int
+
+
+class ReportSearchHit(BaseModel):
+    id: int
+    category: str
+    suggestion: Optional[str]
+    status: str
+    image_url: str
+    recycler_id: Optional[int]
+    created_at: datetime
+    snippet: Optional[str] = None
+    rank: float
+
+
+class CenterSearchHit(BaseModel):
+    id: int
+    name: str
+    description: Optional[str]
+    latitude: float
+    longitude: float
+    approved: bool
+    snippet: Optional[str] = None
+    rank: float
+
+
+class SearchResults(BaseModel):
+    reports: List[ReportSearchHit]
+    centers: List[CenterSearchHit]
@@ -0,0 +1,49 @@
+"""
+Move recycled reports older than the retention age into the archive table,
+update the rollups and move their images to the cold tier (see core/retention.py).
+Safe to run repeatedly, e.g. nightly from cron.
+
+Usage (from the backend directory):
+    python -m scripts.archive_reports [--days 365] [--batch-size 500] [--keep-images] [--dry-run]
+"""
+import argparse
+import logging
+
+from core import retention
+from core.db import SessionLocal, init_db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=retention.REPORT_RETENTION_DAYS,
+                        help=f"archive reports recycled more than this many days ago (min {retention.MIN_RETENTION_DAYS})")
+    parser.add_argument("--batch-size", type=int, default=retention.RETENTION_BATCH_SIZE,
+                        help="reports moved per transaction")
+    parser.add_argument("--keep-images", action="store_true", help="archive rows but leave images untouched")
+    parser.add_argument("--dry-run", action="store_true", help="only count eligible reports")
+    args = parser.parse_args()
+    if args.days < retention.MIN_RETENTION_DAYS:
+        parser.error(f"--days must be at least {retention.MIN_RETENTION_DAYS}")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    init_db()
+    db = SessionLocal()
+    try:
+        result = retention.archive(
+            db, older_than_days=args.days, batch_size=args.batch_size,
+            cold_images=not args.keep_images, dry_run=args.dry_run,
+        )
+    finally:
+        db.close()
+    if args.dry_run:
+        print(f"{result['eligible']} reports eligible for archiving")
+        return
+    print(
+        f"Archived {result['archived']} reports; {result['images_recompressed']} cold images written, "
+        f"{result['images_deleted']} originals removed "
+        f"({result['image_bytes_before']} -> {result['image_bytes_after']} bytes re-encoded)"
+    )
+
+
+if __name__ == "__main__":
+    main()
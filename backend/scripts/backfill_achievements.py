@@ -0,0 +1,28 @@
+"""
+Award achievements to existing users whose stats already satisfy them.
+
+Usage (from the backend directory):
+    python -m scripts.backfill_achievements [--batch-size 500]
+"""
+import argparse
+
+from core.achievements import backfill
+from core.db import SessionLocal, init_db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="users evaluated per transaction")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        awarded = backfill(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Awarded {awarded} achievements")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Generate a synthetic dataset for scale and benchmark testing.
+
+Users, recycler centers (each with a recycler manager), reports, achievements
+and challenges are bulk-inserted in batches. Report activity is skewed towards
+a minority of heavy users and towards recent dates; older assigned reports are
+more likely to have been recycled. User and center totals are derived from the
+generated reports, so the data is consistent with what the app would have
+produced. The same --seed against an empty database yields the same data.
+
+All generated accounts share the password given by --password. Search indexes
+are dropped during the load and rebuilt once at the end.
+
+Usage (from the backend directory):
+    python -m scripts.generate_data --users 100000 --centers 500 --reports 10000000
+    python -m scripts.generate_data --reports 50000 --images 20 --award-achievements
+"""
+import argparse
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, insert, select, text, update
+
+from core import achievements, challenges, fts
+from core.db import SessionLocal, engine, init_db
+from core.security import get_password_hash
+from models.models import Achievement, Challenge, RecyclerCenter, Report, User
+
+# (category, suggestion, kg CO2 saved, share of reports) -- mirrors routers.reports
+CATEGORIES = [
+    ("Battery", "Take to a recycling center; avoid general trash.", 2.5, 0.30),
+    ("Circuit Board", "Handle carefully; recycle at e-waste facility.", 1.8, 0.20),
+    ("Plastic Casing", "Separate and recycle if local rules allow.", 0.8, 0.25),
+    ("Metal Scrap", "Can be melted and reused; recycle.", 1.5, 0.15),
+    ("Display Panel", "Contains hazardous materials; recycle safely.", 3.0, 0.10),
+]
+FIRST_NAMES = ["Asha", "Ben", "Chen", "Divya", "Elena", "Farid", "Grace", "Hiro", "Isha", "Jonas", "Kofi", "Lena"]
+LAST_NAMES = ["Rao", "Smith", "Li", "Garcia", "Okafor", "Müller", "Tanaka", "Silva", "Khan", "Novak"]
+CITIES = [
+    ("Bengaluru", 12.97, 77.59), ("Mumbai", 19.08, 72.88), ("Delhi", 28.61, 77.21),
+    ("Chennai", 13.08, 80.27), ("Hyderabad", 17.39, 78.49), ("Pune", 18.52, 73.86),
+]
+ACHIEVEMENTS = [
+    ("First Report", "Submit your first e-waste report", "📸", "bronze", {"reports": 1}, 10),
+    ("Regular Recycler", "Submit 10 reports", "♻️", "silver", {"reports": 10}, 50),
+    ("E-Waste Champion", "Submit 50 reports", "🏆", "gold", {"reports": 50}, 200),
+    ("Carbon Cutter", "Save 25 kg of CO2", "🌱", "silver", {"metric": "co2_saved", "gte": 25}, 50),
+    ("Closed Loop", "Have 20 items recycled", "🔁", "gold", {"items_recycled": 20}, 100),
+    ("Week Streak", "Report on 7 consecutive days", "🔥", "gold", {"streak_days": 7}, 100),
+    ("Level 10", "Reach level 10", "⭐", "platinum", {"level": 10}, 0),
+]
+
+# SQLAlchemy's SQLite DateTime storage format, so generated rows compare and parse like ORM-written ones
+_DT_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _dt(value: datetime) -> str:
+    return value.strftime(_DT_FORMAT)
+
+
+def _next_id(db, model) -> int:
+    return (db.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _cum_weights(n: int, rng: random.Random, shape: float) -> list[float]:
+    """Cumulative Pareto weights: a few entities account for most activity."""
+    total = 0.0
+    out = []
+    for _ in range(n):
+        total += rng.paretovariate(shape)
+        out.append(total)
+    return out
+
+
+def _placeholder_images(count: int, rng: random.Random) -> list[str]:
+    from PIL import Image
+
+    from core import storage
+
+    names = []
+    for i in range(count):
+        name = f"synthetic_{i:04d}.jpg"
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        buf = io.BytesIO()
+        Image.new("RGB", (320, 240), color).save(buf, "JPEG", quality=70)
+        storage.backend.save(name, buf.getvalue())
+        names.append(name)
+    return names
+
+
+class Generator:
+    def __init__(self, db, args: argparse.Namespace) -> None:
+        self.db = db
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.start = self.now - timedelta(days=args.days)
+        self.user_ids: list[int] = []
+        self.center_ids: list[int] = []
+
+    def _random_time(self, skew: float = 2.0) -> datetime:
+        # Density grows towards the present: activity ramps up over the window
+        age = self.args.days * 86400 * (self.rng.random() ** skew)
+        return self.now - timedelta(seconds=age)
+
+    def _insert(self, table, rows: list[dict]) -> None:
+        if rows:
+            self.db.connection().execute(insert(table), rows)
+
+    def users(self) -> None:
+        rng = self.rng
+        hashed = get_password_hash(self.args.password)
+        first = _next_id(self.db, User)
+        tag = f"s{self.args.seed}"
+        batch = []
+        for uid in range(first, first + self.args.users):
+            batch.append({
+                "id": uid,
+                "email": f"user{uid}.{tag}@example.com",
+                "hashed_password": hashed,
+                "role": "user",
+                "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "points": 0, "level": 1, "total_co2_saved": 0.0, "total_items_recycled": 0,
+                "created_at": self.start + timedelta(seconds=rng.randrange(self.args.days * 86400)),
+            })
+            if len(batch) >= self.args.batch_size:
+                self._insert(User.__table__, batch)
+                batch.clear()
+        self._insert(User.__table__, batch)
+        self.user_ids = list(range(first, first + self.args.users))
+        self.db.commit()
+
+    def centers(self) -> None:
+        rng = self.rng
+        hashed = get_password_hash(self.args.password)
+        first_user = _next_id(self.db, User)
+        first_center = _next_id(self.db, RecyclerCenter)
+        tag = f"s{self.args.seed}"
+        managers, centers = [], []
+        for i in range(self.args.centers):
+            uid, cid = first_user + i, first_center + i
+            city, lat, lon = rng.choice(CITIES)
+            managers.append({
+                "id": uid, "email": f"recycler{uid}.{tag}@example.com", "hashed_password": hashed,
+                "role": "recycler", "name": f"{city} Recycler {i + 1}", "points": 0, "level": 1,
+                "total_co2_saved": 0.0, "total_items_recycled": 0, "created_at": self.start,
+            })
+            centers.append({
+                "id": cid, "name": f"{city} E-Waste Center {i + 1}",
+                "latitude": round(lat + rng.uniform(-0.2, 0.2), 6),
+                "longitude": round(lon + rng.uniform(-0.2, 0.2), 6),
+                "approved": rng.random() < 0.9, "performance_score": 0.0, "manager_user_id": uid,
+                "total_recycled": 0, "total_co2_saved": 0.0, "rating": round(rng.uniform(3.0, 5.0), 1),
+                "description": f"Collection point for batteries, boards and displays in {city}.",
+                "contact_info": f"+91-{rng.randrange(10**9, 10**10)}",
+            })
+        for start in range(0, len(centers), self.args.batch_size):
+            self._insert(User.__table__, managers[start:start + self.args.batch_size])
+            self._insert(RecyclerCenter.__table__, centers[start:start + self.args.batch_size])
+        self.center_ids = [c["id"] for c in centers if c["approved"]]
+        self.db.commit()
+
+    def reports(self, images: list[str]) -> None:
+        """
+        Reports go through the DB-API executemany with positional rows: at tens of
+        millions of rows the per-row overhead of dict parameters dominates.
+        """
+        args, rng = self.args, self.rng
+        if not self.user_ids:
+            raise SystemExit("No users to attach reports to; use --users > 0")
+        user_weights = _cum_weights(len(self.user_ids), rng, shape=1.2)
+        center_weights = _cum_weights(len(self.center_ids), rng, shape=2.0) if self.center_ids else None
+        cat_weights = []
+        acc = 0.0
+        for c in CATEGORIES:
+            acc += c[3]
+            cat_weights.append(acc)
+
+        n_users = len(self.user_ids)
+        user_index = {uid: i for i, uid in enumerate(self.user_ids)}
+        u_points = [0] * n_users
+        u_co2 = [0.0] * n_users
+        u_recycled = [0] * n_users
+        u_last = [None] * n_users
+        c_recycled: dict[int, int] = {}
+        c_co2: dict[int, float] = {}
+
+        columns = [
+            "id", "user_id", "image_path", "category", "confidence", "suggestion", "recycler_id",
+            "status", "co2_saved", "points_awarded", "created_at", "recycled_at",
+        ]
+        sql = f"INSERT INTO reports ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        next_id = _next_id(self.db, Report)
+        total = args.reports
+        started = time.perf_counter()
+        conn = self.db.connection()
+        done = 0
+        while done < total:
+            n = min(args.batch_size, total - done)
+            owners = rng.choices(self.user_ids, cum_weights=user_weights, k=n)
+            cats = rng.choices(CATEGORIES, cum_weights=cat_weights, k=n)
+            assigned = (
+                rng.choices(self.center_ids, cum_weights=center_weights, k=n) if center_weights else [None] * n
+            )
+            rows = []
+            for i in range(n):
+                rid = next_id + done + i
+                uid = owners[i]
+                category, suggestion, co2, _ = cats[i]
+                created = self._random_time()
+                confidence = round(rng.uniform(0.65, 0.99), 2)
+                points = 10 + int(confidence * 10)
+                center = assigned[i] if rng.random() < args.assigned_ratio else None
+                recycled_at = None
+                if center is None:
+                    status = "pending"
+                else:
+                    age_days = (self.now - created).days
+                    p_recycled = 0.85 if age_days > 14 else 0.3
+                    roll = rng.random()
+                    if roll < p_recycled:
+                        status = "recycled"
+                        recycled_at = min(self.now, created + timedelta(seconds=rng.randrange(3600, 14 * 86400)))
+                    elif roll < p_recycled + 0.1:
+                        status = "received"
+                    else:
+                        status = "assigned"
+                image = images[rid % len(images)] if images else f"synthetic_{rid}.jpg"
+                rows.append((
+                    rid, uid, image, category, confidence, suggestion, center, status, co2, points,
+                    _dt(created), _dt(recycled_at) if recycled_at else None,
+                ))
+                k = user_index[uid]
+                u_points[k] += points
+                u_co2[k] += co2
+                if u_last[k] is None or created > u_last[k]:
+                    u_last[k] = created
+                if recycled_at is not None:
+                    u_recycled[k] += 1
+                    c_recycled[center] = c_recycled.get(center, 0) + 1
+                    c_co2[center] = c_co2.get(center, 0.0) + co2
+            conn.exec_driver_sql(sql, rows)
+            done += n
+            if done % (args.batch_size * 20) == 0 or done == total:
+                self.db.commit()
+                conn = self.db.connection()
+                rate = done / max(time.perf_counter() - started, 1e-9)
+                print(f"  reports {done}/{total} ({rate:,.0f}/s)")
+        self.db.commit()
+
+        # Totals the stats consumer would have accumulated, written once per entity
+        users = User.__table__
+        user_rows = [
+            {"b_id": self.user_ids[k], "v_points": u_points[k], "v_level": u_points[k] // 100 + 1,
+             "v_co2": round(u_co2[k], 3), "v_recycled": u_recycled[k], "v_last": u_last[k]}
+            for k in range(n_users) if u_last[k] is not None
+        ]
+        user_stmt = (
+            update(users).where(users.c.id == bindparam("b_id"))
+            .values(points=bindparam("v_points"), level=bindparam("v_level"),
+                    total_co2_saved=bindparam("v_co2"), total_items_recycled=bindparam("v_recycled"),
+                    last_active=bindparam("v_last"))
+        )
+        for start in range(0, len(user_rows), args.batch_size):
+            self.db.connection().execute(user_stmt, user_rows[start:start + args.batch_size])
+        centers = RecyclerCenter.__table__
+        center_stmt = (
+            update(centers).where(centers.c.id == bindparam("b_id"))
+            .values(total_recycled=bindparam("v_recycled"), total_co2_saved=bindparam("v_co2"),
+                    performance_score=bindparam("v_score"))
+        )
+        center_rows = [
+            {"b_id": cid, "v_recycled": n, "v_co2": round(c_co2[cid], 3), "v_score": min(100.0, 2.0 * n)}
+            for cid, n in c_recycled.items()
+        ]
+        if center_rows:
+            self.db.connection().execute(center_stmt, center_rows)
+        self.db.commit()
+
+    def achievements(self) -> None:
+        existing = set(self.db.execute(select(Achievement.name)).scalars())
+        rows = [
+            {"name": name, "description": desc, "icon": icon, "badge_type": badge,
+             "requirement": json.dumps(req), "points_reward": reward}
+            for name, desc, icon, badge, req, reward in ACHIEVEMENTS
+            if name not in existing
+        ]
+        self._insert(Achievement.__table__, rows)
+        self.db.commit()
+        achievements.engine.invalidate()
+
+    def challenges(self) -> None:
+        rng = self.rng
+        rows = []
+        for i in range(self.args.challenges):
+            length = rng.choice([7, 14, 30])
+            start = self.now - timedelta(days=rng.randrange(max(self.args.days, length)))
+            metric = rng.choice(["reports", "recycled"])
+            category = rng.choice([None, None] + [c[0] for c in CATEGORIES])
+            rows.append({
+                "title": f"{'Report' if metric == 'reports' else 'Recycle'} {category or 'e-waste'} sprint #{i + 1}",
+                "description": f"Community {length}-day {metric} challenge",
+                "target": rng.choice([100, 500, 1000, 5000]),
+                "current_progress": 0, "metric": metric, "category": category,
+                "start_date": start, "end_date": start + timedelta(days=length),
+                "is_active": True, "reward_points": rng.choice([0, 25, 50, 100]),
+            })
+        self._insert(Challenge.__table__, rows)
+        self.db.commit()
+        if rows:
+            challenges.recompute(self.db)
+            # Completion time is approximated by the window end; rewards are not paid retroactively
+            self.db.execute(
+                update(Challenge)
+                .where(Challenge.completed_at.is_(None), Challenge.current_progress >= Challenge.target)
+                .values(completed_at=Challenge.end_date)
+            )
+            self.db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--centers", type=int, default=20)
+    parser.add_argument("--reports", type=int, default=10000)
+    parser.add_argument("--challenges", type=int, default=10)
+    parser.add_argument("--days", type=int, default=365, help="length of the simulated history")
+    parser.add_argument("--assigned-ratio", type=float, default=0.8, help="share of reports sent to a center")
+    parser.add_argument("--images", type=int, default=0, help="store this many placeholder JPEGs in the image storage backend")
+    parser.add_argument("--no-achievements", action="store_true", help="skip inserting achievement definitions")
+    parser.add_argument("--award-achievements", action="store_true", help="award achievements after loading")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per executemany")
+    args = parser.parse_args()
+
+    init_db()
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        for name in fts.INDEXES:
+            fts.drop(conn, name)
+        conn.commit()
+    db = SessionLocal()
+    try:
+        db.connection().exec_driver_sql("PRAGMA synchronous=OFF")
+        gen = Generator(db, args)
+        gen.users()
+        gen.centers()
+        print(f"users={len(gen.user_ids)} centers={args.centers} ({len(gen.center_ids)} approved)")
+        images = _placeholder_images(args.images, gen.rng) if args.images else []
+        gen.reports(images)
+        if not args.no_achievements:
+            gen.achievements()
+        gen.challenges()
+        if args.award_achievements:
+            print(f"awarded {achievements.backfill(db)} achievements")
+    finally:
+        db.close()
+
+    print("rebuilding search indexes")
+    with engine.connect() as conn:
+        fts.ensure_fts(conn)
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
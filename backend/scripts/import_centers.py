@@ -0,0 +1,48 @@
+"""
+Bulk upsert recycler centers from a CSV or GeoJSON file.
+
+CSV needs a header row with name, latitude, longitude and optionally
+description, contact_info. GeoJSON may be a FeatureCollection or one
+Point feature per line.
+
+Usage (from the backend directory):
+    python -m scripts.import_centers centers.csv [--approve] [--batch-size 500]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from core.center_import import ParseError, import_centers, parse_csv, parse_geojson
+from core.db import SessionLocal, init_db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["csv", "geojson"], help="defaults to the file extension")
+    parser.add_argument("--approve", action="store_true", help="mark imported centers as approved")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows written per transaction")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "geojson")
+    init_db()
+    db = SessionLocal()
+    try:
+        with args.path.open(encoding="utf-8-sig", errors="surrogateescape", newline="") as stream:
+            rows = parse_csv(stream) if fmt == "csv" else parse_geojson(stream)
+            result = import_centers(db, rows, approve=args.approve, batch_size=args.batch_size)
+    except ParseError as exc:
+        failed, result = exc, exc.result
+    else:
+        failed = None
+    finally:
+        db.close()
+    print(f"inserted={result.inserted} updated={result.updated} errors={result.error_count}")
+    for err in result.errors:
+        print(f"  row {err['row']}: {err['error']}")
+    if failed is not None:
+        sys.exit(f"Stopped at {failed}; the counts above were committed before it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Copy locally stored images into the configured storage backend, e.g. when
+moving from STORAGE_BACKEND=local to s3. Names are kept, so existing
+`image_path` values keep working; objects already present are skipped.
+
+Usage (from the backend directory):
+    STORAGE_BACKEND=s3 S3_BUCKET=ewm-images python -m scripts.migrate_storage [--source uploads]
+"""
+import argparse
+from pathlib import Path
+
+from core import storage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", type=Path, default=Path("uploads"), help="local directory to copy from")
+    args = parser.parse_args()
+
+    if isinstance(storage.backend, storage.LocalStorage) and storage.backend.root.resolve() == args.source.resolve():
+        parser.error("the configured backend is the source directory; set STORAGE_BACKEND first")
+    copied = skipped = 0
+    for path in sorted(args.source.iterdir()):
+        if not path.is_file() or path.name.startswith("."):
+            continue
+        if storage.backend.exists(path.name):
+            skipped += 1
+            continue
+        storage.backend.save(path.name, path.read_bytes())
+        copied += 1
+    print(f"Copied {copied} images, {skipped} already present")
+
+
+if __name__ == "__main__":
+    main()
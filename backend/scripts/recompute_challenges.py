@@ -0,0 +1,31 @@
+"""
+Rebuild challenge progress from the reports table and print any drift.
+
+Usage (from the backend directory):
+    python -m scripts.recompute_challenges
+"""
+import argparse
+
+from core.challenges import recompute
+from core.db import SessionLocal, init_db
+
+
+def main() -> None:
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        rows = recompute(db)
+    finally:
+        db.close()
+    drifted = 0
+    for challenge_id, stored, actual in rows:
+        marker = "" if stored == actual else "  <- drift"
+        drifted += stored != actual
+        print(f"challenge {challenge_id}: stored={stored} recomputed={actual}{marker}")
+    print(f"{len(rows)} challenges checked, {drifted} corrected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Runs the bench.query_budget pytest plugin against the real app in a scratch
+directory (its own SQLite file) and checks that an over-budget request fails
+the test while one within budget passes.
+
+From the backend directory:
+    python -m pytest tests
+"""
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+pytest_plugins = ["pytester"]
+
+INNER_TESTS = '''
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.query_budget(0, route="/recyclers/centers")
+def test_over_budget(client):
+    assert client.get("/recyclers/centers").status_code == 200
+
+
+@pytest.mark.query_budget(50, route="/recyclers/centers")
+def test_within_budget(client):
+    assert client.get("/recyclers/centers").status_code == 200
+
+
+@pytest.mark.query_budget(0, route="/recyclers/centers", method="POST")
+def test_other_method_not_counted(client):
+    assert client.get("/recyclers/centers").status_code == 200
+'''
+
+
+def test_query_budget_plugin(pytester, monkeypatch):
+    monkeypatch.setenv("PYTHONPATH", str(BACKEND_DIR))
+    monkeypatch.setenv("REPORT_EVENTS_ASYNC", "0")
+    pytester.makepyfile(test_inner=INNER_TESTS)
+
+    # A subprocess, so the app's module-level engine binds to ewm.db in the scratch directory
+    result = pytester.runpytest_subprocess("-p", "bench.query_budget", "-p", "no:cacheprovider")
+
+    result.assert_outcomes(passed=2, failed=1)
+    result.stdout.fnmatch_lines([
+        "*test_over_budget*",
+        "*Query budget exceeded:*",
+        "GET /recyclers/centers (/recyclers/centers) ran * queries, budget 0",
+    ])
@@ -1,10 +1,12 @@
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import {
   recyclerAssigned,
   recyclerUpdateStatus,
   listCenters,
   claimCenter,
-  getMe
+  getMe,
+  openLiveStream,
+  upsertReport
 } from '../services/api.js'
 import { StatusBadge } from '../components/StatusBadge.jsx'
 import { ImageModal } from '../components/ImageModal.jsx'
@@ -41,8 +43,18 @@ export default function RecyclerDashboard() {
     }
   }
 
+  const live = useRef(false)
+
   useEffect(() => {
     loadDashboard()
+    // New assignments and status changes arrive as deltas instead of reloading the list
+    const close = openLiveStream({
+      onOpen: () => { live.current = true },
+      onError: () => { live.current = false },
+      onReport: (report) => setItems(prev => upsertReport(prev, report)),
+      onResync: () => loadDashboard(),
+    })
+    return close
   }, [])
 
   const showToast = (message, type = 'info') => {
@@ -54,7 +66,11 @@ export default function RecyclerDashboard() {
     try {
       await recyclerUpdateStatus(id, status)
       showToast(`Status updated to ${status}`, 'success')
-      await loadDashboard()
+      if (live.current) {
+        setItems(prev => prev.map(item => (item.id === id ? { ...item, status } : item)))
+      } else {
+        await loadDashboard()
+      }
     } catch (err) {
       showToast(err?.response?.data?.detail || 'Failed to update status', 'error')
     }
@@ -1,8 +1,8 @@
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { MapContainer, TileLayer, Marker, Popup } from 'react-leaflet'
 import 'leaflet/dist/leaflet.css'
 import L from 'leaflet'
-import { createReport, listCenters, userHistory, getUserStats } from '../services/api.js'
+import { createReport, listCenters, userHistory, getUserStats, openLiveStream, upsertReport } from '../services/api.js'
 import { StatusBadge } from '../components/StatusBadge.jsx'
 import { ImageModal } from '../components/ImageModal.jsx'
 import { LoadingSpinner } from '../components/LoadingSpinner.jsx'
@@ -28,8 +28,19 @@ export default function UserDashboard() {
   const [previewImage, setPreviewImage] = useState(null)
   const [toast, setToast] = useState(null)
 
+  const live = useRef(false)
+
   useEffect(() => {
     loadData()
+    // Status changes and points updates arrive as deltas instead of re-fetching everything
+    const close = openLiveStream({
+      onOpen: () => { live.current = true },
+      onError: () => { live.current = false },
+      onReport: (report) => setHistory(prev => upsertReport(prev, report)),
+      onStats: (s) => setStats(prev => (prev ? { ...prev, points: s.points, recycled_count: s.items_recycled } : prev)),
+      onResync: () => loadData(),
+    })
+    return close
   }, [])
 
   async function loadData() {
@@ -51,7 +62,12 @@ export default function UserDashboard() {
     try {
       const res = await createReport(file, selectedCenter?.id)
       showToast(`Uploaded: ${res.category} (${Math.round(res.confidence * 100)}% confidence)`, 'success')
-      await loadData()
+      if (live.current) {
+        setHistory(prev => upsertReport(prev, res))
+        setStats(prev => (prev ? { ...prev, total_reports: prev.total_reports + 1 } : prev))
+      } else {
+        await loadData()
+      }
       setFile(null)
       setSelectedCenter(null)
       // Reset file input
@@ -77,6 +77,29 @@ export async function getUserStats() {
   return res.data
 }
 
+// Live report/stats deltas over Server-Sent Events. The browser reconnects on its own
+// and resumes from the last received event id. Returns a function that closes the stream.
+export function openLiveStream({ onReport, onStats, onResync, onOpen, onError } = {}) {
+  const token = localStorage.getItem('token')
+  const url = `${api.defaults.baseURL}/live/stream?token=${encodeURIComponent(token || '')}`
+  const source = new EventSource(url)
+  source.addEventListener('report', (e) => onReport && onReport(JSON.parse(e.data)))
+  source.addEventListener('stats', (e) => onStats && onStats(JSON.parse(e.data)))
+  source.addEventListener('resync', () => onResync && onResync())
+  source.onopen = () => onOpen && onOpen()
+  source.onerror = () => onError && onError()
+  return () => source.close()
+}
+
+// Insert or replace a report in a newest-first list
+export function upsertReport(list, report) {
+  const idx = list.findIndex(r => r.id === report.id)
+  if (idx === -1) return [report, ...list]
+  const next = list.slice()
+  next[idx] = report
+  return next
+}
+
 export default api
 
 